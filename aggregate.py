@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+In-memory site state: one table row + detail page per match, plus the price cube
+- Seeded from the data directory, then updated one snapshot at a time
+- Shared by the streaming pipeline and the API server; imports nothing from
+  the scraper, so readers don't need Playwright
+"""
+
+from create_website import summarize_history, summarize_match
+from cube import PriceCube
+from data_loader import DATA_DIR, load_histories, load_snapshots
+from sketches import load_match_sketches
+
+class MatchAggregate:
+    """In-memory site state, seeded from disk and updated per snapshot"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.snapshots = load_snapshots(data_dir)
+        self.histories = {n: summarize_history(h) for n, h in load_histories(data_dir, self.snapshots).items()}
+        self.entries = {}
+        self.cube = PriceCube()
+        for match_num in self.snapshots:
+            self._refresh(match_num)
+
+    def _refresh(self, match_num):
+        quantiles = load_match_sketches(match_num, self.data_dir).recent_windows()
+        summary = summarize_match(match_num, self.snapshots[match_num], self.histories.get(match_num, []), quantiles)
+        if summary:
+            self.entries[match_num] = summary
+            match, detail_page = summary
+            self.cube.update_match(match, detail_page['listings'], detail_page['scraped_at'])
+        else:
+            self.entries.pop(match_num, None)
+            self.cube.remove_match(match_num)
+
+    def update(self, snapshot):
+        """Fold a newly stored snapshot into the aggregate"""
+        match_num = snapshot.match_num
+        self.snapshots[match_num] = snapshot
+        history = self.histories.get(match_num, []) + summarize_history([snapshot])
+        history.sort(key=lambda h: h['timestamp'])
+        self.histories[match_num] = history
+        self._refresh(match_num)
+
+    def site_inputs(self):
+        """(matches, detail_pages, totals) for create_website.write_site"""
+        entries = [self.entries[n] for n in sorted(self.entries)]
+        # A copy: the build runs on another thread while the cube keeps changing
+        return [entry[0] for entry in entries], [entry[1] for entry in entries], self.cube.total().copy()
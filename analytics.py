@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Cross-match price analytics
+- Arbitrage: the same collectible offered at different floors across matches
+  or rarities, found by hash-grouping listings on their normalised name
+- Floor spread: how far each match's cheapest listing sits below its median
+
+Both come out of a single pass over the listings; only the (much smaller)
+per-name groups are revisited to rank them.
+
+Usage: python3 analytics.py [--out analytics]    # CSVs from the stored data
+"""
+
+import csv
+import os
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+
+from models import format_price
+
+ANALYTICS_DIR = "analytics"
+ARBITRAGE_CSV = "arbitrage.csv"
+FLOOR_SPREADS_CSV = "floor_spreads.csv"
+
+@dataclass(slots=True)
+class Offer:
+    """Cheapest listing of one collectible within one match and rarity"""
+    name: str
+    match_num: int
+    rarity: object
+    floor_cents: int
+    listings: int
+
+@dataclass(slots=True)
+class Opportunity:
+    """A collectible whose floor differs between two (match, rarity) offers"""
+    name: str
+    offers: int
+    low: Offer
+    high: Offer
+
+    @property
+    def gap_cents(self):
+        return self.high.floor_cents - self.low.floor_cents
+
+    @property
+    def gap_ratio(self):
+        """Gap as a share of the cheaper floor"""
+        return self.gap_cents / self.low.floor_cents
+
+@dataclass(slots=True)
+class FloorSpread:
+    """Distance between a match's floor and its median price"""
+    match_num: int
+    listings: int
+    floor_cents: int
+    median_cents: int
+
+    @property
+    def spread_cents(self):
+        return self.median_cents - self.floor_cents
+
+    @property
+    def spread_ratio(self):
+        """Discount of the floor against the median"""
+        return self.spread_cents / self.median_cents if self.median_cents else 0.0
+
+def analyze_listings(listings_by_match):
+    """(opportunities, floor_spreads) for {match_num: [Listing]}, both ranked best first"""
+    # One pass: per-match prices, and the floor of every (name, match, rarity)
+    offers = {}
+    match_prices = defaultdict(list)
+    for match_num, listings in listings_by_match.items():
+        prices = match_prices[match_num]
+        for listing in listings:
+            price_cents = listing.price_cents
+            if price_cents <= 0:
+                continue
+            prices.append(price_cents)
+            name = listing.collectible_name
+            if not name:
+                continue
+            key = (name, match_num, listing.rarity)
+            offer = offers.get(key)
+            if offer is None:
+                offers[key] = Offer(name, match_num, listing.rarity, price_cents, 1)
+            else:
+                offer.listings += 1
+                if price_cents < offer.floor_cents:
+                    offer.floor_cents = price_cents
+
+    # Group offers by name; only names offered more than once can be mispriced
+    by_name = defaultdict(list)
+    for offer in offers.values():
+        by_name[offer.name].append(offer)
+
+    opportunities = []
+    for name, group in by_name.items():
+        if len(group) < 2:
+            continue
+        low = min(group, key=lambda offer: (offer.floor_cents, offer.match_num))
+        high = max(group, key=lambda offer: (offer.floor_cents, -offer.match_num))
+        if high.floor_cents > low.floor_cents:
+            opportunities.append(Opportunity(name, len(group), low, high))
+    opportunities.sort(key=lambda o: (-o.gap_ratio, -o.gap_cents, o.name))
+
+    spreads = [
+        FloorSpread(match_num, len(prices), min(prices), round(statistics.median(prices)))
+        for match_num, prices in match_prices.items() if prices
+    ]
+    spreads.sort(key=lambda s: (-s.spread_ratio, s.match_num))
+    return opportunities, spreads
+
+def opportunity_rows(opportunities):
+    for o in opportunities:
+        yield {
+            'collectible': o.name,
+            'offers': o.offers,
+            'buy_match': o.low.match_num,
+            'buy_rarity': o.low.rarity.label,
+            'buy_price': format_price(o.low.floor_cents),
+            'vs_match': o.high.match_num,
+            'vs_rarity': o.high.rarity.label,
+            'vs_price': format_price(o.high.floor_cents),
+            'gap': format_price(o.gap_cents),
+            'gap_pct': f"{o.gap_ratio * 100:.1f}",
+        }
+
+def spread_rows(spreads):
+    for s in spreads:
+        yield {
+            'match': s.match_num,
+            'listings': s.listings,
+            'floor': format_price(s.floor_cents),
+            'median': format_price(s.median_cents),
+            'spread': format_price(s.spread_cents),
+            'spread_pct': f"{s.spread_ratio * 100:.1f}",
+        }
+
+def _write_csv(path, rows):
+    rows = list(rows)
+    with open(f"{path}.tmp", 'w', newline='', encoding='utf-8') as f:
+        if rows:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(f"{path}.tmp", path)
+
+def write_analytics_csv(opportunities, spreads, out_dir=ANALYTICS_DIR):
+    """Write arbitrage.csv and floor_spreads.csv into out_dir"""
+    os.makedirs(out_dir, exist_ok=True)
+    _write_csv(os.path.join(out_dir, ARBITRAGE_CSV), opportunity_rows(opportunities))
+    _write_csv(os.path.join(out_dir, FLOOR_SPREADS_CSV), spread_rows(spreads))
+
+if __name__ == "__main__":
+    import argparse
+
+    from data_loader import DATA_DIR, load_snapshots
+
+    parser = argparse.ArgumentParser(description="Export arbitrage and floor-spread analytics as CSV")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", default=ANALYTICS_DIR)
+    parser.add_argument("--top", type=int, default=10, help="opportunities to print")
+    args = parser.parse_args()
+
+    snapshots = load_snapshots(args.data_dir)
+    opportunities, spreads = analyze_listings({
+        n: [listing for listing in snapshot.listings if listing.is_valid]
+        for n, snapshot in snapshots.items() if snapshot.success
+    })
+    write_analytics_csv(opportunities, spreads, args.out)
+    print(f"📈 {len(opportunities)} opportunities, {len(spreads)} match spreads -> {args.out}/")
+    for row in list(opportunity_rows(opportunities))[:args.top]:
+        print(f"   {row['collectible'][:48]:<48} M{row['buy_match']:<4} {row['buy_price']:>12} "
+              f"vs M{row['vs_match']:<4} {row['vs_price']:>12}  +{row['gap_pct']}%")
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Read-only JSON API over the stored marketplace data
+- asyncio HTTP/1.1 server with keep-alive, no dependencies beyond the stdlib
+- Match summaries, listings and history are served from the in-memory
+  MatchAggregate; the data directory is polled and changed matches reloaded
+- Encoded responses are cached with their ETag and gzip body, so repeat
+  requests cost a dict lookup (or a 304 with If-None-Match); the gzip body
+  has an ETag of its own, as a different representation
+- A handler that fails answers 500 with a JSON error, which is not cached
+
+Endpoints:
+  GET /api/matches                  ?stage= &country= &venue= &offset= &limit=
+  GET /api/matches/{n}
+  GET /api/matches/{n}/listings     ?offset= &limit=
+  GET /api/matches/{n}/history      ?offset= &limit=
+  GET /api/matches/{n}/quantiles    ?since= &until= (YYYY-MM-DD, from the price sketches)
+  GET /api/rollup                   ?by=stage,rarity (cube rollup, see cube.py)
+
+Usage: python3 api_server.py [--port 8080] [--refresh 2]
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import asdict
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from aggregate import MatchAggregate
+from cube import canonical_dims, format_value
+from data_loader import DATA_DIR, decode_snapshot, match_files, read_bytes
+from models import format_price
+from sketches import load_match_sketches
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 512
+
+# Encoded responses kept in memory (least recently used are dropped)
+MAX_CACHED_RESPONSES = 2048
+
+# Request line and headers larger than this are rejected
+MAX_HEADER_BYTES = 16 * 1024
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class CachedResponse:
+    """An encoded JSON body with its ETag; the gzip variant is built on first use"""
+
+    __slots__ = ('status', 'body', 'etag', 'gzip_etag', '_gzipped')
+
+    def __init__(self, status, payload):
+        self.status = status
+        self.body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+def paginate(items, query):
+    """Slice items by ?offset=&limit= into a page envelope"""
+    try:
+        offset = max(0, int(query.get('offset', 0)))
+        limit = min(MAX_PAGE_SIZE, max(1, int(query.get('limit', DEFAULT_PAGE_SIZE))))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "offset and limit must be integers")
+    return {
+        'total': len(items),
+        'offset': offset,
+        'limit': limit,
+        'items': items[offset:offset + limit],
+    }
+
+class MarketApi:
+    """Routes requests against a MatchAggregate kept in sync with the data directory"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.aggregate = MatchAggregate(data_dir)
+        self.signatures = self._signatures()
+        self.version = 0
+        self.responses = OrderedDict()
+
+    def _signatures(self):
+        """(size, mtime) of every mN.json, to spot stored snapshots that changed"""
+        signatures = {}
+        for match_num, path in match_files(self.data_dir).items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signatures[match_num] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def _read_changed(self):
+        """Decode the snapshots whose files changed since the last refresh"""
+        signatures = self._signatures()
+        changed = {}
+        for match_num, signature in signatures.items():
+            if self.signatures.get(match_num) != signature:
+                raw = read_bytes(os.path.join(self.data_dir, f"m{match_num}.json"))
+                try:
+                    changed[match_num] = decode_snapshot(raw)
+                except ValueError:
+                    # Caught mid-write; the next poll picks it up
+                    signatures[match_num] = self.signatures.get(match_num)
+        return signatures, changed
+
+    async def refresh(self):
+        """Reload changed matches; returns how many were updated"""
+        loop = asyncio.get_running_loop()
+        self.signatures, changed = await loop.run_in_executor(None, self._read_changed)
+        updated = 0
+        for match_num, snapshot in changed.items():
+            previous = self.aggregate.snapshots.get(match_num)
+            if previous is not None and previous.timestamp == snapshot.timestamp:
+                continue
+            self.aggregate.update(snapshot)
+            updated += 1
+        if updated:
+            self.version += 1
+            self.responses.clear()
+        return updated
+
+    async def watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            updated = await self.refresh()
+            if updated:
+                print(f"🔄 Reloaded {updated} matches")
+
+    def response(self, path, query):
+        """Cached response for a GET of path?query"""
+        key = (path, tuple(sorted(query.items())))
+        cached = self.responses.get(key)
+        if cached is not None:
+            self.responses.move_to_end(key)
+            return cached
+        try:
+            cached = CachedResponse(HTTPStatus.OK, self.route(path, query))
+        except ApiError as e:
+            cached = CachedResponse(e.status, {'error': str(e)})
+        except Exception as e:
+            # A bug or a transient failure (e.g. a sketch file being replaced) - not cached
+            print(f"⚠️  {path} failed: {e!r}")
+            return CachedResponse(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "internal server error"})
+        self.responses[key] = cached
+        if len(self.responses) > MAX_CACHED_RESPONSES:
+            self.responses.popitem(last=False)
+        return cached
+
+    def route(self, path, query):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['api', 'rollup']:
+            return self.rollup(query)
+        if parts[:2] != ['api', 'matches'] or len(parts) > 4:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no such endpoint {path}")
+        if len(parts) == 2:
+            return self.matches(query)
+
+        if not parts[2].isdigit() or int(parts[2]) not in self.aggregate.entries:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no data for match {parts[2]}")
+        match, detail = self.aggregate.entries[int(parts[2])]
+        if len(parts) == 3:
+            return {'match': asdict(match), 'scraped_at': detail['scraped_at']}
+        if parts[3] == 'listings':
+            return paginate([listing.to_dict() for listing in detail['listings']], query)
+        if parts[3] == 'history':
+            return paginate(detail['history'], query)
+        if parts[3] == 'quantiles':
+            return self.quantiles(match.match_num, query)
+        raise ApiError(HTTPStatus.NOT_FOUND, f"no such endpoint {path}")
+
+    def matches(self, query):
+        rows = self.aggregate.site_inputs()[0]
+        for field in ('stage', 'country', 'venue'):
+            if query.get(field):
+                wanted = query[field].lower()
+                rows = [row for row in rows if getattr(row, field).lower() == wanted]
+        return paginate([asdict(row) for row in rows], query)
+
+    def quantiles(self, match_num, query):
+        since, until = query.get('since'), query.get('until')
+        for day in (since, until):
+            if day and not (len(day) == 10 and day[4] == day[7] == '-'):
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"expected YYYY-MM-DD, got {day}")
+        rows = load_match_sketches(match_num, self.data_dir).window_quantiles(since, until)
+        return {
+            'since': since,
+            'until': until,
+            'items': [{**row, 'rarity': format_value(row['rarity']),
+                       **{q: format_price(row[q]) for q in ('p10', 'median', 'p90')}} for row in rows],
+        }
+
+    def rollup(self, query):
+        try:
+            dims = canonical_dims(dim.strip() for dim in query.get('by', '').split(',') if dim.strip())
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        cells = self.aggregate.cube.rollup(*dims)
+        items = [{**{dim: format_value(value) for dim, value in zip(dims, key)}, **measures.to_dict()}
+                 for key, measures in sorted(cells.items(), key=lambda item: tuple(str(v) for v in item[0]))]
+        return paginate(items, query)
+
+async def read_request(reader):
+    """(method, target, version, headers) of the next request, or None at EOF"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise ApiError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "request head too large")
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    # Read-only API: drain any body so the connection can be reused
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length must be an integer")
+    if length < 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length must not be negative")
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+def encode_response(status, headers, body=b''):
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+def build_response(api, method, target, request_headers):
+    """Encoded response bytes for one request"""
+    if method not in ('GET', 'HEAD'):
+        cached = CachedResponse(HTTPStatus.METHOD_NOT_ALLOWED, {'error': "read-only API"})
+    else:
+        url = urlsplit(target)
+        cached = api.response(url.path, dict(parse_qsl(url.query)))
+
+    # The gzip body is a different representation, so it gets its own ETag
+    gzipped = len(cached.body) >= GZIP_MIN_BYTES and 'gzip' in request_headers.get('accept-encoding', '')
+    headers = {
+        'Content-Type': 'application/json; charset=utf-8',
+        'ETag': cached.gzip_etag if gzipped else cached.etag,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if cached.status == HTTPStatus.OK and headers['ETag'] in request_headers.get('if-none-match', ''):
+        return encode_response(HTTPStatus.NOT_MODIFIED, headers)
+
+    body = cached.body
+    if gzipped:
+        body = cached.gzipped
+        headers['Content-Encoding'] = 'gzip'
+    headers['Content-Length'] = str(len(body))
+    return encode_response(cached.status, headers, b'' if method == 'HEAD' else body)
+
+async def serve_connection(api, reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ApiError as e:
+                error = CachedResponse(e.status, {'error': str(e)})
+                writer.write(encode_response(e.status, {'Content-Type': 'application/json', 'Connection': 'close',
+                                                        'Content-Length': str(len(error.body))}, error.body))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, target, version, headers = request
+            writer.write(build_response(api, method, target, headers))
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_api_server(api, host="127.0.0.1", port=8080):
+    """Start serving api; returns the asyncio Server"""
+    return await asyncio.start_server(
+        lambda reader, writer: serve_connection(api, reader, writer),
+        host, port, limit=MAX_HEADER_BYTES,
+    )
+
+async def run_api_server(host="127.0.0.1", port=8080, refresh_interval=2.0, data_dir=DATA_DIR):
+    api = MarketApi(data_dir)
+    server = await start_api_server(api, host, port)
+    print(f"📡 Serving {len(api.aggregate.entries)} matches at http://{host}:{server.sockets[0].getsockname()[1]}/api/matches")
+    watcher = asyncio.create_task(api.watch(refresh_interval))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the marketplace data as a read-only JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--refresh", type=float, default=2.0, help="seconds between checks for new data")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_api_server(args.host, args.port, args.refresh, args.data_dir))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Load test: api_server.py request rate and latency over keep-alive connections
+
+Starts the API server in a subprocess and drives it with concurrent asyncio
+clients, once with plain GETs and once revalidating with If-None-Match.
+
+Usage: python3 benchmarks/bench_api.py [connections] [seconds]
+"""
+
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PATHS = ["/api/matches", "/api/matches?stage=final"] + \
+        [f"/api/matches/{n}" for n in range(1, 105)] + \
+        [f"/api/matches/{n}/listings?limit=10" for n in range(1, 105)] + \
+        [f"/api/matches/{n}/history" for n in range(1, 105)]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def wait_until_up(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API server did not start")
+
+async def client(port, deadline, latencies, statuses, revalidate):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etags = {}
+    try:
+        while time.perf_counter() < deadline:
+            path = random.choice(PATHS)
+            extra = f"If-None-Match: {etags[path]}\r\n" if revalidate and path in etags else ""
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nAccept-Encoding: gzip\r\n{extra}\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            headers = dict(line.split(": ", 1) for line in head.decode().split("\r\n")[1:] if ": " in line)
+            await reader.readexactly(int(headers.get("Content-Length", 0)))
+            latencies.append(time.perf_counter() - start)
+            status = int(head.split(b" ", 2)[1])
+            statuses[status] = statuses.get(status, 0) + 1
+            if "ETag" in headers:
+                etags[path] = headers["ETag"]
+    finally:
+        writer.close()
+
+async def run_load(port, connections, seconds, revalidate, report=True):
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(port, deadline, latencies, statuses, revalidate) for _ in range(connections)))
+    if not report:
+        return
+    latencies.sort()
+    label = "If-None-Match" if revalidate else "plain GET"
+    print(f"   {label:<14} {len(latencies) / seconds:9.0f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:6.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms   statuses {statuses}")
+
+async def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "api_server.py", "--port", str(port)], cwd=ROOT,
+                              stdout=subprocess.DEVNULL)
+    try:
+        await wait_until_up(port)
+        print(f"📡 {connections} keep-alive connections, {seconds:.0f} s per run")
+        await run_load(port, connections, 1.0, False, report=False)  # warm the response cache
+        for revalidate in (False, True):
+            await run_load(port, connections, seconds, revalidate)
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTTP fast path vs Playwright browser path against the local stand-in
+
+Reports per-tag latency (median / p95) and CPU per tag. Browser CPU includes
+Chromium child processes, so it is measured over the whole run.
+
+Usage: python3 benchmarks/bench_fetch.py [tags]
+"""
+
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_fetcher import FastFetcher, fast_path_available
+from simulated_marketplace import start_server
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fifa_marketplace_data")
+
+def cpu_seconds():
+    """CPU of this process plus reaped children (user + system)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def report(name, latencies, cpu):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"   {name:<10} median {statistics.median(latencies) * 1000:8.1f} ms   "
+          f"p95 {p95 * 1000:8.1f} ms   CPU {cpu / len(latencies) * 1000:8.1f} ms/tag")
+
+async def bench_fast(base_url, match_numbers):
+    latencies = []
+    start_cpu = cpu_seconds()
+    async with FastFetcher(base_url) as fetcher:
+        for match_num in match_numbers:
+            start = time.perf_counter()
+            assert await fetcher.fetch_match(match_num), f"fast path failed for m{match_num}"
+            latencies.append(time.perf_counter() - start)
+    return latencies, cpu_seconds() - start_cpu
+
+async def bench_browser(base_url, match_numbers):
+    from playwright.async_api import async_playwright
+    from fifa_scraper import scrape_match
+
+    latencies = []
+    start_cpu = cpu_seconds()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for match_num in match_numbers:
+            start = time.perf_counter()
+            assert await scrape_match(page, match_num, base_url), f"browser path failed for m{match_num}"
+            latencies.append(time.perf_counter() - start)
+        await browser.close()
+    return latencies, cpu_seconds() - start_cpu
+
+async def main():
+    tags = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    match_numbers = list(range(1, tags + 1))
+    server, base_url = start_server(SOURCE_DIR)
+
+    print(f"🏁 {tags} tags against {base_url}")
+    if fast_path_available():
+        report("http", *await bench_fast(base_url, match_numbers))
+    else:
+        print("   http       skipped (httpx not installed)")
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("   browser    skipped (playwright not installed)")
+    else:
+        report("browser", *await bench_browser(base_url, match_numbers))
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial stdlib json.load vs data_loader at scaled data volume
+
+Both produce the same MatchSnapshot / Listing records. The data_loader run is
+also split into its phases (file reads, JSON decoding, building records), which
+shows where the time goes: with the files in the page cache, reads are nearly
+free and building records costs more than decoding, so a faster JSON decoder
+only moves part of the total.
+
+Usage: python3 benchmarks/bench_loader.py [scale]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import data_loader
+from models import MatchSnapshot
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", data_loader.DATA_DIR)
+
+def build_scaled_dataset(target_dir, scale):
+    """Copy the real data with listings and history multiplied by scale"""
+    os.makedirs(os.path.join(target_dir, "history"))
+    for match_num, path in data_loader.match_files(SOURCE_DIR).items():
+        with open(path) as f:
+            data = json.load(f)
+        data['listings'] = data['listings'] * scale
+        data['listings_count'] = len(data['listings'])
+        with open(os.path.join(target_dir, f"m{match_num}.json"), 'w') as f:
+            json.dump(data, f, indent=2)
+        with open(os.path.join(target_dir, "history", f"m{match_num}.jsonl"), 'w') as f:
+            for _ in range(scale):
+                f.write(json.dumps(data) + "\n")
+
+def load_serial_stdlib(data_dir):
+    """The original create_website loading loop plus history, into the same records"""
+    snapshots, histories = {}, {}
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.startswith('m') and filename.endswith('.json'):
+            match_num = int(filename[1:-5])
+            with open(os.path.join(data_dir, filename), 'r') as f:
+                snapshots[match_num] = MatchSnapshot.from_dict(json.load(f))
+            with open(os.path.join(data_dir, "history", f"m{match_num}.jsonl"), 'r') as f:
+                histories[match_num] = [MatchSnapshot.from_dict(json.loads(line)) for line in f if line.strip()]
+    return snapshots, histories
+
+def load_parallel(data_dir):
+    snapshots = data_loader.load_snapshots(data_dir)
+    return snapshots, data_loader.load_histories(data_dir, snapshots)
+
+def load_phases(data_dir):
+    """Seconds spent by data_loader's steps, run one after the other: reads, decode, records"""
+    paths = list(data_loader.match_files(data_dir).values())
+    paths += [os.path.join(data_dir, "history", f"m{n}.jsonl") for n in data_loader.match_files(data_dir)]
+    start = time.perf_counter()
+    raws = [data_loader.read_bytes(path) for path in paths]
+    read = time.perf_counter()
+    decoded = [data_loader.decode_json(raw) if path.endswith('.json') else data_loader.decode_jsonl(raw)
+               for path, raw in zip(paths, raws)]
+    decode = time.perf_counter()
+    for path, data in zip(paths, decoded):
+        if path.endswith('.json'):
+            MatchSnapshot.from_dict(data)
+        else:
+            [MatchSnapshot.from_dict(record) for record in data]
+    records = time.perf_counter()
+    return read - start, decode - read, records - decode
+
+def best_of(func, data_dir, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data_dir)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    data_dir = tempfile.mkdtemp(prefix="fifa_bench_")
+    try:
+        build_scaled_dataset(data_dir, scale)
+        assert load_serial_stdlib(data_dir) == load_parallel(data_dir)
+        
+        serial = best_of(load_serial_stdlib, data_dir)
+        parallel = best_of(load_parallel, data_dir)
+        phases = min((load_phases(data_dir) for _ in range(5)), key=sum)
+        
+        print(f"📦 Scale {scale}x, decoder: {data_loader.JSON_DECODER}")
+        print(f"   serial json.load:  {serial * 1000:8.1f} ms")
+        print(f"   data_loader:       {parallel * 1000:8.1f} ms")
+        print(f"   speedup:           {serial / parallel:8.2f}x")
+        print(f"   data_loader steps: read {phases[0] * 1000:.1f} ms, decode {phases[1] * 1000:.1f} ms, "
+              f"records {phases[2] * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query.py index build, refresh and query latency at scaled data volume
+
+Every match gets `scale` history snapshots (spread over the past weeks) and a
+current snapshot with `scale` times the listings.
+
+Usage: python3 benchmarks/bench_query.py [scale]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import data_loader
+from models import Rarity
+from query import MarketIndex, parse_time
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", data_loader.DATA_DIR)
+
+QUERIES = {
+    "cheapest Iconic, knockout": ('listings', {'stages': ['Round of 32', 'Round of 16', 'Quarterfinal',
+                                                          'Semifinal', '3rd Place', 'Final'],
+                                               'rarity': Rarity.ICONIC}, 'price', 10),
+    "Mexico under US$1,000": ('listings', {'country': 'Mexico', 'max_price': 100_000}, 'price', 50),
+    "m1-m24 last 7 days": ('listings', {'match_numbers': range(1, 25), 'since': parse_time('7d')}, 'price', 20),
+    "floor changes, 7 days": ('changes', {'since': parse_time('7d')}, 'change', None),
+}
+
+def build_scaled_dataset(target_dir, scale):
+    os.makedirs(os.path.join(target_dir, "history"))
+    now = datetime.now()
+    for match_num, path in data_loader.match_files(SOURCE_DIR).items():
+        with open(path) as f:
+            data = json.load(f)
+        with open(os.path.join(target_dir, "history", f"m{match_num}.jsonl"), 'w') as f:
+            for i in range(scale):
+                data['timestamp'] = (now - timedelta(hours=6 * (scale - i))).isoformat()
+                f.write(json.dumps(data) + "\n")
+        data['listings'] = data['listings'] * scale
+        data['listings_count'] = len(data['listings'])
+        data['timestamp'] = now.isoformat()
+        with open(os.path.join(target_dir, f"m{match_num}.json"), 'w') as f:
+            json.dump(data, f, indent=2)
+
+def timed(func, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    data_dir = tempfile.mkdtemp(prefix="fifa_bench_")
+    try:
+        build_scaled_dataset(data_dir, scale)
+        index = MarketIndex(data_dir)
+        build_ms, added = timed(index.refresh)
+        rows = index.db.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+        refresh_ms, _ = timed(index.refresh, repeat=5)
+
+        print(f"📦 Scale {scale}x: {added} snapshots, {rows} listings indexed")
+        print(f"   initial build:     {build_ms:8.1f} ms")
+        print(f"   no-op refresh:     {refresh_ms:8.1f} ms")
+        for name, (command, filters, sort, limit) in QUERIES.items():
+            query_ms, result = timed(lambda: getattr(index, command)(filters, sort, limit), repeat=5)
+            print(f"   {name + ':':<27}{query_ms:8.1f} ms  ({len(result)} rows)")
+        index.close()
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Soak test: the full scraper against a misbehaving stand-in marketplace
+
+Starts simulated_marketplace.py in a subprocess with the given faults, then
+runs N concurrent scrapers (fifa_scraper.iter_scraped_matches, each with its
+own browser session) over the discovered tags, round-robin, for --duration
+seconds per concurrency level. Nothing is written to the data directory.
+
+By default every tag goes through the browser, which is what a long soak is
+for: page recycling, heap growth, leaked handles. --fast tries the HTTP fast
+path first (the browser only sees the tags it misses); --http-only never
+launches the browser.
+
+Reported per level, and every --report-every seconds while it runs:
+  throughput   tags per second attempted and scraped
+  latency      per tag, p50 / p95 / p99 / max
+  success      share of tags that returned a snapshot; "complete" also needs
+               the full grid (a truncated grid that passes unnoticed is the
+               stale-data case this is meant to catch)
+  path         tags served by the browser / the HTTP fast path / neither
+  memory       RSS of this process and all its children (browser, driver);
+               the summary's figure is taken once the scrapers have shut down,
+               so what it gained over the start is what they left behind
+
+Usage:
+    python3 benchmarks/soak_scraper.py --concurrency 1,4,8 --duration 3600 \\
+        --latency-ms 400 --latency-sigma 0.8 --rate-limit-rate 0.05 --error-rate 0.02 --truncate-rate 0.05
+    python3 benchmarks/soak_scraper.py --fast --duration 600        # HTTP first, browser fallback
+    python3 benchmarks/soak_scraper.py --http-only --duration 60    # without Chromium
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from fifa_scraper import DEFAULT_MAX_LISTINGS, iter_scraped_matches
+from http_fetcher import fast_path_available
+from simulated_marketplace import add_fault_arguments
+from tag_discovery import active_match_numbers, fetch_tag_counts
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_tree_rss_mb(root_pid=None):
+    """RSS of a process and all its descendants, from /proc (0 where unavailable)"""
+    root_pid = root_pid or os.getpid()
+    children, rss = {}, {}
+    try:
+        pids = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except FileNotFoundError:
+        return 0.0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name may contain spaces; fields resume after its ')'
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (FileNotFoundError, ProcessLookupError, PermissionError, IndexError):
+            continue
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21]) * PAGE_SIZE
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total / (1024 * 1024)
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+class LevelStats:
+    """Outcomes of one concurrency level"""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.latencies = []
+        self.attempts = 0
+        self.scraped = 0
+        self.complete = 0
+        self.failed = 0
+        self.paths = Counter()
+        self.rss_peak = 0.0
+        self.rss_samples = []
+        self.start = time.perf_counter()
+        self.end = None
+
+    def record(self, match_num, snapshot, path, latency=None):
+        """Count a tag's outcome and path; latency None leaves it out of the percentiles"""
+        self.attempts += 1
+        self.paths[path or 'none'] += 1
+        if latency is not None:
+            self.latencies.append(latency)
+        if snapshot is None:
+            self.failed += 1
+            return
+        self.scraped += 1
+        if snapshot.listings_count >= self.expected.get(match_num, 0):
+            self.complete += 1
+
+    def sample_memory(self):
+        rss = process_tree_rss_mb()
+        self.rss_peak = max(self.rss_peak, rss)
+        self.rss_samples.append(rss)
+        return rss
+
+    def line(self, label):
+        elapsed = (self.end or time.perf_counter()) - self.start
+        attempts = self.attempts
+        latencies = sorted(self.latencies)
+        rss_first = self.rss_samples[0] if self.rss_samples else 0.0
+        rss_last = self.rss_samples[-1] if self.rss_samples else 0.0
+        return (f"{label:>10} {attempts / elapsed:7.2f} tags/s ({self.scraped / elapsed:6.2f} ok/s)  "
+                f"p50 {percentile(latencies, 0.5) * 1000:7.0f}  p95 {percentile(latencies, 0.95) * 1000:7.0f}  "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.0f}  max {(latencies[-1] if latencies else 0) * 1000:7.0f} ms  "
+                f"success {self.scraped / max(attempts, 1):6.1%}  complete {self.complete / max(attempts, 1):6.1%}  "
+                f"via browser {self.paths['browser']} / http {self.paths['http']} / none {self.paths['none']}  "
+                f"RSS {rss_last:6.0f} MB (start {rss_first:.0f}, peak {self.rss_peak:.0f})")
+
+async def scraper(worker, concurrency, match_numbers, deadline, stats, options):
+    """One scraper walking its share of the tags round-robin until the deadline"""
+    share = match_numbers[worker::concurrency] or match_numbers
+    tags = itertools.takewhile(lambda _: time.perf_counter() < deadline, itertools.cycle(share))
+    start = None
+    paths = []
+    async for match_num, snapshot in iter_scraped_matches(tags, path_log=paths, **options):
+        now = time.perf_counter()
+        # Time since the previous tag, less the scraper's own pause between tags;
+        # the first tag also pays for starting the Playwright driver, so it isn't timed
+        stats.record(match_num, snapshot, paths.pop(), now - start - options["delay"] if start else None)
+        start = now
+
+async def monitor(stats, label, interval, report, deadline):
+    next_report = time.perf_counter() + interval
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(1.0)
+        stats.sample_memory()
+        if time.perf_counter() >= next_report:
+            print(stats.line(label), file=report, flush=True)
+            next_report += interval
+
+async def run_level(concurrency, match_numbers, expected, args, options, report):
+    stats = LevelStats(expected)
+    stats.sample_memory()
+    deadline = time.perf_counter() + args.duration
+    # The scraper narrates every tag; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        watcher = asyncio.create_task(monitor(stats, f"c={concurrency}", args.report_every, report, deadline))
+        await asyncio.gather(*(scraper(worker, concurrency, match_numbers, deadline, stats, options)
+                               for worker in range(concurrency)))
+        stats.end = time.perf_counter()
+        stats.sample_memory()
+        watcher.cancel()
+    return stats
+
+def start_marketplace(port, args):
+    command = [sys.executable, "simulated_marketplace.py", str(port)]
+    for name in ("latency_ms", "latency_sigma", "rate_limit_rate", "retry_after", "error_rate",
+                 "truncate_rate", "truncate_to", "counts", "seed"):
+        value = getattr(args, name)
+        if value not in (None, ""):
+            command += [f"--{name.replace('_', '-')}", str(value)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("simulated marketplace did not start")
+
+def server_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/stats", timeout=10) as response:
+        return json.load(response)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Soak-test the scraper against a faulty stand-in marketplace")
+    parser.add_argument("--concurrency", default="1,2,4", help="comma-separated numbers of concurrent scrapers")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds per concurrency level")
+    parser.add_argument("--report-every", type=float, default=30.0, help="seconds between progress lines")
+    parser.add_argument("--delay", type=float, default=0.0, help="scraper pause between tags (production: 2)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_MAX_LISTINGS, help="max listings per tag")
+    parser.add_argument("--fast", action="store_true", help="HTTP fast path first, browser only for the tags it misses")
+    parser.add_argument("--http-only", action="store_true", help="fast path only, never launch the browser")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    fast = args.fast or args.http_only
+    if fast and not fast_path_available():
+        sys.exit("--fast and --http-only need httpx (pip install 'httpx[http2]')")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_marketplace(port, args)
+    report = sys.stdout
+    try:
+        counts = fetch_tag_counts(base_url)
+        match_numbers = active_match_numbers(counts)
+        expected = {int(tag[1:]): min(count or 0, args.depth) for tag, count in counts.items()
+                    if tag[1:].isdigit()}
+        options = {"fast": fast, "base_url": base_url, "max_listings": args.depth, "delay": args.delay,
+                   "browser": not args.http_only, "browser_state": None}
+        levels = [int(level) for level in args.concurrency.split(",")]
+
+        print(f"🧪 {len(match_numbers)} tags, levels {levels}, {args.duration:.0f} s each, "
+              f"{'HTTP only' if args.http_only else 'HTTP with browser fallback' if fast else 'browser'}",
+              file=report, flush=True)
+        results = []
+        for concurrency in levels:
+            before = server_stats(base_url)
+            stats = await run_level(concurrency, match_numbers, expected, args, options, report)
+            after = server_stats(base_url)
+            faults = {key: after.get(key, 0) - before.get(key, 0) for key in after}
+            results.append((concurrency, stats, faults))
+
+        print("\n📊 SOAK SUMMARY", file=report)
+        for concurrency, stats, faults in results:
+            print(stats.line(f"c={concurrency}"), file=report)
+            print(f"{'':>10} server: {', '.join(f'{key} {value}' for key, value in sorted(faults.items()))}",
+                  file=report)
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
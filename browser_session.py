@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Memory-bounded browser lifecycle for long scraping runs
+- One Chromium browser, with a context + page that are recycled over time
+- Renderer memory is read from CDP performance metrics after each navigation
+- The context is thrown away once a heap or navigation-count threshold is crossed
+- Storage state (cookies, localStorage) is saved when a context closes and
+  loaded into the next one, across runs and processes
+- Static assets (scripts, styles, fonts, images) are served from a disk cache,
+  so a fresh context doesn't re-download the marketplace app
+- Each new context is warmed up on the landing page before the first tag
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from playwright.async_api import Error as PlaywrightError
+
+from data_loader import DATA_DIR
+
+BROWSER_STATE_DIR = os.path.join(DATA_DIR, ".browser")
+STORAGE_STATE_FILE = "storage_state.json"
+ASSET_CACHE_DIR = "assets"
+
+# Cached assets are refetched after this long
+ASSET_CACHE_TTL_SECONDS = 24 * 3600
+CACHED_RESOURCE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+# Response headers replayed from the cache (CORS matters for fonts on a CDN)
+CACHED_HEADERS = ("content-type", "access-control-allow-origin")
+
+# Recycle the page/context after this many navigations...
+MAX_NAVIGATIONS = 25
+# ...or once the renderer's live JS heap grows past this
+MAX_JS_HEAP_MB = 256
+
+def _write_atomic(path, data, mode):
+    """Write data to path through a uniquely named temp file, so concurrent writers can't tear it"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class AssetCache:
+    """Disk cache for static assets, shared by every context and process.
+
+    Entries are a body file plus a small JSON header file, both named by the
+    URL's hash and replaced atomically. Browser contexts route requests through
+    handle_route (async API) or handle_route_sync (sync API); a request the cache
+    can't fetch falls back to the browser, and one it can't store is still served.
+    """
+
+    def __init__(self, cache_dir, ttl=ASSET_CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+        return f"{key}.body", f"{key}.json"
+
+    def cacheable(self, request):
+        return request.method == "GET" and request.resource_type in CACHED_RESOURCE_TYPES
+
+    def load(self, url):
+        """(headers, body) for a fresh entry, else None"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if time.time() - meta['stored_at'] > self.ttl:
+                return None
+            with open(body_path, 'rb') as f:
+                return meta['headers'], f.read()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def store(self, url, status, headers, body):
+        """Keep a successful response unless the server forbids storing it.
+
+        Raises OSError if the entry can't be written; the header file is only
+        written once its body is in place.
+        """
+        if status != 200 or 'no-store' in headers.get('cache-control', ''):
+            return
+        body_path, meta_path = self._paths(url)
+        kept = {name: headers[name] for name in CACHED_HEADERS if name in headers}
+        meta = {'url': url, 'headers': kept, 'stored_at': time.time()}
+        # Body first: a header file only ever points at a complete body
+        _write_atomic(body_path, body, 'wb')
+        _write_atomic(meta_path, json.dumps(meta), 'w')
+
+    def _store_quietly(self, url, response, body):
+        """store() for the route handlers: a full disk or unwritable cache only costs the entry"""
+        try:
+            self.store(url, response.status, response.headers, body)
+        except OSError as e:
+            print(f"⚠️  Asset cache write failed for {url}: {e}")
+
+    def _cached_response(self, url):
+        cached = self.load(url)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        headers, body = cached
+        return {'status': 200, 'headers': headers, 'body': body}
+
+    async def handle_route(self, route):
+        request = route.request
+        if not self.cacheable(request):
+            await route.fallback()
+            return
+        cached = self._cached_response(request.url)
+        if cached is not None:
+            await route.fulfill(**cached)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except PlaywrightError:
+            await route.fallback()
+            return
+        self._store_quietly(request.url, response, body)
+        await route.fulfill(response=response, body=body)
+
+    def handle_route_sync(self, route):
+        request = route.request
+        if not self.cacheable(request):
+            route.fallback()
+            return
+        cached = self._cached_response(request.url)
+        if cached is not None:
+            route.fulfill(**cached)
+            return
+        try:
+            response = route.fetch()
+            body = response.body()
+        except PlaywrightError:
+            route.fallback()
+            return
+        self._store_quietly(request.url, response, body)
+        route.fulfill(response=response, body=body)
+
+def storage_state_path(state_dir=BROWSER_STATE_DIR):
+    return os.path.join(state_dir, STORAGE_STATE_FILE)
+
+def context_options(state_dir=BROWSER_STATE_DIR):
+    """new_context() keyword arguments that restore the saved storage state"""
+    path = storage_state_path(state_dir)
+    return {'storage_state': path} if os.path.exists(path) else {}
+
+def save_storage_state(state, state_dir=BROWSER_STATE_DIR):
+    """Persist a context.storage_state() result atomically"""
+    path = storage_state_path(state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    _write_atomic(path, json.dumps(state), 'w')
+
+class BrowserSession:
+    """Lazily launched browser whose page is recycled before it bloats.
+
+    Usage:
+        session = BrowserSession(playwright)
+        page = await session.page()
+        await page.goto(...)
+        await session.after_navigation()
+        ...
+        await session.close()
+    """
+
+    def __init__(self, playwright, max_navigations=MAX_NAVIGATIONS, max_js_heap_mb=MAX_JS_HEAP_MB,
+                 state_dir=BROWSER_STATE_DIR, warmup_url=None):
+        self.playwright = playwright
+        self.max_navigations = max_navigations
+        self.max_js_heap_mb = max_js_heap_mb
+        # state_dir=None: no persisted state or asset cache (a clean browser)
+        self.state_dir = state_dir
+        self.warmup_url = warmup_url
+        self.asset_cache = AssetCache(os.path.join(state_dir, ASSET_CACHE_DIR)) if state_dir else None
+        self.browser = None
+        self.context = None
+        self._page = None
+        self._cdp = None
+        self.navigations = 0
+        self.recycles = 0
+        self.last_metrics = {}
+
+    async def page(self):
+        """The current page, launching the browser / opening a context if needed"""
+        if self.browser is None:
+            self.browser = await self.playwright.chromium.launch(headless=True)
+        if self._page is None:
+            options = context_options(self.state_dir) if self.state_dir else {}
+            self.context = await self.browser.new_context(**options)
+            if self.asset_cache:
+                await self.context.route("**/*", self.asset_cache.handle_route)
+            self._page = await self.context.new_page()
+            self._cdp = None
+            self.navigations = 0
+            await self.warmup()
+        return self._page
+
+    async def warmup(self):
+        """Load the app once in a new context so the first tag starts warm"""
+        if not self.warmup_url:
+            return
+        start = time.perf_counter()
+        try:
+            await self._page.goto(self.warmup_url, wait_until='networkidle', timeout=30000)
+        except Exception as e:
+            print(f"⚠️  Browser warmup failed: {e}")
+            return
+        await self.save_state()
+        print(f"🔥 Browser context warmed up in {time.perf_counter() - start:.1f}s")
+
+    async def save_state(self):
+        """Persist the context's cookies and localStorage for the next context/run"""
+        if self.context is None or not self.state_dir:
+            return
+        try:
+            save_storage_state(await self.context.storage_state(), self.state_dir)
+        except Exception as e:
+            print(f"⚠️  Could not save browser storage state: {e}")
+
+    async def renderer_metrics(self):
+        """CDP Performance metrics for the current page ({} if unavailable)"""
+        if self._page is None:
+            return {}
+        try:
+            if self._cdp is None:
+                self._cdp = await self.context.new_cdp_session(self._page)
+                await self._cdp.send("Performance.enable")
+            result = await self._cdp.send("Performance.getMetrics")
+        except Exception:
+            # Not Chromium, or the page crashed - fall back to navigation counting
+            return {}
+        return {metric['name']: metric['value'] for metric in result.get('metrics', [])}
+
+    async def after_navigation(self):
+        """Count a navigation and recycle the page if a threshold is crossed"""
+        self.navigations += 1
+        self.last_metrics = await self.renderer_metrics()
+        heap_mb = self.last_metrics.get('JSHeapUsedSize', 0) / (1024 * 1024)
+
+        if heap_mb > self.max_js_heap_mb:
+            await self.recycle(f"JS heap {heap_mb:.0f} MB")
+        elif self.navigations >= self.max_navigations:
+            await self.recycle(f"{self.navigations} navigations")
+
+    async def recycle(self, reason):
+        """Close the context (and every handle, listener and SPA state in it)"""
+        print(f"♻️  Recycling browser page after {reason}")
+        await self._close_context()
+        self.recycles += 1
+
+    async def _close_context(self):
+        if self.context is not None:
+            await self.save_state()
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+        self.context = None
+        self._page = None
+        self._cdp = None
+
+    async def close(self):
+        await self._close_context()
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Sharded sweep coordinator for running several scraper processes at once
+- The tag space is split into shards recorded in a SQLite lease table
+- Workers (local processes or other hosts sharing the file) lease one shard at a time
+- Leases are renewed by heartbeats; shards of dead workers are reassigned
+- Every tag is claimed before it is scraped and committed at most once per sweep
+
+Usage:
+    python3 coordinator.py sweep --workers 4 [--fast]      # plan + run locally
+    python3 coordinator.py plan --tags m1-m104 --shard-size 8
+    python3 coordinator.py work --sweep 3 --workers 2      # join from any host
+    python3 coordinator.py status --sweep 3
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from data_loader import DATA_DIR
+
+LEASE_DB = os.path.join(DATA_DIR, "leases.sqlite")
+LEASE_SECONDS = 120
+DEFAULT_SHARD_SIZE = 8
+
+# claim_tag outcomes
+CLAIMED = 'claimed'
+FINISHED = 'finished'
+LEASE_LOST = 'lease lost'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    sweep_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    sweep_id INTEGER NOT NULL,
+    shard_id INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sweep_id, shard_id)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    sweep_id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    shard_id INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    finished_at REAL,
+    PRIMARY KEY (sweep_id, tag)
+);
+"""
+
+def parse_tag_spec(spec):
+    """Expand 'm1-m104,m200,t5' into an ordered tag list"""
+    tags = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            prefix = start.rstrip('0123456789')
+            if not end.startswith(prefix):
+                end = prefix + end
+            tags.extend(f"{prefix}{n}" for n in range(int(start[len(prefix):]), int(end[len(prefix):]) + 1))
+        else:
+            tags.append(part)
+    return list(dict.fromkeys(tags))
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LeaseStore:
+    """Shard and tag leases in a SQLite file shared by all workers.
+
+    Uses the rollback journal rather than WAL so the file can live on a
+    shared filesystem used by several hosts.
+    """
+
+    def __init__(self, path=LEASE_DB, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction that takes the lock up front"""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def create_sweep(self, tags, shard_size=DEFAULT_SHARD_SIZE):
+        """Record a new sweep over tags, split into shards; returns its id"""
+        with self.transaction() as db:
+            sweep_id = db.execute("INSERT INTO sweeps (created_at) VALUES (?)", (time.time(),)).lastrowid
+            for shard_id, start in enumerate(range(0, len(tags), shard_size)):
+                shard_tags = tags[start:start + shard_size]
+                db.execute("INSERT INTO shards (sweep_id, shard_id, tags) VALUES (?, ?, ?)",
+                           (sweep_id, shard_id, json.dumps(shard_tags)))
+                db.executemany("INSERT INTO tags (sweep_id, tag, shard_id) VALUES (?, ?, ?)",
+                               [(sweep_id, tag, shard_id) for tag in shard_tags])
+        return sweep_id
+
+    def latest_sweep(self):
+        row = self.db.execute("SELECT MAX(sweep_id) FROM sweeps").fetchone()
+        return row[0]
+
+    def acquire_shard(self, sweep_id, worker_id):
+        """Lease a pending shard, or one whose lease expired; (shard_id, tags) or None"""
+        now = time.time()
+        with self.transaction() as db:
+            row = db.execute(
+                "SELECT shard_id, tags FROM shards WHERE sweep_id = ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                "ORDER BY attempts, shard_id LIMIT 1",
+                (sweep_id, now)).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE shards SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE sweep_id = ? AND shard_id = ?",
+                (worker_id, now + self.lease_seconds, sweep_id, row[0]))
+        return row[0], json.loads(row[1])
+
+    def heartbeat(self, sweep_id, shard_id, worker_id):
+        """Renew a shard lease; False if it ran out or was taken by another worker"""
+        now = time.time()
+        with self.transaction() as db:
+            updated = db.execute(
+                "UPDATE shards SET lease_expires = ? WHERE sweep_id = ? AND shard_id = ? "
+                "AND owner = ? AND state = 'leased' AND lease_expires >= ?",
+                (now + self.lease_seconds, sweep_id, shard_id, worker_id, now)).rowcount
+        return updated == 1
+
+    def claim_tag(self, sweep_id, shard_id, tag, worker_id):
+        """Claim a tag for scraping while holding its shard lease.
+
+        Returns CLAIMED, FINISHED if the tag was already finished, or LEASE_LOST
+        if the shard lease ran out (even if no other worker has taken it yet) -
+        the rest of the shard then belongs to whoever leases it next.
+        """
+        with self.transaction() as db:
+            owns_shard = db.execute(
+                "SELECT 1 FROM shards WHERE sweep_id = ? AND shard_id = ? AND owner = ? "
+                "AND state = 'leased' AND lease_expires >= ?",
+                (sweep_id, shard_id, worker_id, time.time())).fetchone()
+            if not owns_shard:
+                return LEASE_LOST
+            updated = db.execute(
+                "UPDATE tags SET state = 'claimed', owner = ? WHERE sweep_id = ? AND tag = ? "
+                "AND state IN ('pending', 'claimed')",
+                (worker_id, sweep_id, tag)).rowcount
+        return CLAIMED if updated == 1 else FINISHED
+
+    def finish_tag(self, sweep_id, tag, worker_id, state, save=None):
+        """Mark a claimed tag 'done', 'failed' or 'skipped'; False if worker_id no longer holds it.
+
+        The claim is re-checked inside the write transaction and save (if given)
+        runs there too, so no other worker can re-claim the tag between the check
+        and save() replacing the match file. A falsy save() records 'failed'.
+        Failed tags are not retried this sweep.
+        """
+        with self.transaction() as db:
+            held = db.execute(
+                "UPDATE tags SET state = ?, finished_at = ? WHERE sweep_id = ? AND tag = ? AND owner = ? "
+                "AND state = 'claimed'",
+                (state, time.time(), sweep_id, tag, worker_id)).rowcount
+            if held != 1:
+                return False
+            if save is not None and not save():
+                db.execute("UPDATE tags SET state = 'failed' WHERE sweep_id = ? AND tag = ?", (sweep_id, tag))
+        return True
+
+    def finish_shard(self, sweep_id, shard_id, worker_id):
+        """Mark a shard 'done'; False (and left to its lease) while any of its tags is unfinished"""
+        with self.transaction() as db:
+            updated = db.execute(
+                "UPDATE shards SET state = 'done', lease_expires = NULL "
+                "WHERE sweep_id = ? AND shard_id = ? AND owner = ? AND NOT EXISTS ("
+                "    SELECT 1 FROM tags WHERE tags.sweep_id = shards.sweep_id AND tags.shard_id = shards.shard_id "
+                "    AND tags.state IN ('pending', 'claimed'))",
+                (sweep_id, shard_id, worker_id)).rowcount
+        return updated == 1
+
+    def next_expiry(self, sweep_id):
+        """Seconds until the earliest unfinished shard's lease runs out; None once every shard is done"""
+        row = self.db.execute(
+            "SELECT COUNT(*), MIN(lease_expires) FROM shards WHERE sweep_id = ? AND state != 'done'",
+            (sweep_id,)).fetchone()
+        if not row[0]:
+            return None
+        return max(0.0, (row[1] or 0) - time.time())
+
+    def progress(self, sweep_id):
+        """Tag and shard counts by state"""
+        tags = dict(self.db.execute(
+            "SELECT state, COUNT(*) FROM tags WHERE sweep_id = ? GROUP BY state", (sweep_id,)).fetchall())
+        shards = dict(self.db.execute(
+            "SELECT state, COUNT(*) FROM shards WHERE sweep_id = ? GROUP BY state", (sweep_id,)).fetchall())
+        return {'tags': tags, 'shards': shards}
+
+def match_number(tag):
+    """Match number of an m{n} tag, None for other tag families"""
+    return int(tag[1:]) if tag[:1] == 'm' and tag[1:].isdigit() else None
+
+async def _heartbeat_loop(store, sweep_id, shard_id, worker_id, lost):
+    """Renew the lease every third of its length until cancelled or lost.
+
+    A renewal that fails on a busy database is retried at the next beat; if
+    the lease runs out before one succeeds, it counts as lost.
+    """
+    renewed = time.time()
+    while True:
+        await asyncio.sleep(store.lease_seconds / 3)
+        try:
+            held = store.heartbeat(sweep_id, shard_id, worker_id)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  [{worker_id}] Heartbeat for shard {shard_id} failed: {e}")
+            if time.time() - renewed < store.lease_seconds:
+                continue
+            held = False
+        if not held:
+            lost.set()
+            return
+        renewed = time.time()
+
+async def work_shard(store, sweep_id, shard_id, tags, worker_id, **scrape_options):
+    """Scrape one leased shard, claiming each tag just before it is scraped.
+
+    Returns True once the shard is done; False if its lease was lost, in which
+    case its unfinished tags go to the next worker that leases it.
+    """
+    from fifa_scraper import iter_scraped_matches, save_match_data
+
+    lost = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat_loop(store, sweep_id, shard_id, worker_id, lost))
+
+    def claimed_match_numbers():
+        for tag in tags:
+            if lost.is_set():
+                return
+            match_num = match_number(tag)
+            claim = store.claim_tag(sweep_id, shard_id, tag, worker_id)
+            if claim == LEASE_LOST:
+                lost.set()
+                return
+            if claim == FINISHED:
+                continue
+            if match_num is None:
+                # The scraper only understands m{n} tags so far
+                print(f"⚠️  [{worker_id}] No scraper for tag {tag}, skipping")
+                store.finish_tag(sweep_id, tag, worker_id, 'skipped')
+                continue
+            yield match_num
+
+    try:
+        async for match_num, match_data in iter_scraped_matches(claimed_match_numbers(), **scrape_options):
+            # Dropped if the lease expired mid-scrape and the tag went to another worker
+            store.finish_tag(sweep_id, f"m{match_num}", worker_id, 'done',
+                             save=lambda: save_match_data(match_data, match_num))
+    finally:
+        heartbeat.cancel()
+
+    if lost.is_set() or not store.finish_shard(sweep_id, shard_id, worker_id):
+        print(f"⚠️  [{worker_id}] Lost lease on shard {shard_id}, leaving it to another worker")
+        return False
+    return True
+
+async def run_worker(sweep_id, db_path=LEASE_DB, worker_id=None, lease_seconds=LEASE_SECONDS, **scrape_options):
+    """Lease and scrape shards until every shard is done; returns shards completed.
+
+    With nothing free to lease, waits for the earliest lease to run out, so the
+    shards of a worker that died are picked up again.
+    """
+    worker_id = worker_id or default_worker_id()
+    store = LeaseStore(db_path, lease_seconds)
+    completed = 0
+    try:
+        while True:
+            lease = store.acquire_shard(sweep_id, worker_id)
+            if lease is None:
+                wait = store.next_expiry(sweep_id)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait + 0.1)
+                continue
+            shard_id, tags = lease
+            print(f"🧩 [{worker_id}] Shard {shard_id}: {', '.join(tags)}")
+            completed += await work_shard(store, sweep_id, shard_id, tags, worker_id, **scrape_options)
+    finally:
+        store.close()
+    return completed
+
+def _worker_process(sweep_id, db_path, scrape_options):
+    asyncio.run(run_worker(sweep_id, db_path, **scrape_options))
+
+def run_local_workers(sweep_id, workers, db_path=LEASE_DB, **scrape_options):
+    """Run `workers` worker processes, each with its own browser, until the sweep is drained"""
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(sweep_id, db_path, scrape_options))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def print_status(store, sweep_id):
+    progress = store.progress(sweep_id)
+    print(f"\n📊 SWEEP {sweep_id}:")
+    print(f"   Shards: {progress['shards']}")
+    print(f"   Tags:   {progress['tags']}")
+
+if __name__ == "__main__":
+    import argparse
+
+    from http_fetcher import MARKETPLACE_BASE_URL
+    from tag_discovery import plan_match_numbers
+
+    parser = argparse.ArgumentParser(description="Coordinate a sharded multi-process sweep")
+    parser.add_argument("command", choices=["sweep", "plan", "work", "status"])
+    parser.add_argument("--db", default=LEASE_DB, help="lease table (put it on a shared filesystem for several hosts)")
+    parser.add_argument("--sweep", type=int, help="sweep id (default: latest)")
+    parser.add_argument("--tags", default="active",
+                        help="tag spec, e.g. m1-m104,m200 (default: match tags the marketplace lists with listings)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--fast", action="store_true", help="fetch over HTTP first, fall back to the browser")
+    parser.add_argument("--base-url", default=MARKETPLACE_BASE_URL, help="marketplace origin (e.g. a local stand-in)")
+    args = parser.parse_args()
+
+    store = LeaseStore(args.db)
+    sweep_id = args.sweep
+    if args.command in ("sweep", "plan"):
+        if args.tags == "active":
+            tags = [f"m{n}" for n in asyncio.run(plan_match_numbers(args.base_url))]
+        else:
+            tags = parse_tag_spec(args.tags)
+        sweep_id = store.create_sweep(tags, args.shard_size)
+        print(f"🗂️  Planned sweep {sweep_id}")
+    elif sweep_id is None:
+        sweep_id = store.latest_sweep()
+
+    if args.command in ("sweep", "work"):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        run_local_workers(sweep_id, args.workers, args.db, fast=args.fast, base_url=args.base_url)
+
+    print_status(store, sweep_id)
+    store.close()
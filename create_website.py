@@ -3,279 +3,387 @@
 Create FIFA World Cup 2026 Marketplace Data Website
 """
 
-import json
+import html
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from analytics import ANALYTICS_DIR, ARBITRAGE_CSV, FLOOR_SPREADS_CSV, analyze_listings, write_analytics_csv
+from cube import cube_from_pages
+from data_loader import load_histories, load_snapshots
+from models import MatchSummary, Rarity, format_price, parse_price_cents
+from schedule import UNKNOWN, get_schedule
+from sketches import load_match_sketches
+
+# Per-match detail pages are sharded into matches/00/, matches/01/, ...
+DETAIL_DIR = "matches"
+DETAIL_SHARD_SIZE = 10
+
+# Rows shown on the analytics page (the CSVs have all of them)
+ANALYTICS_TOP = 50
+
 def parse_price(price_str):
     """Extract numeric value from price string like 'US$6,999.00'"""
-    if not price_str:
-        return 0
-    # Remove currency symbols, commas, and convert to float
-    numeric = re.sub(r'[^\d.]', '', price_str)
-    try:
-        return float(numeric)
-    except:
-        return 0
+    return parse_price_cents(price_str) / 100
 
 def extract_venue_from_listings(listings):
     """Extract venue name from listing text"""
+    schedule = get_schedule()
     venues = []
     for listing in listings:
-        text = listing.get('text', '')
-        title = listing.get('title', '')
-        
-        # Look for venue patterns in text and title
-        combined_text = f"{text} {title}".upper()
-        
-        if 'MEXICO CITY' in combined_text or 'AZTECA' in combined_text:
-            venues.append('Mexico City')
-        elif 'TORONTO' in combined_text:
-            venues.append('Toronto')
-        elif 'NEW YORK' in combined_text:
-            venues.append('New York')
-        elif 'KANSAS CITY' in combined_text:
-            venues.append('Kansas City')
-        elif 'MIAMI' in combined_text:
-            venues.append('Miami')
-        elif 'ATLANTA' in combined_text:
-            venues.append('Atlanta')
-        elif 'HOUSTON' in combined_text:
-            venues.append('Houston')
-        elif 'SEATTLE' in combined_text:
-            venues.append('Seattle')
-        elif 'PHILADELPHIA' in combined_text:
-            venues.append('Philadelphia')
-        elif 'VANCOUVER' in combined_text:
-            venues.append('Vancouver')
-        elif 'FOXBOROUGH' in combined_text or 'GILLETTE' in combined_text:
-            venues.append('Foxborough')
-        elif 'INGLEWOOD' in combined_text or 'SOFI' in combined_text:
-            venues.append('Inglewood')
-        elif 'ARLINGTON' in combined_text:
-            venues.append('Arlington')
-        elif 'SANTA CLARA' in combined_text:
-            venues.append('Santa Clara')
-        elif 'GUADALUPE' in combined_text:
-            venues.append('Guadalupe')
-        elif 'ZAPOPAN' in combined_text:
-            venues.append('Zapopan')
+        # Look for venue names and aliases in text and title
+        venue = schedule.find_venue(f"{listing.text} {listing.title}")
+        if venue:
+            venues.append(venue)
     
     # Return most common venue or 'Unknown'
     if venues:
         return max(set(venues), key=venues.count)
-    return 'Unknown'
+    return UNKNOWN
+
+def detail_page_path(match_num):
+    """Relative path of a match detail page, e.g. matches/10/m104.html"""
+    shard = f"{match_num // DETAIL_SHARD_SIZE:02d}"
+    return f"{DETAIL_DIR}/{shard}/m{match_num}.html"
 
-def get_venue_country(venue):
-    """Get country for each venue"""
-    usa_venues = [
-        "Inglewood", "Santa Clara", "Seattle", "Foxborough", "East Rutherford", 
-        "Philadelphia", "Miami Gardens", "Atlanta", "Houston", "Kansas City", 
-        "Arlington", "Orlando", "Nashville", "Cincinnati", "Denver", "Boston"
-    ]
-    canada_venues = ["Toronto", "Vancouver"]
-    mexico_venues = ["Mexico City", "Zapopan", "Guadalupe", "Monterrey"]
-    
-    if venue in usa_venues:
-        return "USA"
-    elif venue in canada_venues:
-        return "Canada"
-    elif venue in mexico_venues:
-        return "Mexico"
+def summarize_history(snapshots):
+    """Reduce stored history snapshots to per-scrape summaries (oldest first)"""
+    history = []
+    for snapshot in snapshots:
+        prices = [l.price for l in snapshot.listings if l.price_cents > 0]
+        history.append({
+            'timestamp': snapshot.timestamp,
+            'listings_count': snapshot.listings_count,
+            'lowest_price': min(prices) if prices else 0,
+            'highest_price': max(prices) if prices else 0,
+        })
+    
+    history.sort(key=lambda h: h['timestamp'])
+    return history
+
+def rarity_breakdown(listings):
+    """Count and price range per rarity, in Rarity display order"""
+    breakdown = {}
+    for listing in listings:
+        price = listing.price
+        entry = breakdown.setdefault(listing.rarity, {'count': 0, 'lowest_price': 0, 'highest_price': 0})
+        entry['count'] += 1
+        if price > 0:
+            if entry['lowest_price'] == 0 or price < entry['lowest_price']:
+                entry['lowest_price'] = price
+            entry['highest_price'] = max(entry['highest_price'], price)
+    
+    # Unknown rarity sorts last
+    return sorted(breakdown.items(), key=lambda item: item[0] or len(Rarity))
+
+DETAIL_PAGE_CSS = """
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; padding: 10px; }
+        .container { max-width: 1000px; margin: 0 auto; background: rgba(255, 255, 255, 0.95); border-radius: 20px; box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1); overflow: hidden; }
+        .header { background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%); color: white; padding: 30px; text-align: center; }
+        .header h1 { font-size: 2.2rem; margin-bottom: 10px; }
+        .header a { color: #ffffff; opacity: 0.9; }
+        section { padding: 20px 30px; }
+        h2 { color: #2a5298; margin-bottom: 10px; }
+        table { width: 100%; border-collapse: collapse; background: white; }
+        th { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 10px 8px; text-align: left; font-size: 0.85rem; text-transform: uppercase; }
+        td { padding: 10px 8px; border-bottom: 1px solid #eee; vertical-align: top; }
+        .price { font-weight: bold; color: #28a745; white-space: nowrap; }
+        .listing-text { white-space: pre-line; color: #444; font-size: 0.85rem; }
+        .empty { color: #888; font-style: italic; }
+        @media (max-width: 480px) { section { padding: 15px; } .header h1 { font-size: 1.6rem; } td, th { font-size: 0.75rem; } }
+"""
+
+def render_detail_page(page):
+    """Render one match detail page.
+    
+    Output depends only on the page data (no wall-clock time), so unchanged
+    matches produce byte-identical pages.
+    """
+    match = page['match']
+    esc = html.escape
+    
+    breakdown_rows = "".join(f"""
+                    <tr>
+                        <td>{esc(rarity.label or 'Other')}</td>
+                        <td>{entry['count']}</td>
+                        <td class="price">${entry['lowest_price']:,.0f}</td>
+                        <td class="price">${entry['highest_price']:,.0f}</td>
+                    </tr>""" for rarity, entry in rarity_breakdown(page['listings']))
+    
+    listing_rows = "".join(f"""
+                    <tr>
+                        <td class="price">${listing.price:,.2f}</td>
+                        <td>{esc(listing.rarity.label or '-')}</td>
+                        <td class="listing-text">{esc(listing.text)}</td>
+                    </tr>""" for listing in sorted(page['listings'], key=lambda l: (l.price_cents, l.text)))
+    
+    if page['history']:
+        history_rows = "".join(f"""
+                    <tr>
+                        <td>{esc(entry['timestamp'][:16].replace('T', ' '))}</td>
+                        <td>{entry['listings_count']}</td>
+                        <td class="price">${entry['lowest_price']:,.0f}</td>
+                        <td class="price">${entry['highest_price']:,.0f}</td>
+                    </tr>""" for entry in page['history'])
+        history_html = f"""
+            <table>
+                <thead>
+                    <tr><th>Scraped</th><th>Listings</th><th>Low Price</th><th>High Price</th></tr>
+                </thead>
+                <tbody>{history_rows}
+                </tbody>
+            </table>"""
+    else:
+        history_html = '<p class="empty">No price history recorded yet.</p>'
+    
+    quantile_rows = "".join(f"""
+                    <tr>
+                        <td>{esc(label)}</td>
+                        <td>{esc(row['rarity'].label or 'Other')}</td>
+                        <td>{row['observations']:,}</td>
+                        <td class="price">${row['p10'] / 100:,.0f}</td>
+                        <td class="price">${row['median'] / 100:,.0f}</td>
+                        <td class="price">${row['p90'] / 100:,.0f}</td>
+                    </tr>""" for label, rows in page['quantiles'] for row in rows)
+    if quantile_rows:
+        quantiles_html = f"""
+            <table>
+                <thead>
+                    <tr><th>Window</th><th>Rarity</th><th>Prices Seen</th><th>P10</th><th>Median</th><th>P90</th></tr>
+                </thead>
+                <tbody>{quantile_rows}
+                </tbody>
+            </table>"""
     else:
-        return "USA"  # Default for any unknown venues
+        quantiles_html = '<p class="empty">No price distribution recorded yet.</p>'
+    
+    # Detail pages live two levels below index.html
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>M{match.match_num} {esc(match.venue)} - FIFA World Cup 2026 Marketplace</title>
+    <style>{DETAIL_PAGE_CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <p style="margin-bottom: 15px;"><a href="../../index.html">← All matches</a></p>
+            <h1>M{match.match_num} • {esc(match.venue)}</h1>
+            <p>{esc(match.date)} • {esc(match.stage)} • {esc(match.stadium)} • {esc(match.country)}</p>
+            <p>{match.listings_count} valid listings • ${match.lowest_price:,.0f} - ${match.highest_price:,.0f}</p>
+            <p style="margin-top: 15px;"><a href="{esc(match.marketplace_url)}" target="_blank">View on FIFA Collect</a></p>
+        </div>
+        
+        <section>
+            <h2>Rarity Breakdown</h2>
+            <table>
+                <thead>
+                    <tr><th>Rarity</th><th>Listings</th><th>Low Price</th><th>High Price</th></tr>
+                </thead>
+                <tbody>{breakdown_rows}
+                </tbody>
+            </table>
+        </section>
+        
+        <section>
+            <h2>All Listings</h2>
+            <table>
+                <thead>
+                    <tr><th>Price</th><th>Rarity</th><th>Listing</th></tr>
+                </thead>
+                <tbody>{listing_rows}
+                </tbody>
+            </table>
+        </section>
+        
+        <section>
+            <h2>Price History</h2>{history_html}
+        </section>
+        
+        <section>
+            <h2>Price Distribution</h2>{quantiles_html}
+        </section>
+        
+        <section>
+            <p class="empty">Snapshot from {esc(page['scraped_at'][:16].replace('T', ' '))}</p>
+        </section>
+    </div>
+</body>
+</html>
+"""
+
+def write_detail_page(page):
+    """Render a detail page and write it only if its content changed.
+    
+    Returns True when the file was (re)written.
+    """
+    return write_if_changed(detail_page_path(page['match'].match_num), render_detail_page(page))
+
+def write_if_changed(path, text):
+    """Write text to path unless the file already holds exactly that; True if written"""
+    content = text.encode('utf-8')
+    
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return True
+
+def generate_detail_pages(pages, workers=None):
+    """Write all match detail pages across a process pool.
+    
+    Returns (written, unchanged) counts.
+    """
+    pages = sorted(pages, key=lambda page: page['match'].match_num)
+    if not pages:
+        return 0, 0
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(write_detail_page, pages, chunksize=8))
+    
+    written = sum(results)
+    return written, len(results) - written
 
-def get_match_schedule():
-    """FIFA World Cup 2026 complete match schedule data"""
-    return {
-        # Group Stage - Matchday 1
-        1: {"date": "June 11, 2026", "venue": "Mexico City", "stadium": "Estadio Azteca", "stage": "Group A"},
-        2: {"date": "June 11, 2026", "venue": "Zapopan", "stadium": "Estadio Akron", "stage": "Group A"},
-        3: {"date": "June 12, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Group B"},
-        4: {"date": "June 12, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Group D"},
-        5: {"date": "June 13, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Group C"},
-        6: {"date": "June 13, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Group D"},
-        7: {"date": "June 13, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Group C"},
-        8: {"date": "June 13, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Group B"},
-        9: {"date": "June 14, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Group E"},
-        10: {"date": "June 14, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Group E"},
-        11: {"date": "June 14, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Group F"},
-        12: {"date": "June 14, 2026", "venue": "Guadalupe", "stadium": "Estadio BBVA", "stage": "Group F"},
-        13: {"date": "June 15, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Group H"},
-        14: {"date": "June 15, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Group H"},
-        15: {"date": "June 15, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Group G"},
-        16: {"date": "June 15, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Group G"},
-        17: {"date": "June 16, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Group I"},
-        18: {"date": "June 16, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Group I"},
-        19: {"date": "June 16, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Group J"},
-        20: {"date": "June 16, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Group J"},
-        21: {"date": "June 17, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Group L"},
-        22: {"date": "June 17, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Group L"},
-        23: {"date": "June 17, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Group K"},
-        24: {"date": "June 17, 2026", "venue": "Mexico City", "stadium": "Estadio Azteca", "stage": "Group K"},
-        
-        # Group Stage - Matchday 2
-        25: {"date": "June 18, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Group A"},
-        26: {"date": "June 18, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Group B"},
-        27: {"date": "June 18, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Group B"},
-        28: {"date": "June 18, 2026", "venue": "Zapopan", "stadium": "Estadio Akron", "stage": "Group A"},
-        29: {"date": "June 19, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Group C"},
-        30: {"date": "June 19, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Group C"},
-        31: {"date": "June 19, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Group D"},
-        32: {"date": "June 19, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Group D"},
-        33: {"date": "June 20, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Group E"},
-        34: {"date": "June 20, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Group E"},
-        35: {"date": "June 20, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Group F"},
-        36: {"date": "June 20, 2026", "venue": "Guadalupe", "stadium": "Estadio BBVA", "stage": "Group F"},
-        37: {"date": "June 21, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Group H"},
-        38: {"date": "June 21, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Group H"},
-        39: {"date": "June 21, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Group G"},
-        40: {"date": "June 21, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Group G"},
-        41: {"date": "June 22, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Group I"},
-        42: {"date": "June 22, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Group I"},
-        43: {"date": "June 22, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Group J"},
-        44: {"date": "June 22, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Group J"},
-        45: {"date": "June 23, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Group L"},
-        46: {"date": "June 23, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Group L"},
-        47: {"date": "June 23, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Group K"},
-        48: {"date": "June 23, 2026", "venue": "Zapopan", "stadium": "Estadio Akron", "stage": "Group K"},
-        
-        # Group Stage - Matchday 3
-        49: {"date": "June 24, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Group C"},
-        50: {"date": "June 24, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Group C"},
-        51: {"date": "June 24, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Group B"},
-        52: {"date": "June 24, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Group B"},
-        53: {"date": "June 24, 2026", "venue": "Mexico City", "stadium": "Estadio Azteca", "stage": "Group A"},
-        54: {"date": "June 24, 2026", "venue": "Guadalupe", "stadium": "Estadio BBVA", "stage": "Group A"},
-        55: {"date": "June 25, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Group E"},
-        56: {"date": "June 25, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Group E"},
-        57: {"date": "June 25, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Group F"},
-        58: {"date": "June 25, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Group F"},
-        59: {"date": "June 25, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Group D"},
-        60: {"date": "June 25, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Group D"},
-        61: {"date": "June 26, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Group I"},
-        62: {"date": "June 26, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Group I"},
-        63: {"date": "June 26, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Group G"},
-        64: {"date": "June 26, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Group G"},
-        65: {"date": "June 26, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Group H"},
-        66: {"date": "June 26, 2026", "venue": "Zapopan", "stadium": "Estadio Akron", "stage": "Group H"},
-        67: {"date": "June 27, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Group L"},
-        68: {"date": "June 27, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Group L"},
-        69: {"date": "June 27, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Group J"},
-        70: {"date": "June 27, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Group J"},
-        71: {"date": "June 27, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Group K"},
-        72: {"date": "June 27, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Group K"},
-        
-        # Round of 32
-        73: {"date": "June 28, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Round of 32"},
-        74: {"date": "June 29, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Round of 32"},
-        75: {"date": "June 29, 2026", "venue": "Guadalupe", "stadium": "Estadio BBVA", "stage": "Round of 32"},
-        76: {"date": "June 29, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Round of 32"},
-        77: {"date": "June 30, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Round of 32"},
-        78: {"date": "June 30, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Round of 32"},
-        79: {"date": "June 30, 2026", "venue": "Mexico City", "stadium": "Estadio Azteca", "stage": "Round of 32"},
-        80: {"date": "July 1, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Round of 32"},
-        81: {"date": "July 1, 2026", "venue": "Santa Clara", "stadium": "Levi's Stadium", "stage": "Round of 32"},
-        82: {"date": "July 1, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Round of 32"},
-        83: {"date": "July 2, 2026", "venue": "Toronto", "stadium": "BMO Field", "stage": "Round of 32"},
-        84: {"date": "July 2, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Round of 32"},
-        85: {"date": "July 2, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Round of 32"},
-        86: {"date": "July 3, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Round of 32"},
-        87: {"date": "July 3, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Round of 32"},
-        88: {"date": "July 3, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Round of 32"},
-        
-        # Round of 16
-        89: {"date": "July 4, 2026", "venue": "Philadelphia", "stadium": "Lincoln Financial Field", "stage": "Round of 16"},
-        90: {"date": "July 4, 2026", "venue": "Houston", "stadium": "NRG Stadium", "stage": "Round of 16"},
-        91: {"date": "July 5, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Round of 16"},
-        92: {"date": "July 5, 2026", "venue": "Mexico City", "stadium": "Estadio Azteca", "stage": "Round of 16"},
-        93: {"date": "July 6, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Round of 16"},
-        94: {"date": "July 6, 2026", "venue": "Seattle", "stadium": "Lumen Field", "stage": "Round of 16"},
-        95: {"date": "July 7, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Round of 16"},
-        96: {"date": "July 7, 2026", "venue": "Vancouver", "stadium": "BC Place", "stage": "Round of 16"},
-        
-        # Quarterfinals
-        97: {"date": "July 9, 2026", "venue": "Foxborough", "stadium": "Gillette Stadium", "stage": "Quarterfinal"},
-        98: {"date": "July 10, 2026", "venue": "Inglewood", "stadium": "SoFi Stadium", "stage": "Quarterfinal"},
-        99: {"date": "July 11, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "Quarterfinal"},
-        100: {"date": "July 11, 2026", "venue": "Kansas City", "stadium": "Arrowhead Stadium", "stage": "Quarterfinal"},
-        
-        # Semifinals
-        101: {"date": "July 14, 2026", "venue": "Arlington", "stadium": "AT&T Stadium", "stage": "Semifinal"},
-        102: {"date": "July 15, 2026", "venue": "Atlanta", "stadium": "Mercedes-Benz Stadium", "stage": "Semifinal"},
-        
-        # Third Place Playoff
-        103: {"date": "July 18, 2026", "venue": "Miami Gardens", "stadium": "Hard Rock Stadium", "stage": "3rd Place"},
-        
-        # Final
-        104: {"date": "July 19, 2026", "venue": "East Rutherford", "stadium": "MetLife Stadium", "stage": "Final"}
+def summarize_match(match_num, data, history, quantiles=None):
+    """Build the table row and detail page for one stored snapshot
+    
+    history is the match's summarize_history() output, quantiles its
+    MatchSketches.recent_windows() output.
+    Returns (MatchSummary, detail_page), or None if the snapshot has no
+    valid priced listings.
+    """
+    if not (data.success and data.listings):
+        return None
+    
+    listings = list(data.listings)
+    
+    # Filter out "NO LONGER VALID" listings (older snapshots may still contain them)
+    valid_listings = [listing for listing in listings if listing.is_valid]
+    
+    # Extract prices from valid listings only
+    valid_prices = [listing.price for listing in valid_listings if listing.price_cents > 0]
+    if not valid_prices:
+        return None
+    
+    # Use schedule data if available, otherwise extract venue from valid listings
+    schedule = get_schedule()
+    match_info = schedule.match(match_num)
+    if match_info:
+        venue, date, stadium, stage = match_info.venue, match_info.date, match_info.stadium, match_info.stage
+    else:
+        venue, date, stadium, stage = extract_venue_from_listings(valid_listings), 'TBD', 'TBD', UNKNOWN
+    
+    match = MatchSummary(
+        match_num=match_num,
+        date=date,
+        venue=venue,
+        country=schedule.venue_country(venue),
+        stadium=stadium,
+        stage=stage,
+        marketplace_url=data.url,
+        detail_url=detail_page_path(match_num),
+        lowest_price=min(valid_prices),
+        highest_price=max(valid_prices),
+        listings_count=len(valid_listings),
+        total_listings=len(listings),
+        invalid_listings=len(listings) - len(valid_listings)
+    )
+    detail_page = {
+        'match': match,
+        'listings': valid_listings,
+        'history': history,
+        'quantiles': quantiles or [],
+        'scraped_at': data.timestamp,
     }
+    return match, detail_page
 
-def create_website():
-    """Create the FIFA marketplace website"""
+def render_analytics_page(opportunities, spreads):
+    """Render analytics/index.html: cross-match price gaps and floor spreads"""
+    esc = html.escape
     
-    data_dir = "fifa_marketplace_data"
-    matches = []
+    opportunity_rows = "".join(f"""
+                    <tr>
+                        <td>{esc(o.name)}</td>
+                        <td>{o.offers}</td>
+                        <td><a href="../{detail_page_path(o.low.match_num)}">M{o.low.match_num}</a> {esc(o.low.rarity.label)}</td>
+                        <td class="price">{format_price(o.low.floor_cents)}</td>
+                        <td><a href="../{detail_page_path(o.high.match_num)}">M{o.high.match_num}</a> {esc(o.high.rarity.label)}</td>
+                        <td class="price">{format_price(o.high.floor_cents)}</td>
+                        <td>{o.gap_ratio * 100:,.0f}%</td>
+                    </tr>""" for o in opportunities[:ANALYTICS_TOP])
     
-    # Get match schedule data
-    schedule = get_match_schedule()
+    spread_rows = "".join(f"""
+                    <tr>
+                        <td><a href="../{detail_page_path(s.match_num)}">M{s.match_num}</a></td>
+                        <td>{s.listings}</td>
+                        <td class="price">{format_price(s.floor_cents)}</td>
+                        <td class="price">{format_price(s.median_cents)}</td>
+                        <td>{s.spread_ratio * 100:.0f}%</td>
+                    </tr>""" for s in spreads[:ANALYTICS_TOP])
     
-    # Parse all JSON files
-    for filename in sorted(os.listdir(data_dir)):
-        if filename.startswith('m') and filename.endswith('.json') and filename != 'completion_summary.json':
-            match_num = int(filename[1:-5])  # Extract number from m1.json -> 1
-            
-            with open(os.path.join(data_dir, filename), 'r') as f:
-                data = json.load(f)
-            
-            if data.get('success') and data.get('listings'):
-                listings = data['listings']
-                
-                # Filter out "NO LONGER VALID" listings
-                valid_listings = []
-                for listing in listings:
-                    title = listing.get('title', '').upper()
-                    text = listing.get('text', '').upper()
-                    
-                    # Skip if "NO LONGER VALID" appears in title or text
-                    if 'NO LONGER VALID' not in title and 'NO LONGER VALID' not in text:
-                        valid_listings.append(listing)
-                
-                # Extract prices from valid listings only
-                prices = [parse_price(listing.get('price', '')) for listing in valid_listings]
-                valid_prices = [p for p in prices if p > 0]
-                
-                if valid_prices:
-                    lowest_price = min(valid_prices)
-                    highest_price = max(valid_prices)
-                    
-                    # Get venue info from valid listings
-                    extracted_venue = extract_venue_from_listings(valid_listings)
-                    
-                    # Use schedule data if available, otherwise use extracted
-                    match_info = schedule.get(match_num, {})
-                    venue = match_info.get('venue', extracted_venue)
-                    date = match_info.get('date', 'TBD')
-                    stadium = match_info.get('stadium', 'TBD')
-                    stage = match_info.get('stage', 'Unknown')
-                    
-                    matches.append({
-                        'match_num': match_num,
-                        'date': date,
-                        'venue': venue,
-                        'stadium': stadium,
-                        'stage': stage,
-                        'marketplace_url': data['url'],
-                        'lowest_price': lowest_price,
-                        'highest_price': highest_price,
-                        'listings_count': len(valid_listings),
-                        'total_listings': len(listings),
-                        'invalid_listings': len(listings) - len(valid_listings)
-                    })
-    
-    # Sort by match number
-    matches.sort(key=lambda x: x['match_num'])
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Price Analytics - FIFA World Cup 2026 Marketplace</title>
+    <style>{DETAIL_PAGE_CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <p style="margin-bottom: 15px;"><a href="../index.html">← All matches</a></p>
+            <h1>Price Analytics</h1>
+            <p>The same collectible at different floors across matches and rarities, and each match's floor against its median</p>
+        </div>
+        
+        <section>
+            <h2>Cross-Match Price Gaps</h2>
+            <p class="empty">Top {min(len(opportunities), ANALYTICS_TOP)} of {len(opportunities)} • <a href="{ARBITRAGE_CSV}">CSV</a></p>
+            <table>
+                <thead>
+                    <tr><th>Collectible</th><th>Offers</th><th>Cheapest</th><th>Floor</th><th>Priciest</th><th>Floor</th><th>Gap</th></tr>
+                </thead>
+                <tbody>{opportunity_rows}
+                </tbody>
+            </table>
+        </section>
+        
+        <section>
+            <h2>Floor-to-Median Spread</h2>
+            <p class="empty">Top {min(len(spreads), ANALYTICS_TOP)} of {len(spreads)} • <a href="{FLOOR_SPREADS_CSV}">CSV</a></p>
+            <table>
+                <thead>
+                    <tr><th>Match</th><th>Listings</th><th>Floor</th><th>Median</th><th>Floor Below Median</th></tr>
+                </thead>
+                <tbody>{spread_rows}
+                </tbody>
+            </table>
+        </section>
+    </div>
+</body>
+</html>
+"""
+
+def write_analytics(detail_pages):
+    """Write the analytics page and its CSV exports from the detail pages' valid listings"""
+    opportunities, spreads = analyze_listings({page['match'].match_num: page['listings'] for page in detail_pages})
+    write_analytics_csv(opportunities, spreads, ANALYTICS_DIR)
+    write_if_changed(os.path.join(ANALYTICS_DIR, "index.html"), render_analytics_page(opportunities, spreads))
+    return opportunities, spreads
+
+def render_index(matches, totals):
+    """Render index.html for the given match rows; totals is the cube's overall Measures"""
+    schedule = get_schedule()
     
     # Create HTML
     html_content = f"""
@@ -683,6 +791,7 @@ def create_website():
             <h1>🏆 FIFA World Cup 2026 Marketplace</h1>
             <p class="subtitle">Official FIFA Collect RTB (Right to Buy) Collectibles • Real-time marketplace data</p>
             <p class="last-updated">Last updated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
+            <p style="margin-top: 10px;"><a href="{ANALYTICS_DIR}/index.html" style="color: #ffffff; font-weight: 600;">📈 Price gaps &amp; floor spreads</a></p>
         </div>
         
         <div class="stats">
@@ -691,15 +800,15 @@ def create_website():
                 <div class="stat-label">Total Matches</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">${min(m['lowest_price'] for m in matches if m['lowest_price'] > 0):,.0f}</div>
+                <div class="stat-number">${totals.min_cents / 100:,.0f}</div>
                 <div class="stat-label">Lowest Price</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">${max(m['highest_price'] for m in matches):,.0f}</div>
+                <div class="stat-number">${totals.max_cents / 100:,.0f}</div>
                 <div class="stat-label">Highest Price</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{sum(m['listings_count'] for m in matches):,}</div>
+                <div class="stat-number">{totals.count:,}</div>
                 <div class="stat-label">Valid Listings</div>
             </div>
         </div>
@@ -725,9 +834,9 @@ def create_website():
     
     # Add table rows
     for match in matches:
-        is_final = match['match_num'] == 104
-        is_semifinal = match['stage'] == 'Semifinal'
-        is_knockout = match['stage'] in ['Round of 32', 'Round of 16', 'Quarterfinal', 'Semifinal', '3rd Place', 'Final']
+        is_final = match.match_num == 104
+        is_semifinal = match.stage == 'Semifinal'
+        is_knockout = match.stage in schedule.knockout_stages
         
         row_class = ''
         if is_final:
@@ -739,16 +848,16 @@ def create_website():
         
         html_content += f"""
                     <tr class="{row_class}">
-                        <td class="match-num">M{match['match_num']}</td>
-                        <td class="date hide-mobile">{match['date']}</td>
-                        <td class="stage hide-mobile">{match['stage']}</td>
-                        <td class="venue">{match['venue']}<div class="venue-mobile-info">{match['date']} • {match['stage']}</div></td>
-                        <td class="country hide-tablet">{get_venue_country(match['venue'])}</td>
-                        <td class="hide-tablet">{match['stadium']}</td>
-                        <td class="listings-count hide-mobile">{match['listings_count']}</td>
-                        <td class="price">${match['lowest_price']:,.0f}</td>
-                        <td class="price high hide-mobile">${match['highest_price']:,.0f}</td>
-                        <td><a href="{match['marketplace_url']}" target="_blank" class="marketplace-link">View</a></td>
+                        <td class="match-num">M{match.match_num}</td>
+                        <td class="date hide-mobile">{match.date}</td>
+                        <td class="stage hide-mobile">{match.stage}</td>
+                        <td class="venue">{match.venue}<div class="venue-mobile-info">{match.date} • {match.stage}</div></td>
+                        <td class="country hide-tablet">{match.country}</td>
+                        <td class="hide-tablet">{match.stadium}</td>
+                        <td class="listings-count hide-mobile">{match.listings_count}</td>
+                        <td class="price">${match.lowest_price:,.0f}</td>
+                        <td class="price high hide-mobile">${match.highest_price:,.0f}</td>
+                        <td><a href="{match.detail_url}" class="marketplace-link">View</a></td>
                     </tr>
 """
     
@@ -813,6 +922,22 @@ def create_website():
 </html>
 """
     
+    return html_content
+
+def write_site(matches, detail_pages, totals=None, changed=None):
+    """Write index.html (plus its legacy copy) and the detail pages.
+    
+    totals is the overall Measures of a maintained PriceCube; without one
+    the cube is built from detail_pages. With changed (a set of match
+    numbers) only those matches' detail pages are rendered, in this thread -
+    for callers that rebuild incrementally and must not fork; otherwise all
+    of them are, across a process pool.
+    """
+    matches = sorted(matches, key=lambda x: x.match_num)
+    if totals is None:
+        totals = cube_from_pages(detail_pages).total()
+    html_content = render_index(matches, totals)
+    
     # Save the HTML file
     with open('index.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
@@ -821,9 +946,51 @@ def create_website():
     with open('fifa_world_cup_2026_marketplace.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
     
+    if changed is None:
+        written, unchanged = generate_detail_pages(detail_pages)
+    else:
+        written = sum(write_detail_page(page) for page in detail_pages if page['match'].match_num in changed)
+        unchanged = len(detail_pages) - written
+    opportunities, _ = write_analytics(detail_pages)
+    
     print(f"✅ Website created: index.html (GitHub Pages ready)")
+    print(f"📄 Detail pages: {written} written, {unchanged} unchanged in {DETAIL_DIR}/")
+    print(f"📈 Analytics: {len(opportunities)} cross-match price gaps in {ANALYTICS_DIR}/")
     print(f"📊 {len(matches)} matches processed")
-    print(f"💰 Price range: ${min(m['lowest_price'] for m in matches if m['lowest_price'] > 0):,.0f} - ${max(m['highest_price'] for m in matches):,.0f}")
+    print(f"💰 Price range: ${totals.min_cents / 100:,.0f} - ${totals.max_cents / 100:,.0f}")
+
+def create_website():
+    """Create the FIFA marketplace website"""
+    
+    data_dir = "fifa_marketplace_data"
+    matches = []
+    detail_pages = []
+    
+    # Load all JSON files (and their history) in parallel
+    snapshots = load_snapshots(data_dir)
+    histories = load_histories(data_dir, snapshots)
+    
+    for match_num, data in snapshots.items():
+        quantiles = load_match_sketches(match_num, data_dir).recent_windows()
+        summary = summarize_match(match_num, data, summarize_history(histories[match_num]), quantiles)
+        if summary:
+            matches.append(summary[0])
+            detail_pages.append(summary[1])
+    
+    write_site(matches, detail_pages)
 
 if __name__ == "__main__":
-    create_website()
+    import argparse
+    
+    from profiling import RunProfiler, add_profile_arguments
+    
+    parser = argparse.ArgumentParser(description="Build the marketplace website from the stored data")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.profile:
+        # Detail pages are rendered in worker processes, which are not profiled
+        with RunProfiler("create_website", flamegraph=args.flamegraph):
+            create_website()
+    else:
+        create_website()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Aggregate cube over the current listings
+- Dimensions: match, stage, venue, country, rarity, day (the scrape's date)
+- Measures per cell: count, min, max, sum and a price histogram (quantiles)
+- Rollups (e.g. by rarity, by stage x rarity) are kept materialised and
+  updated per match when its snapshot changes, so reading one is a dict
+  lookup instead of a rescan of every listing
+
+Usage: python3 cube.py [--by stage,rarity]    # print a rollup of the stored data
+"""
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+from models import Rarity, format_price
+
+DIMENSIONS = ('match', 'stage', 'venue', 'country', 'rarity', 'day')
+
+# Rollups kept materialised; others are computed from the base cells on demand
+DEFAULT_ROLLUPS = (
+    (),
+    ('rarity',),
+    ('stage',),
+    ('venue',),
+    ('country',),
+    ('day',),
+    ('stage', 'rarity'),
+    ('country', 'rarity'),
+)
+
+# Histogram buckets are this much wider than the previous one (~1% error)
+HISTOGRAM_GROWTH = 1.02
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+class PriceHistogram:
+    """Log-bucketed price counts: mergeable and, unlike most sketches, subtractable"""
+
+    __slots__ = ('buckets',)
+
+    def __init__(self, buckets=None):
+        self.buckets = Counter(buckets or ())
+
+    def add(self, price_cents, n=1):
+        self.buckets[int(math.log(price_cents) / _LOG_GROWTH)] += n
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+
+    def subtract(self, other):
+        self.buckets.subtract(other.buckets)
+        for bucket in [b for b, n in self.buckets.items() if n <= 0]:
+            del self.buckets[bucket]
+
+    def quantile(self, q):
+        """Approximate q-quantile in cents (bucket midpoint), 0 if empty"""
+        total = sum(self.buckets.values())
+        if not total:
+            return 0
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return round(HISTOGRAM_GROWTH ** (bucket + 0.5))
+        return round(HISTOGRAM_GROWTH ** (max(self.buckets) + 0.5))
+
+    def copy(self):
+        return PriceHistogram(self.buckets)
+
+@dataclass(slots=True)
+class Measures:
+    """Aggregates of the priced listings in one cell"""
+    count: int = 0
+    min_cents: int = 0
+    max_cents: int = 0
+    sum_cents: int = 0
+    sketch: PriceHistogram = field(default_factory=PriceHistogram)
+
+    def add(self, price_cents):
+        if not self.count or price_cents < self.min_cents:
+            self.min_cents = price_cents
+        if price_cents > self.max_cents:
+            self.max_cents = price_cents
+        self.count += 1
+        self.sum_cents += price_cents
+        self.sketch.add(price_cents)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        if not self.count or other.min_cents < self.min_cents:
+            self.min_cents = other.min_cents
+        self.max_cents = max(self.max_cents, other.max_cents)
+        self.count += other.count
+        self.sum_cents += other.sum_cents
+        self.sketch.merge(other.sketch)
+
+    def copy(self):
+        return Measures(self.count, self.min_cents, self.max_cents, self.sum_cents, self.sketch.copy())
+
+    @property
+    def mean_cents(self):
+        return round(self.sum_cents / self.count) if self.count else 0
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'min': format_price(self.min_cents),
+            'max': format_price(self.max_cents),
+            'mean': format_price(self.mean_cents),
+            'median': format_price(self.quantile(0.5)),
+            'sum': format_price(self.sum_cents),
+        }
+
+class _RollupCell:
+    """A rollup cell: its total plus each match's contribution, for retraction"""
+
+    __slots__ = ('total', 'parts')
+
+    def __init__(self):
+        self.total = Measures()
+        self.parts = {}
+
+    def add(self, match_num, measures):
+        self.parts[match_num] = measures
+        self.total.merge(measures)
+
+    def remove(self, match_num):
+        measures = self.parts.pop(match_num)
+        total = self.total
+        total.count -= measures.count
+        total.sum_cents -= measures.sum_cents
+        total.sketch.subtract(measures.sketch)
+        # min/max can't be subtracted; rescan the (few) remaining parts only
+        # when the retracted part held one of them
+        if measures.min_cents == total.min_cents or measures.max_cents == total.max_cents:
+            parts = self.parts.values()
+            total.min_cents = min((p.min_cents for p in parts), default=0)
+            total.max_cents = max((p.max_cents for p in parts), default=0)
+
+def canonical_dims(dims):
+    """dims in DIMENSIONS order, so ('rarity', 'stage') and ('stage', 'rarity') are one rollup"""
+    dims = tuple(dims)
+    unknown = [dim for dim in dims if dim not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown dimension(s): {', '.join(unknown)}")
+    return tuple(sorted(set(dims), key=DIMENSIONS.index))
+
+def _project(cells, dims):
+    """Merge a match's base cells ({coordinates: Measures}) onto dims"""
+    indexes = [DIMENSIONS.index(dim) for dim in dims]
+    projected = {}
+    for coordinates, measures in cells.items():
+        key = tuple(coordinates[i] for i in indexes)
+        merged = projected.get(key)
+        if merged is None:
+            projected[key] = merged = Measures()
+        merged.merge(measures)
+    return projected
+
+class PriceCube:
+    """Cube of listing measures, maintained one match at a time.
+
+    Usage:
+        cube = PriceCube()
+        cube.update_match(summary, listings, scraped_at)   # again whenever it changes
+        cube.total().min_cents
+        cube.rollup('stage', 'rarity')[('Final', Rarity.ICONIC)].quantile(0.5)
+    """
+
+    def __init__(self, rollups=DEFAULT_ROLLUPS):
+        self.base = {}
+        self.views = {canonical_dims(dims): {} for dims in rollups}
+
+    def update_match(self, match, listings, scraped_at):
+        """Replace a match's contribution; match is its MatchSummary"""
+        cells = {}
+        day = scraped_at[:10]
+        for listing in listings:
+            price_cents = listing.price_cents
+            if price_cents <= 0:
+                continue
+            coordinates = (match.match_num, match.stage, match.venue, match.country, listing.rarity, day)
+            measures = cells.get(coordinates)
+            if measures is None:
+                cells[coordinates] = measures = Measures()
+            measures.add(price_cents)
+
+        self.remove_match(match.match_num)
+        if not cells:
+            return
+        self.base[match.match_num] = cells
+        for dims, view in self.views.items():
+            for key, measures in _project(cells, dims).items():
+                cell = view.get(key)
+                if cell is None:
+                    view[key] = cell = _RollupCell()
+                cell.add(match.match_num, measures)
+
+    def remove_match(self, match_num):
+        """Retract a match's contribution (no-op if it has none)"""
+        cells = self.base.pop(match_num, None)
+        if cells is None:
+            return
+        for dims, view in self.views.items():
+            for key in _project(cells, dims):
+                cell = view[key]
+                cell.remove(match_num)
+                if not cell.parts:
+                    del view[key]
+
+    def rollup(self, *dims):
+        """{key tuple: Measures} grouped by dims; keys follow DIMENSIONS order.
+
+        The Measures of materialised rollups are live - treat them as read-only.
+        """
+        dims = canonical_dims(dims)
+        view = self.views.get(dims)
+        if view is not None:
+            return {key: cell.total for key, cell in view.items()}
+        rolled = {}
+        for cells in self.base.values():
+            for key, measures in _project(cells, dims).items():
+                rolled.setdefault(key, Measures()).merge(measures)
+        return rolled
+
+    def total(self):
+        """Measures over every priced listing"""
+        return self.rollup().get((), Measures())
+
+def cube_from_pages(detail_pages):
+    """Build a cube from create_website detail pages"""
+    cube = PriceCube()
+    for page in detail_pages:
+        cube.update_match(page['match'], page['listings'], page['scraped_at'])
+    return cube
+
+def format_value(value):
+    """Display form of a dimension value (rarities by label)"""
+    if isinstance(value, Rarity):
+        return value.label or 'Other'
+    return value
+
+def format_key(key):
+    return ' / '.join(str(format_value(value)) for value in key) or 'all'
+
+if __name__ == "__main__":
+    import argparse
+
+    from aggregate import MatchAggregate
+
+    parser = argparse.ArgumentParser(description="Print a rollup of the current listings")
+    parser.add_argument("--by", default="", help=f"comma-separated dimensions: {', '.join(DIMENSIONS)}")
+    args = parser.parse_args()
+
+    dims = tuple(dim.strip() for dim in args.by.split(',') if dim.strip())
+    cube = MatchAggregate().cube
+    rows = sorted(cube.rollup(*dims).items(), key=lambda item: tuple(str(v) for v in item[0]))
+    print(f"{'cell':<40} {'count':>7} {'min':>14} {'median':>14} {'max':>16}")
+    for key, measures in rows:
+        print(f"{format_key(key)[:40]:<40} {measures.count:>7} {format_price(measures.min_cents):>14} "
+              f"{format_price(measures.quantile(0.5)):>14} {format_price(measures.max_cents):>16}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Fast loading of the match snapshots in fifa_marketplace_data
+- Files are read and decoded on a thread pool
+- Uses orjson or msgspec when installed, stdlib json otherwise
+- Decodes into the shared MatchSnapshot / Listing records
+- Building those records costs more than the JSON decoding itself, so the
+  gain over a serial json.load loop is modest: ~1.1x at 10x the data with
+  orjson (see benchmarks/bench_loader.py for the breakdown)
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from models import MatchSnapshot
+
+try:
+    import orjson
+    JSON_DECODER = "orjson"
+    _decode = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+        JSON_DECODER = "msgspec"
+        _decode = msgspec.json.Decoder().decode
+    except ImportError:
+        JSON_DECODER = "json"
+        _decode = json.loads
+
+DATA_DIR = "fifa_marketplace_data"
+
+# Reads are I/O bound, so oversubscribe the cores a little
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def decode_json(raw):
+    """Decode JSON bytes with the fastest available decoder"""
+    return _decode(raw)
+
+def match_files(data_dir=DATA_DIR):
+    """Map match number -> path for every mN.json in data_dir"""
+    files = {}
+    for filename in os.listdir(data_dir):
+        if filename.startswith('m') and filename.endswith('.json') and filename[1:-5].isdigit():
+            files[int(filename[1:-5])] = os.path.join(data_dir, filename)
+    return files
+
+def read_bytes(path):
+    """Read a file's raw bytes (empty if it does not exist)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return b''
+
+def read_json_file(path):
+    """Read and decode one JSON file"""
+    return decode_json(read_bytes(path))
+
+def decode_jsonl(raw):
+    """Decode JSON lines, skipping blank or corrupt lines"""
+    records = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(decode_json(line))
+        except ValueError:
+            # A partially written last line must not break the build
+            continue
+    return records
+
+def decode_snapshot(raw):
+    """Decode one mN.json file's bytes as a MatchSnapshot"""
+    return MatchSnapshot.from_dict(decode_json(raw))
+
+def decode_snapshot_history(raw):
+    """Decode one history/mN.jsonl file's bytes as a list of MatchSnapshots"""
+    return [MatchSnapshot.from_dict(record) for record in decode_jsonl(raw)]
+
+def _load_parallel(decoder, paths, workers):
+    """Read every path on a thread pool and decode it, keyed like paths.
+    
+    Only the reads run on the pool; decoding is CPU bound and holds the GIL,
+    so it runs here as each read completes instead of contending across threads.
+    """
+    if not paths:
+        return {}
+    keys = sorted(paths)
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as executor:
+        raws = executor.map(read_bytes, [paths[key] for key in keys])
+        return {key: decoder(raw) for key, raw in zip(keys, raws)}
+
+def load_snapshots(data_dir=DATA_DIR, workers=None):
+    """Load every mN.json snapshot, returned as {match_num: MatchSnapshot}"""
+    return _load_parallel(decode_snapshot, match_files(data_dir), workers)
+
+def load_histories(data_dir=DATA_DIR, match_numbers=None, workers=None):
+    """Load history/mN.jsonl for each match, returned as {match_num: [snapshots]}"""
+    history_dir = os.path.join(data_dir, "history")
+    if match_numbers is None:
+        match_numbers = match_files(data_dir)
+    paths = {n: os.path.join(history_dir, f"m{n}.jsonl") for n in match_numbers}
+    return _load_parallel(decode_snapshot_history, paths, workers)
@@ -4,162 +4,483 @@ FIFA World Cup 2026 Marketplace Scraper
 - Constant folder name: fifa_marketplace_data
 - Only update JSON if scraping succeeds
 - Preserve old data if scraping fails
+- Quarantine results that fail the quality checks instead of committing them
 """
 
 import asyncio
 import json
 import os
-import re
+from contextlib import AsyncExitStack
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from browser_session import BROWSER_STATE_DIR, MAX_JS_HEAP_MB, MAX_NAVIGATIONS, BrowserSession
+from data_loader import decode_snapshot, read_bytes
+from http_fetcher import MARKETPLACE_BASE_URL, FastFetcher, fast_path_available
+from models import Listing, MatchSnapshot
+from quality import check_snapshot
+from sketches import record_snapshot
+from tag_discovery import discover_tags, plan_match_numbers
+
 # Constant data directory name
 DATA_DIR = "fifa_marketplace_data"
 
-async def scrape_match(page, match_num):
-    """Scrape a single match with error handling"""
+# Every successful snapshot is also appended here, one JSON line per scrape
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+
+# Crawled listings are streamed here while a tag is being scraped
+SPOOL_DIR = os.path.join(DATA_DIR, ".spool")
+
+# Snapshots that fail the quality checks are kept here for inspection
+QUARANTINE_DIR = os.path.join(DATA_DIR, "quarantine")
+
+# Listing cards are found from their price text, walking up to the card element
+CARD_CONTAINER_JS = """
+    (el) => {
+        let parent = el;
+        for (let i = 0; i < 8; i++) {
+            parent = parent.parentElement;
+            if (!parent) break;
+            if (parent.querySelector('img') || parent.querySelector('h3')) {
+                return parent;
+            }
+        }
+        return parent;
+    }
+"""
+
+# Same card rule in one round trip: innerText of every card not returned before.
+# Cards are marked in the DOM so repeated calls after scrolling only return new ones.
+NEW_CARD_TEXTS_JS = """
+    () => {
+        const texts = [];
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            if (!walker.currentNode.nodeValue.includes('US$')) continue;
+            let card = walker.currentNode.parentElement;
+            for (let i = 0; i < 8; i++) {
+                const parent = card.parentElement;
+                if (!parent) break;
+                card = parent;
+                if (card.querySelector('img') || card.querySelector('h3')) break;
+            }
+            if (card.dataset.fifaSeen) continue;
+            card.dataset.fifaSeen = '1';
+            texts.push(card.innerText);
+        }
+        return texts;
+    }
+"""
+
+# Default listing depth for a normal sweep (the first grid page)
+DEFAULT_MAX_LISTINGS = 15
+
+# Pause between tags, in seconds
+REQUEST_DELAY = 2
+
+# Crawl mode: stop after this many scrolls in a row bring no new cards
+CRAWL_IDLE_ROUNDS = 2
+CRAWL_SCROLL_WAIT_MS = 1500
+
+class ListingSpool:
+    """Append-only spool of one tag's listings on disk.
+    
+    Crawled listings are written here as they arrive instead of being held in
+    memory; only dedup keys stay in memory. Iterating reads them back lazily,
+    so a spool can stand in for MatchSnapshot.listings.
+    """
+    
+    def __init__(self, tag):
+        self.path = os.path.join(SPOOL_DIR, f"{tag}.jsonl")
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        self._file = open(self.path, 'w')
+        self._count = 0
+        self.seen = set()
+    
+    def add(self, listing):
+        """Write a listing unless an identical card was already spooled"""
+        key = listing.key
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self._file.write(json.dumps(listing.to_dict(), separators=(',', ':')) + "\n")
+        self._file.flush()
+        self._count += 1
+        return True
+    
+    def __len__(self):
+        return self._count
+    
+    def __iter__(self):
+        self._file.flush()
+        with open(self.path, 'r') as f:
+            for line in f:
+                yield Listing.from_dict(json.loads(line))
+    
+    def discard(self):
+        """Close and delete the spool file"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def extract_listing(price_elem, tag):
+    """Build a Listing from a price element's card, or None"""
+    container = await price_elem.evaluate_handle(CARD_CONTAINER_JS)
+    try:
+        if container:
+            text_content = await container.evaluate("el => el.innerText")
+            return Listing.from_text(tag, text_content)
+        return None
+    finally:
+        # Handles pin their DOM nodes in the renderer until released
+        await container.dispose()
+
+async def crawl_listings(page, tag, spool, max_listings=None):
+    """Scroll through the full result set, spooling each new card once.
+    
+    Stops when max_listings is reached or CRAWL_IDLE_ROUNDS scrolls in a row
+    produce no new cards.
+    """
+    idle_rounds = 0
+    while True:
+        added = 0
+        for text_content in await page.evaluate(NEW_CARD_TEXTS_JS):
+            listing = Listing.from_text(tag, text_content)
+            if listing and spool.add(listing):
+                added += 1
+                if max_listings and len(spool) >= max_listings:
+                    return
+        
+        idle_rounds = 0 if added else idle_rounds + 1
+        if idle_rounds >= CRAWL_IDLE_ROUNDS:
+            return
+        
+        # Paged grids have a "load more" button; infinite grids load on scroll
+        load_more = await page.query_selector('button:has-text("Load more"), button:has-text("Show more")')
+        if load_more:
+            await load_more.click()
+        else:
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await page.wait_for_timeout(CRAWL_SCROLL_WAIT_MS)
+
+async def scrape_match(page, match_num, base_url=MARKETPLACE_BASE_URL, crawl=False, max_listings=DEFAULT_MAX_LISTINGS):
+    """Scrape a single match with error handling
+    
+    With crawl=True the whole result set is scrolled through (up to
+    max_listings, None for no limit) and listings are spooled to disk.
+    """
     tag = f"m{match_num}"
-    url = f"https://collect.fifa.com/marketplace?tags={tag}"
+    url = f"{MARKETPLACE_BASE_URL}/marketplace?tags={tag}"
+    spool = None
     
     try:
         print(f"Scraping {tag}...")
-        await page.goto(url, wait_until='networkidle', timeout=30000)
+        await page.goto(f"{base_url}/marketplace?tags={tag}", wait_until='networkidle', timeout=30000)
         await page.wait_for_timeout(3000)
         
-        # Find price elements
-        price_elements = await page.query_selector_all('text=/US\\$/')
-        listings = []
-        
-        for price_elem in price_elements[:15]:
+        if crawl:
+            spool = ListingSpool(tag)
+            await crawl_listings(page, tag, spool, max_listings)
+            listings = spool
+        else:
+            # Find price elements
+            price_elements = await page.query_selector_all('text=/US\\$/')
+            listings = []
+            
             try:
-                container = await price_elem.evaluate_handle("""
-                    (el) => {
-                        let parent = el;
-                        for (let i = 0; i < 8; i++) {
-                            parent = parent.parentElement;
-                            if (!parent) break;
-                            if (parent.querySelector('img') || parent.querySelector('h3')) {
-                                return parent;
-                            }
-                        }
-                        return parent;
-                    }
-                """)
-                
-                if container:
-                    text_content = await container.evaluate("el => el.innerText")
-                    price_match = re.search(r'US\$[\d,]+\.?\d*', text_content)
-                    
-                    if price_match and 'NO LONGER VALID' not in text_content.upper():
-                        listing_data = {
-                            'tag': tag,
-                            'price': price_match.group(),
-                            'text': text_content.strip()
-                        }
-                        
-                        # Extract title (first meaningful line)
-                        lines = [l.strip() for l in text_content.split('\\n') if l.strip()]
-                        for line in lines:
-                            if line and 'US$' not in line and 'From' not in line and len(line) > 10:
-                                listing_data['title'] = line
-                                break
-                        
-                        # Extract type
-                        if 'Iconic' in text_content:
-                            listing_data['type'] = 'Iconic'
-                        elif 'Rare' in text_content:
-                            listing_data['type'] = 'Rare'
-                        elif 'Epic' in text_content:
-                            listing_data['type'] = 'Epic'
-                        else:
-                            listing_data['type'] = ''
-                        
-                        listings.append(listing_data)
-                        
-            except Exception:
-                continue
+                for price_elem in price_elements[:max_listings]:
+                    try:
+                        listing = await extract_listing(price_elem, tag)
+                        if listing:
+                            listings.append(listing)
+                    except Exception:
+                        continue
+            finally:
+                for price_elem in price_elements:
+                    await price_elem.dispose()
         
         if len(listings) > 0:  # Only return success if we got listings
-            return {
-                "tag": tag,
-                "url": url,
-                "listings_count": len(listings),
-                "listings": listings,
-                "success": True,
-                "timestamp": datetime.now().isoformat()
-            }
+            return MatchSnapshot(
+                tag=tag,
+                url=url,
+                listings=listings,
+                timestamp=datetime.now().isoformat()
+            )
         else:
+            if spool is not None:
+                spool.discard()
             return None  # Failed - no listings found
             
     except Exception as e:
         print(f"Error scraping {tag}: {e}")
+        if spool is not None:
+            spool.discard()
         return None  # Failed
 
-def save_match_data(match_data, match_num):
-    """Save match data only if scraping succeeded"""
+def write_snapshot_json(snapshot, f, indent=True):
+    """Write a snapshot as JSON, streaming listings one at a time.
+    
+    indent=True matches json.dump(..., indent=2); indent=False writes one compact line.
+    """
+    if indent:
+        open_, sep, close, colon = '{\n  ', ',\n  ', '\n}', ': '
+        list_open, list_sep, list_close = '[\n    ', ',\n    ', '\n  ]'
+        dump = lambda d: json.dumps(d, indent=2).replace('\n', '\n    ')
+    else:
+        open_, sep, close, colon = '{', ',', '}', ':'
+        list_open, list_sep, list_close = '[', ',', ']'
+        dump = lambda d: json.dumps(d, separators=(',', ':'))
+    
+    f.write(open_)
+    for i, (key, value) in enumerate(snapshot.to_dict(include_listings=False).items()):
+        if i:
+            f.write(sep)
+        f.write(json.dumps(key) + colon)
+        if key != 'listings':
+            f.write(json.dumps(value))
+        elif snapshot.listings_count == 0:
+            f.write('[]')
+        else:
+            f.write(list_open)
+            for j, listing in enumerate(snapshot.listings):
+                if j:
+                    f.write(list_sep)
+                f.write(dump(listing.to_dict()))
+            f.write(list_close)
+    f.write(close)
+
+def expected_listing_count(match_num, advertised=None):
+    """Listings a tag should have: its count in the tag index, else the stored snapshot's (None if unknown)"""
+    if advertised is not None:
+        return advertised
+    previous = load_previous_snapshot(match_num)
+    if previous is None or not previous.success:
+        return None
+    return previous.listings_count
+
+def load_previous_snapshot(match_num):
+    """The currently stored snapshot for a match, or None"""
+    raw = read_bytes(os.path.join(DATA_DIR, f"m{match_num}.json"))
+    if not raw:
+        return None
+    try:
+        return decode_snapshot(raw)
+    except ValueError:
+        return None
+
+def save_match_data(match_data, match_num, previous=None, report=None):
+    """Save match data only if scraping succeeded and the result passes the quality checks
+    
+    previous is the currently stored snapshot; it is read from disk if not given.
+    report is the check_snapshot result, if the caller has already run the checks.
+    """
     if match_data is None:
         print(f"⚠️  Skipping m{match_num} - scraping failed, keeping old data")
         return False
     
+    if report is None:
+        report = check_snapshot(match_data, previous or load_previous_snapshot(match_num))
+    if not report.ok:
+        print(f"🚧 Quarantined m{match_num} - {'; '.join(report.problems)}, keeping old data")
+        quarantine_match_data(match_data, match_num, report)
+        return False
+    for warning in report.warnings:
+        print(f"⚠️  m{match_num}: {warning}")
+    
     filepath = os.path.join(DATA_DIR, f"m{match_num}.json")
     
     try:
-        with open(filepath, 'w') as f:
-            json.dump(match_data, f, indent=2)
-        print(f"✅ Updated m{match_num} with {match_data['listings_count']} listings")
-        return True
+        # Write aside and swap in, so a failed write never leaves a truncated file
+        with open(f"{filepath}.tmp", 'w') as f:
+            write_snapshot_json(match_data, f)
+        os.replace(f"{filepath}.tmp", filepath)
+        print(f"✅ Updated m{match_num} with {match_data.listings_count} listings")
     except Exception as e:
         print(f"❌ Failed to save m{match_num}: {e}")
         return False
+    
+    append_match_history(match_data, match_num)
+    update_price_sketches(match_data, match_num)
+    
+    if isinstance(match_data.listings, ListingSpool):
+        match_data.listings.discard()
+    return True
 
-async def scrape_matches(match_numbers):
-    """Scrape specified matches"""
+def quarantine_match_data(match_data, match_num, report):
+    """Keep a suspect snapshot and the reasons next to it, out of the live data"""
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    filepath = os.path.join(QUARANTINE_DIR, f"m{match_num}_{datetime.now():%Y%m%dT%H%M%S%f}")
+    
+    try:
+        with open(f"{filepath}.json", 'w') as f:
+            write_snapshot_json(match_data, f)
+        with open(f"{filepath}.reasons.txt", 'w') as f:
+            f.write("\n".join(report.problems + report.warnings) + "\n")
+    except Exception as e:
+        print(f"⚠️  Failed to quarantine m{match_num}: {e}")
+    
+    if isinstance(match_data.listings, ListingSpool):
+        match_data.listings.discard()
+
+def append_match_history(match_data, match_num):
+    """Append a successful snapshot to the match's history file"""
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    filepath = os.path.join(HISTORY_DIR, f"m{match_num}.jsonl")
+    
+    try:
+        with open(filepath, 'a') as f:
+            write_snapshot_json(match_data, f, indent=False)
+            f.write("\n")
+    except Exception as e:
+        # History is best effort - the current snapshot is already saved
+        print(f"⚠️  Failed to append history for m{match_num}: {e}")
+
+def update_price_sketches(match_data, match_num):
+    """Fold a successful snapshot into the match's quantile sketches"""
+    try:
+        record_snapshot(match_data, match_num, DATA_DIR)
+    except Exception as e:
+        # Sketches are best effort too; sketches.py --rebuild recreates them from history
+        print(f"⚠️  Failed to update price sketches for m{match_num}: {e}")
+
+async def iter_scraped_matches(match_numbers, fast=False, base_url=MARKETPLACE_BASE_URL, crawl=False,
+                               max_listings=DEFAULT_MAX_LISTINGS, recycle_after=MAX_NAVIGATIONS,
+                               max_heap_mb=MAX_JS_HEAP_MB, browser_state=BROWSER_STATE_DIR,
+                               delay=REQUEST_DELAY, browser=True, path_log=None):
+    """Scrape matches one by one, yielding (match_num, MatchSnapshot or None)
+    
+    With fast=True each tag is first fetched over plain HTTP; the browser is
+    only launched (lazily) for tags where the fast path fails validation,
+    including a grid far shorter than the tag's advertised or stored count.
+    With crawl=True every tag's full result set is scrolled through.
+    The browser page is recycled every recycle_after tags, or sooner once its
+    JS heap passes max_heap_mb, so long sweeps run in flat memory.
+    Cookies, localStorage and static assets persist in browser_state (None
+    for a clean browser every time).
+    With browser=False (fast path only) tags the fast path misses yield None.
+    If path_log (a list) is given, the path each tag took - 'http', 'browser',
+    or None if neither produced a snapshot - is appended before it is yielded.
+    """
+    if fast and not fast_path_available():
+        print("⚠️  httpx not installed - fast path disabled, using the browser for every tag")
+        fast = False
+    if fast and crawl:
+        # A single server-rendered page is exactly the truncation crawling avoids
+        print("⚠️  --crawl needs the browser to scroll - fast path disabled")
+        fast = False
+    
+    async with async_playwright() as p, AsyncExitStack() as stack:
+        fetcher = await stack.enter_async_context(FastFetcher(base_url, max_listings)) if fast else None
+        # Advertised counts let the fast path spot a truncated grid
+        tag_counts = await discover_tags(base_url) if fast else {}
+        session = BrowserSession(p, recycle_after, max_heap_mb, state_dir=browser_state,
+                                 warmup_url=f"{base_url}/marketplace")
+        fast_hits = 0
+        
+        try:
+            for match_num in match_numbers:
+                match_data = None
+                path = None
+                if fetcher:
+                    expected = expected_listing_count(match_num, tag_counts.get(f"m{match_num}"))
+                    match_data = await fetcher.fetch_match(match_num, expected)
+                    if match_data:
+                        path = 'http'
+                        fast_hits += 1
+                        print(f"Fetched m{match_num} over HTTP")
+                
+                if match_data is None and browser:
+                    page = await session.page()
+                    match_data = await scrape_match(page, match_num, base_url, crawl, max_listings)
+                    await session.after_navigation()
+                    if match_data:
+                        path = 'browser'
+                
+                if path_log is not None:
+                    path_log.append(path)
+                yield match_num, match_data
+                
+                # Delay between requests
+                await asyncio.sleep(delay)
+        finally:
+            await session.close()
+            if session.recycles:
+                print(f"♻️  Browser page recycled {session.recycles} times")
+            cache = session.asset_cache
+            if cache and cache.hits + cache.misses:
+                print(f"💾 Browser asset cache: {cache.hits} hits, {cache.misses} misses")
+            if fast:
+                print(f"⚡ Served by HTTP fast path: {fast_hits}")
+
+async def scrape_matches(match_numbers, **options):
+    """Scrape specified matches (options as for iter_scraped_matches)"""
     # Create data directory if it doesn't exist
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        
-        successful = 0
-        failed = 0
-        
-        for match_num in match_numbers:
-            match_data = await scrape_match(page, match_num)
-            
-            if save_match_data(match_data, match_num):
-                successful += 1
-            else:
-                failed += 1
-            
-            # Delay between requests
-            await asyncio.sleep(2)
-        
-        await browser.close()
-        
-        print(f"\n📊 SUMMARY:")
-        print(f"✅ Successfully updated: {successful}")
-        print(f"⚠️  Failed/skipped: {failed}")
-        
-        return successful, failed
+    successful = 0
+    failed = 0
+    
+    async for match_num, match_data in iter_scraped_matches(match_numbers, **options):
+        if save_match_data(match_data, match_num):
+            successful += 1
+        else:
+            failed += 1
+    
+    print(f"\n📊 SUMMARY:")
+    print(f"✅ Successfully updated: {successful}")
+    print(f"⚠️  Failed/skipped: {failed}")
+    
+    return successful, failed
 
-async def scrape_all_matches():
-    """Scrape all matches 1-104"""
-    match_numbers = list(range(1, 105))
-    return await scrape_matches(match_numbers)
+async def scrape_all_matches(**options):
+    """Scrape every match tag the marketplace currently lists with listings"""
+    match_numbers = await plan_match_numbers(options.get("base_url", MARKETPLACE_BASE_URL))
+    return await scrape_matches(match_numbers, **options)
 
-async def scrape_selected_matches(match_numbers):
+async def scrape_selected_matches(match_numbers, **options):
     """Scrape only specified matches"""
-    return await scrape_matches(match_numbers)
+    return await scrape_matches(match_numbers, **options)
 
 if __name__ == "__main__":
-    # Example usage
-    import sys
+    # Example usage:
+    #   python fifa_scraper.py              # all active match tags (see tag_discovery.py)
+    #   python fifa_scraper.py 1 104 7 17   # specific matches
+    #   python fifa_scraper.py --fast       # try plain HTTP before the browser
+    #   python fifa_scraper.py --crawl      # scroll through every listing
+    #   python fifa_scraper.py --profile    # write cProfile / asyncio reports to profiles/
+    import argparse
+    
+    from profiling import RunProfiler, add_profile_arguments
+    
+    parser = argparse.ArgumentParser(description="Scrape FIFA Collect marketplace listings")
+    parser.add_argument("matches", nargs="*", type=int, help="match numbers to scrape (default: all with listings)")
+    parser.add_argument("--fast", action="store_true", help="fetch over HTTP first, fall back to the browser")
+    parser.add_argument("--base-url", default=MARKETPLACE_BASE_URL, help="marketplace origin (e.g. a local stand-in)")
+    parser.add_argument("--crawl", action="store_true", help="scroll/page through the full result set of each tag")
+    parser.add_argument("--depth", type=int, default=None,
+                        help=f"max listings per tag (default: {DEFAULT_MAX_LISTINGS}, unlimited with --crawl)")
+    parser.add_argument("--recycle-after", type=int, default=MAX_NAVIGATIONS,
+                        help="open a fresh browser page after this many tags")
+    parser.add_argument("--max-heap-mb", type=float, default=MAX_JS_HEAP_MB,
+                        help="open a fresh browser page once the page's JS heap exceeds this")
+    parser.add_argument("--fresh-browser", action="store_true",
+                        help=f"ignore the cookies, localStorage and asset cache kept in {BROWSER_STATE_DIR}/")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    depth = args.depth if args.depth is not None else (None if args.crawl else DEFAULT_MAX_LISTINGS)
+    options = {"fast": args.fast, "base_url": args.base_url, "crawl": args.crawl, "max_listings": depth,
+               "recycle_after": args.recycle_after, "max_heap_mb": args.max_heap_mb,
+               "browser_state": None if args.fresh_browser else BROWSER_STATE_DIR}
+    if args.matches:
+        run = lambda: asyncio.run(scrape_selected_matches(args.matches, **options))
+    else:
+        run = lambda: asyncio.run(scrape_all_matches(**options))
     
-    if len(sys.argv) > 1:
-        # Scrape specific matches: python fifa_scraper.py 1 104 7 17
-        match_numbers = [int(x) for x in sys.argv[1:]]
-        asyncio.run(scrape_selected_matches(match_numbers))
+    if args.profile:
+        # Also time the event loop: Python CPU per task vs. awaiting Playwright/network
+        with RunProfiler("fifa_scraper", flamegraph=args.flamegraph, asyncio_timing=True):
+            run()
     else:
-        # Scrape all matches
-        asyncio.run(scrape_all_matches())
\ No newline at end of file
+        run()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP fast path for marketplace tags
+- Fetches server-rendered marketplace HTML with a pooled async HTTP client
+- Extracts listing cards the same way the Playwright path does
+- Returns None when the page does not validate, so callers fall back to the browser;
+  a grid with far fewer cards than the tag is known to have counts as truncated
+
+Needs httpx (and h2 for HTTP/2); without it the fast path is simply unavailable.
+"""
+
+from datetime import datetime
+from html.parser import HTMLParser
+
+from models import Listing, MatchSnapshot
+from quality import FULL_PAGE_LISTINGS, MIN_COUNT_RATIO
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MARKETPLACE_BASE_URL = "https://collect.fifa.com"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+# Elements that never have children
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+# Elements whose text starts on a new line in innerText
+BLOCK_TAGS = {'address', 'article', 'aside', 'br', 'div', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'section', 'table', 'tr', 'ul'}
+SKIP_TAGS = {'script', 'style', 'template', 'noscript'}
+
+def fast_path_available():
+    return httpx is not None
+
+class _Element:
+    __slots__ = ('tag', 'parent', 'children')
+
+    def __init__(self, tag, parent):
+        self.tag = tag
+        self.parent = parent
+        self.children = []
+
+    def contains_tag(self, names):
+        """True if any descendant is one of the given tags"""
+        stack = list(self.children)
+        while stack:
+            child = stack.pop()
+            if isinstance(child, _Element):
+                if child.tag in names:
+                    return True
+                stack.extend(child.children)
+        return False
+
+    def inner_text(self):
+        """Approximate the browser's innerText"""
+        parts = []
+        self._collect_text(parts)
+        lines = [line.strip() for line in "".join(parts).split('\n')]
+        return "\n".join(line for line in lines if line)
+
+    def _collect_text(self, parts):
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            elif child.tag not in SKIP_TAGS:
+                if child.tag in BLOCK_TAGS:
+                    parts.append('\n')
+                child._collect_text(parts)
+                if child.tag in BLOCK_TAGS:
+                    parts.append('\n')
+
+class _TreeBuilder(HTMLParser):
+    """Builds a minimal element tree and remembers elements holding price text"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element('#document', None)
+        self.current = self.root
+        self.price_elements = []
+
+    def handle_starttag(self, tag, attrs):
+        element = _Element(tag, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(_Element(tag, self.current))
+
+    def handle_endtag(self, tag):
+        # Pop to the matching open element, tolerating unclosed children
+        element = self.current
+        while element is not self.root and element.tag != tag:
+            element = element.parent
+        if element is not self.root:
+            self.current = element.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+        if 'US$' in data and self.current.tag not in SKIP_TAGS:
+            self.price_elements.append(self.current)
+
+def extract_card_texts(page_html, max_cards=15):
+    """innerText of each listing card, found like the Playwright path does.
+
+    Starting from every element with 'US$' text, walk up at most 8 parents
+    to the first one containing an <img> or <h3>.
+    """
+    builder = _TreeBuilder()
+    builder.feed(page_html)
+    builder.close()
+
+    texts = []
+    seen = set()
+    for element in builder.price_elements:
+        container = element
+        for _ in range(8):
+            if container.parent is None:
+                break
+            container = container.parent
+            if container.contains_tag(('img', 'h3')):
+                break
+        if id(container) in seen:
+            continue
+        seen.add(id(container))
+        texts.append(container.inner_text())
+        if len(texts) >= max_cards:
+            break
+    return texts
+
+def validate_fast_result(snapshot, expected=None, max_listings=None):
+    """A fast-path result is only trusted if it looks like a real listing grid.
+
+    expected is the listing count the tag is known to have (advertised in the
+    tag index, or that of the previous snapshot). Fewer cards than
+    MIN_COUNT_RATIO of it means a truncated grid, unless the result still
+    fills the first grid page - the same rule quality.check_snapshot applies.
+    """
+    if snapshot is None or not snapshot.listings:
+        return False
+    for listing in snapshot.listings:
+        if listing.price_cents <= 0 or listing.tag != snapshot.tag:
+            return False
+    if expected:
+        count = len(snapshot.listings)
+        full_page = FULL_PAGE_LISTINGS
+        if max_listings is not None:
+            full_page = min(full_page, max_listings)
+            expected = min(expected, max_listings)
+        if count < full_page and count < expected * MIN_COUNT_RATIO:
+            print(f"Fast path result for {snapshot.tag} looks truncated: {count} of {expected} listings")
+            return False
+    return True
+
+class FastFetcher:
+    """Async HTTP fetcher with connection pooling and HTTP/2 keep-alive.
+
+    Use as `async with FastFetcher() as fetcher: await fetcher.fetch_match(1)`.
+    """
+
+    def __init__(self, base_url=MARKETPLACE_BASE_URL, max_listings=15, timeout=15.0, max_connections=10):
+        if httpx is None:
+            raise RuntimeError("httpx is not installed - pip install 'httpx[http2]'")
+        self.base_url = base_url.rstrip('/')
+        self.max_listings = max_listings
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def url_for(self, tag):
+        return f"{self.base_url}/marketplace?tags={tag}"
+
+    async def fetch_match(self, match_num, expected=None):
+        """Fetch one tag over HTTP; None if the request or validation fails.
+
+        expected: listing count the tag is known to have (see validate_fast_result)
+        """
+        tag = f"m{match_num}"
+        url = self.url_for(tag)
+
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Fast path failed for {tag}: {e}")
+            return None
+
+        listings = []
+        for text_content in extract_card_texts(response.text, self.max_listings):
+            listing = Listing.from_text(tag, text_content)
+            if listing:
+                listings.append(listing)
+
+        snapshot = MatchSnapshot(
+            tag=tag,
+            url=f"{MARKETPLACE_BASE_URL}/marketplace?tags={tag}",
+            listings=listings,
+            timestamp=datetime.now().isoformat()
+        )
+        return snapshot if validate_fast_result(snapshot, expected, self.max_listings) else None
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Shared listing and match records for the scraper, retry script and website
+- Slotted dataclasses instead of ad-hoc dicts
+- Rarity stored as an IntEnum, prices as integer cents
+- On-disk JSON format is unchanged (see to_dict / from_dict)
+"""
+
+import re
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import lru_cache
+
+PRICE_PATTERN = re.compile(r'US\$[\d,]+\.?\d*')
+INVALID_MARKER = 'NO LONGER VALID'
+
+# The collectible's name sits between the rarity label (or its own line) and
+# "From US$..."; some cards arrive as one line with no separators at all
+COLLECTIBLE_NAME_PATTERN = re.compile(r'(?:Iconic|Epic|Rare)\s*(.+?)\s*From\s*US\$', re.S)
+COLLECTIBLE_LINE_PATTERN = re.compile(r'([^\n]+)\n\s*From\s*US\$')
+
+@lru_cache(maxsize=4096)
+def parse_price_cents(price_str):
+    """Convert a price string like 'US$6,999.00' to integer cents (0 if unparseable)"""
+    if not price_str:
+        return 0
+    # Fast path for the marketplace's own format
+    if price_str.startswith('US$') and price_str[-3:-2] == '.':
+        digits = price_str[3:].replace(',', '').replace('.', '')
+        if digits.isdigit():
+            return int(digits)
+    numeric = re.sub(r'[^\d.]', '', price_str)
+    try:
+        return round(float(numeric) * 100)
+    except ValueError:
+        return 0
+
+def format_price(price_cents):
+    """Format integer cents the way the marketplace does, e.g. 'US$6,999.00'"""
+    return f"US${price_cents / 100:,.2f}"
+
+class Rarity(IntEnum):
+    """Collectible rarity tiers, ordered as they are displayed"""
+    NONE = 0
+    ICONIC = 1
+    EPIC = 2
+    RARE = 3
+
+    @property
+    def label(self):
+        return '' if self is Rarity.NONE else self.name.title()
+
+    @classmethod
+    def from_label(cls, label):
+        return _RARITY_BY_LABEL.get(label, cls.NONE)
+
+    @classmethod
+    def from_text(cls, text):
+        """Detect rarity from listing text (Iconic wins over Rare over Epic)"""
+        for rarity in (cls.ICONIC, cls.RARE, cls.EPIC):
+            if rarity.label in text:
+                return rarity
+        return cls.NONE
+
+_RARITY_BY_LABEL = {rarity.label: rarity for rarity in Rarity}
+
+@dataclass(slots=True)
+class Listing:
+    """One marketplace listing card"""
+    tag: str
+    price_cents: int
+    text: str
+    title: str = ''
+    rarity: Rarity = Rarity.NONE
+
+    @property
+    def price(self):
+        """Price in dollars"""
+        return self.price_cents / 100
+
+    @property
+    def key(self):
+        """Identity of the card for dedup: price plus whitespace-normalised text"""
+        return (self.price_cents, ' '.join(self.text.split()))
+
+    @property
+    def collectible_name(self):
+        """Normalised name of the collectible (upper case, single spaces), '' if not found"""
+        match = COLLECTIBLE_NAME_PATTERN.search(self.text) or COLLECTIBLE_LINE_PATTERN.search(self.text)
+        return ' '.join(match.group(1).split()).upper() if match else ''
+
+    @property
+    def is_valid(self):
+        return INVALID_MARKER not in self.text.upper() and INVALID_MARKER not in self.title.upper()
+
+    @classmethod
+    def from_text(cls, tag, text_content):
+        """Build a listing from a card's innerText.
+
+        Returns None for cards without a price or marked NO LONGER VALID.
+        """
+        price_match = PRICE_PATTERN.search(text_content)
+        if not price_match or INVALID_MARKER in text_content.upper():
+            return None
+
+        # Title is the first meaningful line
+        title = ''
+        for line in text_content.split('\n'):
+            line = line.strip()
+            if line and 'US$' not in line and 'From' not in line and len(line) > 10:
+                title = line
+                break
+
+        return cls(
+            tag=tag,
+            price_cents=parse_price_cents(price_match.group()),
+            text=text_content.strip(),
+            title=title,
+            rarity=Rarity.from_text(text_content),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        # Positional on purpose - this runs for every stored listing
+        get = data.get
+        return cls(
+            get('tag', ''),
+            parse_price_cents(get('price', '')),
+            get('text', ''),
+            get('title', ''),
+            _RARITY_BY_LABEL.get(get('type', ''), Rarity.NONE),
+        )
+
+    def to_dict(self):
+        return {
+            'tag': self.tag,
+            'price': format_price(self.price_cents),
+            'text': self.text,
+            'title': self.title,
+            'type': self.rarity.label,
+        }
+
+@dataclass(slots=True)
+class MatchSnapshot:
+    """Result of scraping one marketplace tag"""
+    tag: str
+    url: str
+    listings: list = field(default_factory=list)
+    timestamp: str = ''
+    success: bool = True
+    error: str = ''
+
+    @property
+    def listings_count(self):
+        return len(self.listings)
+
+    @property
+    def match_num(self):
+        """Match number for m{n} tags, None for other tag families"""
+        return int(self.tag[1:]) if self.tag[:1] == 'm' and self.tag[1:].isdigit() else None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            tag=data.get('tag', ''),
+            url=data.get('url', ''),
+            listings=[Listing.from_dict(l) for l in data.get('listings', [])],
+            timestamp=data.get('timestamp', ''),
+            success=bool(data.get('success')),
+            error=data.get('error', ''),
+        )
+
+    def to_dict(self, include_listings=True):
+        """On-disk form; include_listings=False leaves 'listings' empty for streaming writers"""
+        data = {
+            'tag': self.tag,
+            'url': self.url,
+        }
+        if self.success:
+            data['listings_count'] = self.listings_count
+            data['listings'] = [l.to_dict() for l in self.listings] if include_listings else []
+        else:
+            data['error'] = self.error
+        data['success'] = self.success
+        data['timestamp'] = self.timestamp
+        return data
+
+@dataclass(slots=True)
+class MatchSummary:
+    """One row of the website's match table"""
+    match_num: int
+    date: str
+    venue: str
+    country: str
+    stadium: str
+    stage: str
+    marketplace_url: str
+    detail_url: str
+    lowest_price: float
+    highest_price: float
+    listings_count: int
+    total_listings: int
+    invalid_listings: int
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Streaming scrape -> store -> site pipeline
+- Each scraped tag flows through dedupe -> validate -> store -> aggregate
+- Aggregate state (table row + detail page per match) is updated one match at a time
+- The site is regenerated on a debounce timer, so fresh prices go live within
+  seconds instead of after the full sweep
+
+Usage: python3 pipeline.py [match numbers] [--fast] [--crawl] [--debounce 5]
+"""
+
+import asyncio
+import os
+
+from aggregate import MatchAggregate
+from create_website import write_site
+from data_loader import DATA_DIR, decode_snapshot, read_bytes
+from fifa_scraper import DEFAULT_MAX_LISTINGS, ListingSpool, iter_scraped_matches, quarantine_match_data, save_match_data
+from http_fetcher import MARKETPLACE_BASE_URL
+from quality import QualityReport, check_snapshot
+from tag_discovery import plan_match_numbers
+
+class DebouncedSiteBuilder:
+    """Rebuilds the site once updates go quiet for `delay` seconds.
+
+    A steady stream of updates still triggers a rebuild at least every
+    `max_delay` seconds, so the site never lags far behind the sweep. Each
+    rebuild re-renders the index and only the detail pages of the matches
+    notified since the last one (every page on the first), in its own thread.
+    """
+
+    def __init__(self, aggregate, delay=5.0, max_delay=30.0):
+        self.aggregate = aggregate
+        self.delay = delay
+        self.max_delay = max_delay
+        self.builds = 0
+        self._due = None
+        self._first_pending = None
+        self._task = None
+        self._changed = set()
+        self._lock = asyncio.Lock()
+
+    def notify(self, match_num, rebuild=True):
+        """Record that a match changed in the aggregate.
+
+        rebuild=False only marks its detail page for the next rebuild, without
+        scheduling one (e.g. for a re-scrape that changed nothing but its history).
+        """
+        self._changed.add(match_num)
+        if not rebuild:
+            return
+        now = asyncio.get_running_loop().time()
+        if self._first_pending is None:
+            self._first_pending = now
+        self._due = min(now + self.delay, self._first_pending + self.max_delay)
+        if self._task is None:
+            self._task = asyncio.create_task(self._wait_and_build())
+
+    async def _wait_and_build(self):
+        loop = asyncio.get_running_loop()
+        while loop.time() < self._due:
+            await asyncio.sleep(self._due - loop.time())
+        self._task = None
+        await self.build()
+
+    async def build(self):
+        self._first_pending = None
+        async with self._lock:
+            matches, detail_pages, totals = self.aggregate.site_inputs()
+            if matches:
+                # The first build renders every page, in case the site on disk predates the data
+                changed = self._changed if self.builds else {page['match'].match_num for page in detail_pages}
+                self._changed = set()
+                await asyncio.get_running_loop().run_in_executor(None, write_site, matches, detail_pages, totals, changed)
+                self.builds += 1
+
+    async def flush(self):
+        """Build now if an update is still pending; returns once no build is in flight"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # Takes the lock, so a debounced build already writing the site finishes first
+            await self.build()
+        else:
+            async with self._lock:
+                pass
+
+def validate_snapshot(snapshot, previous=None):
+    """QualityReport for a scraped snapshot against the one it would replace (see quality.check_snapshot)"""
+    if snapshot is None:
+        return QualityReport(problems=["scrape failed"])
+    return check_snapshot(snapshot, previous)
+
+def listing_keys(snapshot):
+    """Order-independent content of a snapshot"""
+    return sorted(listing.key for listing in snapshot.listings)
+
+def dedupe_snapshot(snapshot):
+    """Drop repeated cards within a snapshot (crawl spools are already unique)"""
+    if isinstance(snapshot.listings, list):
+        seen = set()
+        unique = []
+        for listing in snapshot.listings:
+            if listing.key not in seen:
+                seen.add(listing.key)
+                unique.append(listing)
+        snapshot.listings = unique
+    return snapshot
+
+def discard_spool(snapshot):
+    """Remove the spool file of a crawled snapshot that will not be stored"""
+    if snapshot is not None and isinstance(snapshot.listings, ListingSpool):
+        snapshot.listings.discard()
+
+async def run_pipeline(match_numbers, debounce=5.0, max_delay=30.0, **scrape_options):
+    """Scrape match_numbers, streaming each result through to the site"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    aggregate = MatchAggregate()
+    builder = DebouncedSiteBuilder(aggregate, debounce, max_delay)
+    queue = asyncio.Queue(maxsize=8)
+    stats = {'stored': 0, 'unchanged': 0, 'rejected': 0}
+
+    async def produce():
+        try:
+            async for item in iter_scraped_matches(match_numbers, **scrape_options):
+                await queue.put(item)
+        finally:
+            await queue.put(None)
+
+    async def consume():
+        while (item := await queue.get()) is not None:
+            match_num, snapshot = item
+            previous = aggregate.snapshots.get(match_num)
+
+            # validate: the quality checks, against the snapshot it would replace,
+            # on the deduped listings that would be stored
+            if snapshot is not None:
+                snapshot = dedupe_snapshot(snapshot)
+            report = validate_snapshot(snapshot, previous)
+            if not report.ok:
+                print(f"⚠️  Rejected m{match_num}: {'; '.join(report.problems)}, keeping old data")
+                if snapshot is not None:
+                    quarantine_match_data(snapshot, match_num, report)
+                discard_spool(snapshot)
+                stats['rejected'] += 1
+                continue
+
+            # dedupe against the stored snapshot: the same listings are still stored,
+            # so history, sketches and the scrape time stay current, but don't
+            # trigger a rebuild of their own
+            unchanged = previous is not None and previous.success and listing_keys(previous) == listing_keys(snapshot)
+
+            # store
+            if not save_match_data(snapshot, match_num, previous, report):
+                discard_spool(snapshot)
+                stats['rejected'] += 1
+                continue
+            if unchanged:
+                print(f"➖ m{match_num} unchanged")
+            stats['unchanged' if unchanged else 'stored'] += 1
+
+            # aggregate - spooled listings were consumed by the store, so read them back
+            if not isinstance(snapshot.listings, list):
+                snapshot = decode_snapshot(read_bytes(os.path.join(DATA_DIR, f"m{match_num}.json")))
+            aggregate.update(snapshot)
+            builder.notify(match_num, rebuild=not unchanged)
+
+    await asyncio.gather(produce(), consume())
+    await builder.flush()
+
+    print(f"\n📊 PIPELINE SUMMARY:")
+    print(f"✅ Stored: {stats['stored']}")
+    print(f"➖ Unchanged: {stats['unchanged']}")
+    print(f"⚠️  Rejected/failed: {stats['rejected']}")
+    print(f"🌐 Site builds: {builder.builds}")
+    return stats
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape and publish incrementally")
+    parser.add_argument("matches", nargs="*", type=int, help="match numbers to scrape (default: all with listings)")
+    parser.add_argument("--fast", action="store_true", help="fetch over HTTP first, fall back to the browser")
+    parser.add_argument("--base-url", default=MARKETPLACE_BASE_URL, help="marketplace origin (e.g. a local stand-in)")
+    parser.add_argument("--crawl", action="store_true", help="scroll/page through the full result set of each tag")
+    parser.add_argument("--depth", type=int, default=None, help="max listings per tag")
+    parser.add_argument("--debounce", type=float, default=5.0, help="seconds of quiet before the site is rebuilt")
+    parser.add_argument("--max-delay", type=float, default=30.0, help="rebuild at least this often while updates flow")
+    args = parser.parse_args()
+
+    depth = args.depth if args.depth is not None else (None if args.crawl else DEFAULT_MAX_LISTINGS)
+    match_numbers = args.matches or asyncio.run(plan_match_numbers(args.base_url))
+    asyncio.run(run_pipeline(
+        match_numbers,
+        debounce=args.debounce,
+        max_delay=args.max_delay,
+        fast=args.fast,
+        base_url=args.base_url,
+        crawl=args.crawl,
+        max_listings=depth,
+    ))
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks for the scraper and website builds (--profile on each script)
+- cProfile for the whole run, saved as .prof plus a pstats text report
+- Optional sampled stacks in collapsed format (flamegraph.pl, speedscope)
+- Optional asyncio timing: Python CPU per task/callback on the event loop
+  versus time the loop sat idle awaiting I/O (the Playwright driver, network, sleeps)
+- Reports go to profiles/, with the top hot spots printed at exit
+
+Usage:
+    with RunProfiler("create_website", flamegraph=True):
+        create_website()
+"""
+
+import asyncio
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+PROFILE_DIR = "profiles"
+
+# Hot spots printed at exit
+TOP_HOTSPOTS = 15
+
+# Stack sampling interval for --flamegraph
+SAMPLE_INTERVAL = 0.005
+
+def add_profile_arguments(parser):
+    """Add --profile / --flamegraph to a script's argparse parser"""
+    parser.add_argument("--profile", action="store_true",
+                        help=f"profile the run; reports are written to {PROFILE_DIR}/")
+    parser.add_argument("--flamegraph", action="store_true",
+                        help="with --profile, also sample stacks in collapsed (flamegraph) format")
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _handle_label(handle):
+    """Task coroutine name, or the callback's qualified name, for an event loop handle"""
+    callback = handle._callback
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        code = getattr(coro, 'cr_code', None)
+        origin = 'playwright ' if code and f"{os.sep}playwright{os.sep}" in code.co_filename else ''
+        return f"{origin}task {getattr(coro, '__qualname__', owner.get_name())}"
+    module = getattr(callback, '__module__', None) or type(owner).__module__
+    name = getattr(callback, '__qualname__', type(callback).__name__)
+    return f"callback {module}.{name}" if module else f"callback {name}"
+
+class AsyncioTimer:
+    """Times every event loop callback (each task step is one) while installed.
+
+    Loop time not spent in callbacks is time the loop was waiting on I/O.
+    """
+
+    def __init__(self):
+        self.busy = defaultdict(float)
+        self.steps = Counter()
+        self._original_run = None
+
+    def install(self):
+        self._original_run = original_run = asyncio.events.Handle._run
+        busy, steps = self.busy, self.steps
+        clock = time.perf_counter
+
+        def timed_run(handle):
+            # Labelled up front: a finished coroutine no longer knows where it came from
+            label = _handle_label(handle)
+            start = clock()
+            try:
+                return original_run(handle)
+            finally:
+                busy[label] += clock() - start
+                steps[label] += 1
+
+        asyncio.events.Handle._run = timed_run
+
+    def uninstall(self):
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def report_lines(self, wall):
+        total_busy = sum(self.busy.values())
+        lines = [
+            f"event loop: {wall:.2f}s wall, {total_busy:.2f}s running Python callbacks, "
+            f"{max(wall - total_busy, 0):.2f}s idle awaiting I/O (Playwright driver, network, sleeps)",
+        ]
+        playwright_busy = sum(t for label, t in self.busy.items() if 'playwright' in label)
+        if playwright_busy:
+            lines.append(f"  of the callback time, {playwright_busy:.2f}s was Playwright's own protocol handling")
+        for label, seconds in sorted(self.busy.items(), key=lambda item: -item[1])[:TOP_HOTSPOTS]:
+            lines.append(f"  {seconds:8.3f}s  {self.steps[label]:7d} steps  {label}")
+        return lines
+
+class RunProfiler:
+    """Context manager that profiles a run and reports to PROFILE_DIR"""
+
+    def __init__(self, name, flamegraph=False, asyncio_timing=False, out_dir=PROFILE_DIR):
+        self.name = name
+        self.flamegraph = flamegraph
+        self.out_dir = out_dir
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident()) if flamegraph else None
+        self.timer = AsyncioTimer() if asyncio_timing else None
+        self._start = None
+
+    def __enter__(self):
+        if self.timer:
+            self.timer.install()
+        if self.sampler:
+            self.sampler.start()
+        self._start = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        wall = time.perf_counter() - self._start
+        if self.sampler:
+            self.sampler.stop()
+        if self.timer:
+            self.timer.uninstall()
+        self.report(wall)
+        return False
+
+    def report(self, wall):
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.name}-{datetime.now():%Y%m%d-%H%M%S}")
+
+        self.profile.dump_stats(f"{base}.prof")
+        with open(f"{base}.txt", 'w') as f:
+            stats = pstats.Stats(self.profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(60)
+            stats.sort_stats('tottime').print_stats(60)
+        written = [f"{base}.prof", f"{base}.txt"]
+
+        if self.sampler:
+            self.sampler.write_collapsed(f"{base}.collapsed")
+            written.append(f"{base}.collapsed")
+
+        summary = [f"🔬 Profile of {self.name}: {wall:.2f}s wall", "top hot spots (own time):"]
+        stats = pstats.Stats(self.profile)
+        entries = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:TOP_HOTSPOTS]
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in entries:
+            location = f"{os.path.basename(filename)}:{line}" if line else filename
+            summary.append(f"  {tottime:8.3f}s own {cumtime:8.3f}s cum {calls:9d} calls  {func} ({location})")
+        if self.timer:
+            timer_lines = self.timer.report_lines(wall)
+            summary.extend(timer_lines)
+            with open(f"{base}.asyncio.txt", 'w') as f:
+                f.write("\n".join(timer_lines) + "\n")
+            written.append(f"{base}.asyncio.txt")
+        summary.append("reports: " + ", ".join(written))
+
+        with open(f"{base}.summary.txt", 'w') as f:
+            f.write("\n".join(summary) + "\n")
+        print("\n" + "\n".join(summary))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Publish the generated website as minified, fingerprinted, precompressed files
+- Inline <style>/<script> blocks become content-hashed files under assets/,
+  shared by every page and cacheable forever
+- HTML is minified (template indentation between tags is dropped)
+- Every text file gets .gz (and .br, if brotli is installed) siblings for
+  static hosts that serve precompressed files
+- Files are only rewritten when their bytes change
+
+Repeat visitors then only re-download the HTML itself, which carries the data.
+
+Usage: python3 create_website.py && python3 publish.py [--out public]
+"""
+
+import gzip
+import hashlib
+import os
+import re
+
+from analytics import ANALYTICS_DIR
+from create_website import DETAIL_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PUBLISH_DIR = "public"
+ASSET_DIR = "assets"
+
+# Pages written by create_website, relative to the source directory
+SITE_PAGES = ["index.html", "fifa_world_cup_2026_marketplace.html"]
+
+# Files smaller than this are served as-is
+COMPRESS_MIN_BYTES = 256
+
+# Cache rules for hosts that read a _headers file (Netlify, Cloudflare Pages)
+HEADERS_FILE = f"""/{ASSET_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+/*
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+
+STYLE_BLOCK = re.compile(r'<style>(.*?)</style>', re.S)
+SCRIPT_BLOCK = re.compile(r'<script>(.*?)</script>', re.S)
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """Conservative: drop comment-only lines, indentation and blank lines, keep line breaks"""
+    lines = []
+    for line in js.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+def minify_html(page_html):
+    """Drop whitespace between tags that contains a line break (template indentation).
+
+    Single spaces between inline elements and whitespace inside text (the
+    pre-line listing text on detail pages) are left alone.
+    """
+    page_html = re.sub(r'>[ \t]*\n\s*<', '><', page_html)
+    return page_html.strip() + '\n'
+
+def asset_name(stem, suffix, content):
+    """Named by content alone, so pages with identical CSS/JS share one file"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{ASSET_DIR}/{stem}.{digest}.{suffix}"
+
+class Publisher:
+    """Turns the generated pages into the published tree under out_dir"""
+
+    def __init__(self, out_dir=PUBLISH_DIR):
+        self.out_dir = out_dir
+        self.assets = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def _asset(self, stem, suffix, text):
+        content = text.encode('utf-8')
+        name = asset_name(stem, suffix, content)
+        self.assets[name] = content
+        return name
+
+    def publish_page(self, page_path, page_html):
+        """Externalise, minify and write one page; page_path is relative to the site root"""
+        depth = page_path.count('/')
+        prefix = '../' * depth
+
+        def extract_style(match):
+            name = self._asset('style', 'css', minify_css(match.group(1)))
+            return f'<link rel="stylesheet" href="{prefix}{name}">'
+
+        def extract_script(match):
+            name = self._asset('script', 'js', minify_js(match.group(1)))
+            return f'<script src="{prefix}{name}"></script>'
+
+        page_html = STYLE_BLOCK.sub(extract_style, page_html)
+        page_html = SCRIPT_BLOCK.sub(extract_script, page_html)
+        self.write(page_path, minify_html(page_html).encode('utf-8'))
+
+    def write(self, rel_path, content):
+        """Write a file and its compressed siblings, skipping unchanged ones"""
+        path = os.path.join(self.out_dir, rel_path)
+        variants = [(path, content)]
+        if len(content) >= COMPRESS_MIN_BYTES and not rel_path.startswith('_'):
+            variants.append((f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0)))
+            if brotli is not None:
+                variants.append((f"{path}.br", brotli.compress(content, quality=11)))
+
+        for variant_path, variant in variants:
+            try:
+                with open(variant_path, 'rb') as f:
+                    if f.read() == variant:
+                        self.unchanged += 1
+                        continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+            with open(f"{variant_path}.tmp", 'wb') as f:
+                f.write(variant)
+            os.replace(f"{variant_path}.tmp", variant_path)
+            self.written += 1
+
+    def finish(self):
+        """Write the collected assets and drop ones no page references any more"""
+        for name, content in self.assets.items():
+            self.write(name, content)
+        self.write('_headers', HEADERS_FILE.encode('utf-8'))
+
+        asset_dir = os.path.join(self.out_dir, ASSET_DIR)
+        removed = 0
+        live = {os.path.basename(name) for name in self.assets}
+        try:
+            filenames = os.listdir(asset_dir)
+        except FileNotFoundError:
+            # No page had inline styles or scripts, so no asset was ever written
+            filenames = []
+        for filename in filenames:
+            if filename.split('.gz')[0].split('.br')[0] not in live:
+                os.remove(os.path.join(asset_dir, filename))
+                removed += 1
+        return removed
+
+def site_files(source_dir='.', suffix='.html'):
+    """Relative paths of every generated file with the given suffix"""
+    files = [page for page in SITE_PAGES if page.endswith(suffix) and os.path.exists(os.path.join(source_dir, page))]
+    for directory in (DETAIL_DIR, ANALYTICS_DIR):
+        for root, _, filenames in os.walk(os.path.join(source_dir, directory)):
+            for filename in filenames:
+                if filename.endswith(suffix):
+                    files.append(os.path.relpath(os.path.join(root, filename), source_dir).replace(os.sep, '/'))
+    return sorted(files)
+
+def publish(source_dir='.', out_dir=PUBLISH_DIR):
+    publisher = Publisher(out_dir)
+    raw_bytes = 0
+    for page in site_files(source_dir):
+        with open(os.path.join(source_dir, page), encoding='utf-8') as f:
+            page_html = f.read()
+        raw_bytes += len(page_html.encode('utf-8'))
+        publisher.publish_page(page, page_html)
+    # Data exports are published as they are
+    for export in site_files(source_dir, '.csv'):
+        with open(os.path.join(source_dir, export), 'rb') as f:
+            publisher.write(export, f.read())
+    removed = publisher.finish()
+
+    index_path = os.path.join(out_dir, 'index.html')
+    print(f"📦 Published to {out_dir}/: {publisher.written} files written, {publisher.unchanged} unchanged, "
+          f"{removed} stale assets removed")
+    for name in sorted(publisher.assets):
+        print(f"   {name} ({len(publisher.assets[name]):,} bytes)")
+    if os.path.exists(index_path):
+        sizes = [f"{os.path.getsize(index_path):,} bytes"]
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(index_path + suffix):
+                sizes.append(f"{suffix[1:]} {os.path.getsize(index_path + suffix):,}")
+        print(f"   index.html: {', '.join(sizes)} (pages were {raw_bytes:,} bytes in total before)")
+    if brotli is None:
+        print("   brotli not installed - only .gz siblings written (pip install brotli)")
+    return publisher
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Minify, fingerprint and precompress the generated site")
+    parser.add_argument("--source", default=".", help="directory create_website.py wrote to")
+    parser.add_argument("--out", default=PUBLISH_DIR, help="directory to publish into")
+    args = parser.parse_args()
+    publish(args.source, args.out)
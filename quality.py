@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Data-quality checks run on every scraped snapshot before it is committed
+- Schema: tag, prices and rarities of each listing
+- Price sanity: prices outside a plausible range
+- Listing-count drops against the previous snapshot (partial grids, cookie walls)
+- Robust z-score outliers on price per match/rarity (e.g. carousel prices)
+
+Listings are streamed through a KLL price sketch per rarity group (exact for
+grid-sized groups) and scored in a second pass, so the checks are cheap enough
+to run inline on every save and stay in bounded memory for crawled snapshots.
+
+Usage: python3 quality.py    # audit the stored snapshots against their history
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from models import Rarity, format_price
+from sketches import KLLSketch
+
+# Plausible price range for a Right-to-Buy collectible
+MIN_PRICE_CENTS = 100            # US$1.00
+MAX_PRICE_CENTS = 50_000_000     # US$500,000.00
+
+# Quarantine when the listing count falls below this share of the previous snapshot...
+MIN_COUNT_RATIO = 0.5
+# ...unless the new snapshot still fills the first grid page (a shallower sweep, not a broken page)
+FULL_PAGE_LISTINGS = 15
+
+# Robust z-score (on log price) beyond which a listing is an outlier
+OUTLIER_Z = 3.5
+# Rarity groups smaller than this have no meaningful spread
+MIN_GROUP_SIZE = 5
+# Quarantine when more than this share of listings are outliers
+MAX_OUTLIER_SHARE = 0.3
+
+# Scales the MAD to a standard deviation for normally distributed data
+MAD_SCALE = 0.6745
+# Floor for the MAD of log prices: many identical asks would otherwise make
+# every other price an outlier. With the floor, only prices ~2.8x away from
+# the group median score beyond OUTLIER_Z.
+MIN_LOG_MAD = 0.2
+
+@dataclass(slots=True)
+class QualityReport:
+    """Outcome of checking one snapshot"""
+    problems: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    outliers: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        """True if the snapshot may be committed"""
+        return not self.problems
+
+def weighted_median(pairs):
+    """Median of (value, weight) pairs sorted by value.
+
+    With unit weights this is statistics.median: the mean of the two middle
+    values when the total is even.
+    """
+    total = sum(weight for _, weight in pairs)
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    seen = 0
+    lower = None
+    for value, weight in pairs:
+        seen += weight
+        if lower is None and seen > lower_rank:
+            lower = value
+        if seen > upper_rank:
+            return (lower + value) / 2
+    return lower
+
+class LogPriceSpread:
+    """Median and MAD of one rarity group's log prices, from a KLL sketch of its prices.
+
+    Built in a single pass in bounded memory; groups smaller than the
+    sketch's K (every real grid page) get the exact median and MAD.
+    """
+
+    __slots__ = ('sketch',)
+
+    def __init__(self):
+        self.sketch = KLLSketch()
+
+    def add(self, price_cents):
+        self.sketch.update(price_cents)
+
+    @property
+    def count(self):
+        return self.sketch.n
+
+    def center(self):
+        """(median, MAD floored at MIN_LOG_MAD), or None if the group is too small to have a meaningful spread"""
+        if self.count < MIN_GROUP_SIZE:
+            return None
+        logs = [(math.log(price), weight) for price, weight in self.sketch.weighted_items()]
+        median = weighted_median(logs)
+        mad = weighted_median(sorted((abs(value - median), weight) for value, weight in logs))
+        return median, max(mad, MIN_LOG_MAD)
+
+def spreads_by_rarity(listings):
+    """{rarity: LogPriceSpread} over the priced listings, in one pass"""
+    spreads = defaultdict(LogPriceSpread)
+    for listing in listings:
+        if listing.price_cents > 0:
+            spreads[listing.rarity].add(listing.price_cents)
+    return spreads
+
+def robust_z_score(price_cents, center):
+    """Robust z-score of a price's log against a group's (median, MAD)"""
+    median, mad = center
+    return MAD_SCALE * (math.log(price_cents) - median) / mad
+
+def score_outliers(listings, spreads, baselines=None):
+    """Listings whose price is an outlier within their match/rarity group.
+
+    Each rarity group is scored against the previous snapshot's prices of that
+    rarity (baselines) when there are enough of them, so a page full of foreign
+    prices cannot mask itself; otherwise against the group itself (spreads).
+    Listings are read once more here, one at a time.
+    """
+    baselines = baselines or {}
+    centers = {}
+    for rarity, spread in spreads.items():
+        baseline = baselines.get(rarity)
+        centers[rarity] = (baseline if baseline and baseline.count >= MIN_GROUP_SIZE else spread).center()
+
+    outliers = []
+    for listing in listings:
+        center = centers.get(listing.rarity) if listing.price_cents > 0 else None
+        if center is not None:
+            z = robust_z_score(listing.price_cents, center)
+            if abs(z) > OUTLIER_Z:
+                outliers.append((listing, z))
+    return outliers
+
+def find_outliers(listings, previous_listings=()):
+    """Outliers among listings, scored against previous_listings where possible (see score_outliers)"""
+    return score_outliers(listings, spreads_by_rarity(listings), spreads_by_rarity(previous_listings))
+
+def check_snapshot(snapshot, previous=None):
+    """Check a scraped snapshot against the schema and the previous snapshot.
+
+    Listings are streamed, never collected: one pass for the schema and the
+    per-rarity spreads, one more for the outliers, so a crawled snapshot's
+    spool is read back from disk without being held in memory.
+    """
+    report = QualityReport()
+
+    # Schema
+    if snapshot.match_num is None:
+        report.problems.append(f"unexpected tag {snapshot.tag!r}")
+    if not snapshot.success or snapshot.listings_count == 0:
+        report.problems.append("no listings")
+        return report
+
+    count = 0
+    spreads = defaultdict(LogPriceSpread)
+    for listing in snapshot.listings:
+        if listing.tag != snapshot.tag:
+            report.problems.append(f"listing tagged {listing.tag!r}")
+        elif not isinstance(listing.rarity, Rarity):
+            report.problems.append(f"unknown rarity {listing.rarity!r}")
+        elif not MIN_PRICE_CENTS <= listing.price_cents <= MAX_PRICE_CENTS:
+            report.problems.append(f"implausible price {format_price(listing.price_cents)}")
+        else:
+            count += 1
+            spreads[listing.rarity].add(listing.price_cents)
+            continue
+        break
+
+    if report.problems:
+        return report
+
+    # Listing-count drop
+    has_previous = previous is not None and previous.success and previous.listings_count > 0
+    if has_previous:
+        previous_count = previous.listings_count
+        if count < FULL_PAGE_LISTINGS and count < previous_count * MIN_COUNT_RATIO:
+            report.problems.append(f"listing count dropped from {previous_count} to {count}")
+
+    # Price outliers
+    baselines = spreads_by_rarity(previous.listings) if has_previous else None
+    report.outliers = score_outliers(snapshot.listings, spreads, baselines)
+    if report.outliers:
+        share = len(report.outliers) / count
+        message = f"{len(report.outliers)} of {count} prices are outliers for their rarity"
+        if share > MAX_OUTLIER_SHARE:
+            report.problems.append(message)
+        else:
+            report.warnings.append(message)
+
+    return report
+
+def audit(data_dir):
+    """Check every stored snapshot against the one before it in its history"""
+    from data_loader import load_histories, load_snapshots
+
+    snapshots = load_snapshots(data_dir)
+    histories = load_histories(data_dir, snapshots)
+    flagged = 0
+    for match_num, snapshot in sorted(snapshots.items()):
+        history = [h for h in histories.get(match_num, []) if h.timestamp < snapshot.timestamp]
+        previous = max(history, key=lambda h: h.timestamp) if history else None
+        report = check_snapshot(snapshot, previous)
+        for message in report.problems:
+            print(f"🚧 m{match_num}: {message}")
+        for message in report.warnings:
+            print(f"⚠️  m{match_num}: {message}")
+        for listing, z in report.outliers:
+            label = listing.rarity.label or 'no rarity'
+            print(f"     {format_price(listing.price_cents)} ({label}, z={z:+.1f}) {listing.title}")
+        flagged += not report.ok
+    print(f"\n📊 {len(snapshots)} snapshots checked, {flagged} would be quarantined")
+    return flagged
+
+if __name__ == "__main__":
+    import argparse
+
+    from data_loader import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Audit stored snapshots with the pre-commit quality checks")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+    audit(args.data_dir)
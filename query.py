@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Query the stored marketplace data
+- Snapshots and listings are indexed in SQLite (fifa_marketplace_data/index.sqlite)
+- The index is refreshed incrementally before each query: only changed mN.json
+  files are re-read, and history files are read from where the last refresh stopped
+- Filters by tags, stage, venue, country, rarity, price and time window
+
+Usage:
+  python3 query.py listings --stage knockout --rarity Iconic --limit 5
+  python3 query.py listings --tags m1-m24 --venue Dallas --max-price 500 --format csv
+  python3 query.py changes --since 7d --country USA      # which matches got cheaper
+  python3 query.py changes --since 7d --by venue         # which venues got cheaper
+"""
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+from coordinator import parse_tag_spec
+from data_loader import DATA_DIR, decode_json, decode_jsonl, match_files
+from models import MatchSnapshot, Rarity, format_price, parse_price_cents
+from schedule import get_schedule
+
+INDEX_FILE = "index.sqlite"
+# Bumped when what gets indexed changes; an older index is dropped and rebuilt
+INDEX_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_num INTEGER PRIMARY KEY,
+    date TEXT,
+    stage TEXT,
+    knockout INTEGER,
+    venue TEXT,
+    country TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    match_num INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    listings_count INTEGER NOT NULL,
+    lowest_cents INTEGER,
+    current INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (match_num, ts)
+);
+CREATE TABLE IF NOT EXISTS listings (
+    snapshot_id INTEGER NOT NULL,
+    match_num INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    current INTEGER NOT NULL,
+    price_cents INTEGER NOT NULL,
+    rarity INTEGER NOT NULL,
+    title TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_current ON snapshots (current, match_num);
+CREATE INDEX IF NOT EXISTS listings_current_rarity_price ON listings (current, rarity, price_cents);
+CREATE INDEX IF NOT EXISTS listings_current_price ON listings (current, price_cents);
+CREATE INDEX IF NOT EXISTS listings_current_match ON listings (current, match_num, rarity, price_cents);
+CREATE INDEX IF NOT EXISTS listings_ts ON listings (ts, price_cents);
+CREATE INDEX IF NOT EXISTS listings_match_ts ON listings (match_num, ts);
+CREATE INDEX IF NOT EXISTS listings_snapshot ON listings (snapshot_id, rarity, price_cents);
+"""
+
+LISTING_SORTS = {
+    'price': 'l.price_cents',
+    'match': 'l.match_num',
+    'time': 'l.ts',
+    'rarity': 'l.rarity',
+    'venue': 'm.venue',
+}
+CHANGE_SORTS = {
+    'change': 'change_cents',
+    'match': 'match_num',
+    'venue': 'venue',
+    'price': 'floor_cents',
+}
+VENUE_CHANGE_SORTS = {
+    'change': 'change_cents',
+    'venue': 'venue',
+    'matches': 'matches',
+    'price': 'floor_cents',
+}
+
+class MarketIndex:
+    """SQLite index over the snapshot files of a data directory"""
+
+    def __init__(self, data_dir=DATA_DIR, path=None):
+        self.data_dir = data_dir
+        self.path = path or os.path.join(data_dir, INDEX_FILE)
+        self.db = sqlite3.connect(self.path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self._drop()
+        self.db.executescript(SCHEMA)
+
+    def _drop(self):
+        tables = [row[0] for row in self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        with self.db:
+            for table in tables:
+                self.db.execute(f"DROP TABLE {table}")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self):
+        """Bring the index up to date with the data directory; returns snapshots added"""
+        added = 0
+        with self.db:
+            if not self.db.execute("SELECT 1 FROM matches LIMIT 1").fetchone():
+                self._index_schedule()
+            history_dir = os.path.join(self.data_dir, "history")
+            for match_num, path in sorted(match_files(self.data_dir).items()):
+                added += self._index_history(match_num, os.path.join(history_dir, f"m{match_num}.jsonl"))
+                added += self._index_current(match_num, path)
+            if added:
+                # Keep the planner's statistics current so it picks the right index
+                self.db.execute("PRAGMA optimize")
+        return added
+
+    def _index_schedule(self):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)",
+            [(info.match_num, info.date, info.stage, info.knockout, info.venue, info.country)
+             for info in get_schedule().matches.values()],
+        )
+
+    def _source_state(self, path):
+        """(stat, stored (size, mtime_ns, offset)) or (None, ...) if the file is missing"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        row = self.db.execute("SELECT size, mtime_ns, offset FROM sources WHERE path = ?", (path,)).fetchone()
+        return stat, row
+
+    def _record_source(self, path, stat, offset):
+        self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                        (path, stat.st_size, stat.st_mtime_ns, offset))
+
+    def _index_current(self, match_num, path):
+        stat, row = self._source_state(path)
+        if stat is None or (row and row[:2] == (stat.st_size, stat.st_mtime_ns)):
+            return 0
+        with open(path, 'rb') as f:
+            snapshot = MatchSnapshot.from_dict(decode_json(f.read()))
+        added, snapshot_id = self._add_snapshot(match_num, snapshot)
+        self.db.execute("UPDATE snapshots SET current = 0 WHERE match_num = ? AND current = 1", (match_num,))
+        self.db.execute("UPDATE listings SET current = 0 WHERE match_num = ? AND current = 1", (match_num,))
+        self.db.execute("UPDATE snapshots SET current = 1 WHERE id = ?", (snapshot_id,))
+        self.db.execute("UPDATE listings SET current = 1 WHERE snapshot_id = ?", (snapshot_id,))
+        self._record_source(path, stat, stat.st_size)
+        return added
+
+    def _index_history(self, match_num, path):
+        stat, row = self._source_state(path)
+        if stat is None:
+            return 0
+        offset = row[2] if row else 0
+        if stat.st_size < offset:
+            # Rewritten rather than appended to - start over (snapshots are unique)
+            offset = 0
+        if stat.st_size == offset:
+            return 0
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+        # Only whole lines; a line still being written is picked up next time
+        complete = raw[:raw.rfind(b'\n') + 1]
+        added = 0
+        for record in decode_jsonl(complete):
+            added += self._add_snapshot(match_num, MatchSnapshot.from_dict(record))[0]
+        self._record_source(path, stat, offset + len(complete))
+        return added
+
+    def _add_snapshot(self, match_num, snapshot):
+        """Insert a snapshot and its listings unless already indexed; (added, id)
+
+        Only valid, priced listings are indexed (as in sketches.MatchSketches).
+        """
+        listings = [listing for listing in snapshot.listings if listing.is_valid and listing.price_cents > 0]
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO snapshots (match_num, ts, listings_count, lowest_cents) VALUES (?, ?, ?, ?)",
+            (match_num, snapshot.timestamp, len(listings),
+             min((listing.price_cents for listing in listings), default=None)),
+        )
+        if not cursor.rowcount:
+            row = self.db.execute("SELECT id FROM snapshots WHERE match_num = ? AND ts = ?",
+                                  (match_num, snapshot.timestamp)).fetchone()
+            return 0, row[0]
+
+        snapshot_id = cursor.lastrowid
+        self.db.executemany(
+            "INSERT INTO listings VALUES (?, ?, ?, 0, ?, ?, ?)",
+            [(snapshot_id, match_num, snapshot.timestamp, listing.price_cents, int(listing.rarity), listing.title)
+             for listing in listings],
+        )
+        return 1, snapshot_id
+
+    def match_numbers(self, filters):
+        """Match numbers passing the tag/stage/venue/country filters (None: no such filter)"""
+        where, params = ["1 = 1"], []
+        if filters.get('match_numbers'):
+            numbers = sorted(filters['match_numbers'])
+            where.append(f"match_num IN ({', '.join('?' * len(numbers))})")
+            params.extend(numbers)
+        if filters.get('stages'):
+            where.append(f"stage IN ({', '.join('?' * len(filters['stages']))})")
+            params.extend(filters['stages'])
+        if filters.get('venue'):
+            where.append("venue = ?")
+            params.append(filters['venue'])
+        if filters.get('country'):
+            where.append("country = ? COLLATE NOCASE")
+            params.append(filters['country'])
+        if len(where) == 1:
+            return None
+        sql = f"SELECT match_num FROM matches WHERE {' AND '.join(where)} ORDER BY match_num"
+        return [row[0] for row in self.db.execute(sql, params)]
+
+    def _match_condition(self, filters, column):
+        """WHERE clause restricting column to the matches selected by filters.
+
+        Resolved against the small matches table first, so the listing
+        indexes see a plain IN list rather than a join.
+        """
+        numbers = self.match_numbers(filters)
+        if numbers is None:
+            return ["1 = 1"], []
+        return [f"{column} IN ({', '.join(map(str, numbers)) or 'NULL'})"], []
+
+    def listings(self, filters, sort='price', limit=None):
+        """Listing rows matching filters (current snapshots unless a time window is set)"""
+        where, params = self._match_condition(filters, "l.match_num")
+        if filters.get('since') or filters.get('until'):
+            if filters.get('since'):
+                where.append("l.ts >= ?")
+                params.append(filters['since'])
+            if filters.get('until'):
+                where.append("l.ts < ?")
+                params.append(filters['until'])
+        else:
+            where.append("l.current = 1")
+        if filters.get('rarity') is not None:
+            where.append("l.rarity = ?")
+            params.append(int(filters['rarity']))
+        if filters.get('min_price') is not None:
+            where.append("l.price_cents >= ?")
+            params.append(filters['min_price'])
+        if filters.get('max_price') is not None:
+            where.append("l.price_cents <= ?")
+            params.append(filters['max_price'])
+
+        sql = f"""
+            SELECT l.match_num, m.date, m.stage, m.venue, m.country, l.rarity, l.price_cents, l.title, l.ts
+            FROM listings l JOIN matches m ON m.match_num = l.match_num
+            WHERE {' AND '.join(where)}
+            ORDER BY {_order_by(sort, LISTING_SORTS)}, l.price_cents, l.match_num
+        """
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [
+            {
+                'match': match_num, 'date': date, 'stage': stage, 'venue': venue, 'country': country,
+                'rarity': Rarity(rarity).label, 'price': format_price(price_cents), 'title': title, 'scraped_at': ts,
+            }
+            for match_num, date, stage, venue, country, rarity, price_cents, title, ts in self.db.execute(sql, params)
+        ]
+
+    def changes(self, filters, sort='change', limit=None, by='match'):
+        """Floor price at the start of the window vs now (optionally for one rarity).
+
+        by='match' gives one row per match; by='venue' one row per venue, whose
+        floor is the lowest over its matches at each end of the window.
+        """
+        if by not in ('match', 'venue'):
+            raise ValueError(f"unknown grouping {by!r} (choose from match, venue)")
+        where, params = self._match_condition(filters, "m.match_num")
+        if filters.get('rarity') is not None:
+            floor = "(SELECT MIN(price_cents) FROM listings WHERE snapshot_id = {}.id AND rarity = ?)"
+            rarity_params = [int(filters['rarity'])]
+        else:
+            floor = "{}.lowest_cents"
+            rarity_params = []
+        window, window_params = ["match_num = m.match_num"], []
+        if filters.get('since'):
+            window.append("ts >= ?")
+            window_params.append(filters['since'])
+        if filters.get('until'):
+            window.append("ts < ?")
+            window_params.append(filters['until'])
+        sql = f"""
+            SELECT * FROM (
+                SELECT m.match_num, m.date, m.stage, m.venue, m.country,
+                       {floor.format('start')} AS start_cents,
+                       {floor.format('cur')} AS floor_cents,
+                       start.ts AS start_ts, cur.ts AS current_ts
+                FROM matches m
+                JOIN snapshots cur ON cur.match_num = m.match_num AND cur.current = 1
+                JOIN snapshots start ON start.id = (
+                    SELECT id FROM snapshots
+                    WHERE {' AND '.join(window)}
+                    ORDER BY ts LIMIT 1
+                )
+                WHERE {' AND '.join(where)}
+            )
+            WHERE start_cents IS NOT NULL AND floor_cents IS NOT NULL
+        """
+        params = rarity_params * 2 + window_params + params
+        limit_sql = f'LIMIT {int(limit)}' if limit else ''
+        if by == 'venue':
+            rows = self.db.execute(f"""
+                SELECT venue, country, COUNT(*) AS matches,
+                       MIN(start_cents) AS start_cents, MIN(floor_cents) AS floor_cents,
+                       MIN(start_ts) AS start_ts, MIN(floor_cents) - MIN(start_cents) AS change_cents
+                FROM ({sql})
+                GROUP BY venue, country
+                ORDER BY {_order_by(sort, VENUE_CHANGE_SORTS)}, venue
+                {limit_sql}
+            """, params).fetchall()
+            return [
+                {
+                    'venue': venue, 'country': country, 'matches': matches,
+                    'from': format_price(start_cents), 'to': format_price(floor_cents),
+                    'change': ('-' if change_cents < 0 else '+') + format_price(abs(change_cents)),
+                    'since': start_ts,
+                }
+                for venue, country, matches, start_cents, floor_cents, start_ts, change_cents in rows
+            ]
+
+        rows = self.db.execute(f"""
+            SELECT *, floor_cents - start_cents AS change_cents FROM ({sql})
+            ORDER BY {_order_by(sort, CHANGE_SORTS)}, match_num
+            {limit_sql}
+        """, params).fetchall()
+
+        return [
+            {
+                'match': match_num, 'date': date, 'stage': stage, 'venue': venue, 'country': country,
+                'from': format_price(start_cents), 'to': format_price(floor_cents),
+                'change': ('-' if change_cents < 0 else '+') + format_price(abs(change_cents)),
+                'since': start_ts,
+            }
+            for (match_num, date, stage, venue, country, start_cents, floor_cents,
+                 start_ts, current_ts, change_cents) in rows
+        ]
+
+def _order_by(sort, columns):
+    descending = sort.startswith('-')
+    column = columns.get(sort.lstrip('-'))
+    if column is None:
+        raise ValueError(f"unknown sort {sort!r} (choose from {', '.join(columns)})")
+    return f"{column} {'DESC' if descending else 'ASC'}"
+
+def parse_time(value, now=None):
+    """ISO date/time, or a relative window like '7d' / '12h' back from now"""
+    if not value:
+        return None
+    relative = re.fullmatch(r'(\d+)([dhm])', value)
+    if relative:
+        amount, unit = int(relative.group(1)), relative.group(2)
+        delta = {'d': timedelta(days=amount), 'h': timedelta(hours=amount), 'm': timedelta(minutes=amount)}[unit]
+        return ((now or datetime.now()) - delta).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+def resolve_stages(value):
+    """Stage names for a stage filter ('knockout', 'group' or a stage name)"""
+    schedule = get_schedule()
+    if value.lower() == 'knockout':
+        return sorted(schedule.knockout_stages)
+    if value.lower() == 'group':
+        return [stage for stage in schedule.stages if stage not in schedule.knockout_stages]
+    for stage in schedule.stages:
+        if stage.lower() == value.lower():
+            return [stage]
+    raise ValueError(f"unknown stage {value!r}")
+
+def build_filters(args):
+    filters = {
+        'since': parse_time(args.since),
+        'until': parse_time(args.until),
+        'country': args.country,
+        'min_price': parse_price_cents(args.min_price) if args.min_price else None,
+        'max_price': parse_price_cents(args.max_price) if args.max_price else None,
+    }
+    if args.tags:
+        filters['match_numbers'] = [int(tag[1:]) for tag in parse_tag_spec(args.tags) if tag[1:].isdigit()]
+    if args.stage:
+        filters['stages'] = resolve_stages(args.stage)
+    if args.venue:
+        schedule = get_schedule()
+        filters['venue'] = schedule.canonical_venue(args.venue)
+        if filters['venue'] not in schedule.venues:
+            raise ValueError(f"unknown venue {args.venue!r}")
+    if args.rarity:
+        filters['rarity'] = Rarity.from_label(args.rarity.title())
+        if filters['rarity'] is Rarity.NONE and args.rarity.lower() != 'none':
+            raise ValueError(f"unknown rarity {args.rarity!r}")
+    return filters
+
+def write_rows(rows, output_format, out=sys.stdout):
+    if output_format == 'json':
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+        return
+    if not rows:
+        if output_format == 'table':
+            out.write("(no results)\n")
+        return
+    columns = list(rows[0])
+    if output_format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+
+    widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+    out.write("  ".join(c.upper().ljust(widths[c]) for c in columns).rstrip() + "\n")
+    for row in rows:
+        out.write("  ".join(str(row[c]).ljust(widths[c]) for c in columns).rstrip() + "\n")
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Query stored marketplace listings")
+    parser.add_argument("command", choices=["listings", "changes"],
+                        help="listings: matching listings; changes: floor price now vs the start of the window")
+    parser.add_argument("--tags", help="tag ranges, e.g. m1-m24,m104")
+    parser.add_argument("--stage", help="stage name, 'group' or 'knockout'")
+    parser.add_argument("--venue", help="host city (aliases like 'Arlington' work)")
+    parser.add_argument("--country", help="USA, Canada or Mexico")
+    parser.add_argument("--rarity", help="Iconic, Epic or Rare")
+    parser.add_argument("--min-price", help="e.g. 500 or US$500.00")
+    parser.add_argument("--max-price")
+    parser.add_argument("--since", help="ISO date/time or relative (7d, 12h); listings then searches history")
+    parser.add_argument("--until", help="ISO date/time or relative")
+    parser.add_argument("--sort", help="listings: price/match/time/rarity/venue; changes: change/match/venue/price, "
+                                       "or change/venue/matches/price with --by venue (--sort=-price for descending)")
+    parser.add_argument("--by", choices=["match", "venue"], default="match",
+                        help="changes: one row per match or per venue")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="drop and rebuild the index first")
+    args = parser.parse_args()
+
+    index_path = os.path.join(args.data_dir, INDEX_FILE)
+    if args.rebuild and os.path.exists(index_path):
+        os.remove(index_path)
+
+    try:
+        filters = build_filters(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    index = MarketIndex(args.data_dir, index_path)
+    try:
+        start = time.perf_counter()
+        added = index.refresh()
+        refreshed = time.perf_counter()
+        if args.command == "listings":
+            rows = index.listings(filters, args.sort or 'price', args.limit)
+        else:
+            rows = index.changes(filters, args.sort or 'change', args.limit, args.by)
+        done = time.perf_counter()
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        index.close()
+
+    write_rows(rows, args.format)
+    print(f"{len(rows)} rows - index refresh {(refreshed - start) * 1000:.1f} ms "
+          f"({added} new snapshots), query {(done - refreshed) * 1000:.1f} ms", file=sys.stderr)
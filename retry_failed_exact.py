@@ -9,6 +9,9 @@ import time
 import os
 from datetime import datetime
 
+from browser_session import ASSET_CACHE_DIR, BROWSER_STATE_DIR, AssetCache, context_options, save_storage_state
+from models import Listing, MatchSnapshot
+
 def retry_failed_matches():
     """Retry scraping for the 6 failed matches using working implementation"""
     
@@ -21,9 +24,19 @@ def retry_failed_matches():
     
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        # Same cookies, localStorage and asset cache as fifa_scraper
+        context = browser.new_context(**context_options())
+        cache = AssetCache(os.path.join(BROWSER_STATE_DIR, ASSET_CACHE_DIR))
+        context.route("**/*", cache.handle_route_sync)
+        page = context.new_page()
         page.set_viewport_size({"width": 1920, "height": 1080})
         
+        # Warm up once so the first tag doesn't pay for the app bootstrap
+        try:
+            page.goto("https://collect.fifa.com/marketplace", wait_until='networkidle', timeout=30000)
+        except Exception as e:
+            print(f"Warmup failed: {str(e)[:50]}")
+        
         successful = 0
         failed = 0
         total_listings = 0
@@ -60,52 +73,24 @@ def retry_failed_matches():
                         if container:
                             text_content = container.evaluate("el => el.innerText")
                             
-                            # Quick extraction - EXACT implementation
-                            import re
-                            price_match = re.search(r'US\$[\d,]+\.?\d*', text_content)
-                            
-                            listing_data = {
-                                'tag': tag,
-                                'price': price_match.group() if price_match else '',
-                                'text': text_content.strip()
-                            }
-                            
-                            # Extract title (first meaningful line) - EXACT implementation
-                            lines = [l.strip() for l in text_content.split('\n') if l.strip()]
-                            for line in lines:
-                                if line and 'US$' not in line and 'From' not in line and len(line) > 10:
-                                    listing_data['title'] = line
-                                    break
-                            else:
-                                listing_data['title'] = ''
-                            
-                            # Extract type - EXACT implementation
-                            if 'Iconic' in text_content:
-                                listing_data['type'] = 'Iconic'
-                            elif 'Rare' in text_content:
-                                listing_data['type'] = 'Rare'
-                            elif 'Epic' in text_content:
-                                listing_data['type'] = 'Epic'
-                            else:
-                                listing_data['type'] = ''
-                            
-                            listings.append(listing_data)
+                            # Shared extraction - drops priceless and NO LONGER VALID cards
+                            listing = Listing.from_text(tag, text_content)
+                            if listing:
+                                listings.append(listing)
                             
                     except Exception:
                         continue
                 
-                result = {
-                    'tag': tag,
-                    'url': url,
-                    'listings_count': len(listings),
-                    'listings': listings,
-                    'success': True,
-                    'timestamp': datetime.now().isoformat()
-                }
+                result = MatchSnapshot(
+                    tag=tag,
+                    url=url,
+                    listings=listings,
+                    timestamp=datetime.now().isoformat()
+                )
                 
                 # Save individual result - EXACT implementation
                 with open(os.path.join(output_dir, f"{tag}.json"), 'w') as f:
-                    json.dump(result, f, indent=2)
+                    json.dump(result.to_dict(), f, indent=2)
                 
                 successful += 1
                 total_listings += len(listings)
@@ -117,20 +102,21 @@ def retry_failed_matches():
                 
             except Exception as e:
                 print(f"✗ Error: {str(e)[:50]}")
-                result = {
-                    'tag': tag,
-                    'url': f"https://collect.fifa.com/marketplace?tags={tag}",
-                    'error': str(e),
-                    'success': False,
-                    'timestamp': datetime.now().isoformat()
-                }
+                result = MatchSnapshot(
+                    tag=tag,
+                    url=f"https://collect.fifa.com/marketplace?tags={tag}",
+                    error=str(e),
+                    success=False,
+                    timestamp=datetime.now().isoformat()
+                )
                 
                 # Save error result
                 with open(os.path.join(output_dir, f"{tag}.json"), 'w') as f:
-                    json.dump(result, f, indent=2)
+                    json.dump(result.to_dict(), f, indent=2)
                 
                 failed += 1
         
+        save_storage_state(context.storage_state())
         browser.close()
         
         print(f"\n🏁 RETRY COMPLETE:")
@@ -138,6 +124,19 @@ def retry_failed_matches():
         print(f"   ❌ Failed: {failed}")
         print(f"   📊 Total listings: {total_listings}")
         print(f"   📁 Files updated in: {output_dir}/")
+        print(f"   💾 Asset cache: {cache.hits} hits, {cache.misses} misses")
 
 if __name__ == "__main__":
-    retry_failed_matches()
+    import argparse
+    
+    from profiling import RunProfiler, add_profile_arguments
+    
+    parser = argparse.ArgumentParser(description="Retry the failed tags")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.profile:
+        with RunProfiler("retry_failed_exact", flamegraph=args.flamegraph):
+            retry_failed_matches()
+    else:
+        retry_failed_matches()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+FIFA World Cup 2026 schedule, venue and country lookups
+- Source of truth is world_cup_2026_schedule.json (versioned)
+- Loaded and validated once, then served from indexed dicts
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+SCHEDULE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "world_cup_2026_schedule.json")
+SCHEDULE_VERSION = 1
+UNKNOWN = "Unknown"
+
+@dataclass(slots=True, frozen=True)
+class MatchInfo:
+    """Schedule entry for one match"""
+    match_num: int
+    date: str
+    venue: str
+    stadium: str
+    country: str
+    stage: str
+    knockout: bool
+
+class Schedule:
+    """Indexed view over the schedule data file"""
+
+    def __init__(self, data):
+        self.version = data['version']
+        self.countries = tuple(data['countries'])
+        self.stages = tuple(stage['name'] for stage in data['stages'])
+        self.knockout_stages = frozenset(stage['name'] for stage in data['stages'] if stage['knockout'])
+
+        # venue -> (country, stadium), plus alias -> canonical venue
+        self.venues = {venue['name']: (venue['country'], venue['stadium']) for venue in data['venues']}
+        self.aliases = {}
+        for venue in data['venues']:
+            self.aliases[venue['name'].upper()] = venue['name']
+            for alias in venue.get('aliases', []):
+                self.aliases[alias.upper()] = venue['name']
+
+        # match -> info, stage -> matches, venue -> matches
+        self.matches = {}
+        self.stage_matches = {stage: [] for stage in self.stages}
+        self.venue_matches = {venue: [] for venue in self.venues}
+        for entry in data['matches']:
+            country, stadium = self.venues[entry['venue']]
+            info = MatchInfo(
+                match_num=entry['match'],
+                date=entry['date'],
+                venue=entry['venue'],
+                stadium=stadium,
+                country=country,
+                stage=entry['stage'],
+                knockout=entry['stage'] in self.knockout_stages,
+            )
+            self.matches[info.match_num] = info
+            self.stage_matches[info.stage].append(info.match_num)
+            self.venue_matches[info.venue].append(info.match_num)
+
+    def match(self, match_num):
+        """MatchInfo for a match number, or None if it is not scheduled"""
+        return self.matches.get(match_num)
+
+    def canonical_venue(self, venue):
+        """Resolve a venue name or alias (e.g. 'Monterrey') to its schedule name"""
+        return self.aliases.get((venue or '').upper(), venue)
+
+    def venue_country(self, venue):
+        """Host country for a venue or alias, 'Unknown' if not a host venue"""
+        entry = self.venues.get(self.canonical_venue(venue))
+        return entry[0] if entry else UNKNOWN
+
+    def find_venue(self, text):
+        """First host venue whose name or alias appears in text, or None"""
+        text = text.upper()
+        for alias, venue in self.aliases.items():
+            if alias in text:
+                return venue
+        return None
+
+def validate_schedule(data):
+    """Raise ValueError if the schedule data is inconsistent"""
+    if data.get('version') != SCHEDULE_VERSION:
+        raise ValueError(f"Unsupported schedule version {data.get('version')!r}, expected {SCHEDULE_VERSION}")
+
+    countries = set(data['countries'])
+    stages = [stage['name'] for stage in data['stages']]
+    if len(set(stages)) != len(stages):
+        raise ValueError("Duplicate stage names in schedule")
+
+    venues = {}
+    aliases = {}
+    for venue in data['venues']:
+        name = venue['name']
+        if name in venues:
+            raise ValueError(f"Duplicate venue {name!r}")
+        if venue['country'] not in countries:
+            raise ValueError(f"Venue {name!r} has unknown country {venue['country']!r}")
+        venues[name] = venue
+        for alias in [name] + venue.get('aliases', []):
+            owner = aliases.setdefault(alias.upper(), name)
+            if owner != name:
+                raise ValueError(f"Alias {alias!r} maps to both {owner!r} and {name!r}")
+
+    seen = set()
+    for entry in data['matches']:
+        match_num = entry['match']
+        if match_num in seen:
+            raise ValueError(f"Duplicate match M{match_num}")
+        seen.add(match_num)
+        if entry['venue'] not in venues:
+            raise ValueError(f"M{match_num} has unknown venue {entry['venue']!r}")
+        if entry['stage'] not in stages:
+            raise ValueError(f"M{match_num} has unknown stage {entry['stage']!r}")
+        try:
+            datetime.strptime(entry['date'], "%B %d, %Y")
+        except ValueError:
+            raise ValueError(f"M{match_num} has invalid date {entry['date']!r}") from None
+
+    if seen != set(range(1, len(seen) + 1)):
+        raise ValueError("Match numbers must be contiguous from 1")
+
+def load_schedule(path=SCHEDULE_FILE):
+    """Load and validate a schedule data file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    validate_schedule(data)
+    return Schedule(data)
+
+@lru_cache(maxsize=None)
+def get_schedule():
+    """The shared schedule, loaded once per process"""
+    return load_schedule()
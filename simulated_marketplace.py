@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the FIFA Collect marketplace
+- Serves /marketplace?tags=mN as server-rendered HTML built from stored snapshots
+- /marketplace without tags lists every tag with its listing count (tag discovery)
+- Lets the scraper and fetchers be exercised offline
+- Optional fault injection for load and soak tests: response latency drawn
+  from a lognormal distribution, 429 (with Retry-After) and 5xx answers,
+  grids cut short, and per-tag listing counts; /stats reports what was served
+
+Usage:
+    python3 simulated_marketplace.py [port]
+    python3 simulated_marketplace.py 8765 --latency-ms 300 --latency-sigma 0.8 \
+        --rate-limit-rate 0.05 --error-rate 0.02 --truncate-rate 0.05 --counts m1=40,m2=0
+"""
+
+import html
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from data_loader import DATA_DIR, load_snapshots
+from models import PRICE_PATTERN, MatchSnapshot, format_price
+
+@dataclass(slots=True)
+class FaultProfile:
+    """Misbehaviour injected into tag pages (the defaults inject none)"""
+    latency_ms: float = 0.0
+    # Lognormal spread of the latency around latency_ms (the median); 0 = fixed
+    latency_sigma: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 5
+    error_rate: float = 0.0
+    truncate_rate: float = 0.0
+    # Cards left on a truncated grid
+    truncate_to: int = 3
+    # tag -> cards on its grid (repeating stored cards at nudged prices if needed)
+    listing_counts: dict = field(default_factory=dict)
+    seed: int | None = None
+
+    def latency(self, rng):
+        """Seconds to hold a response"""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000
+        return rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma) / 1000
+
+def parse_counts(spec):
+    """'m1=40,m2=0' -> {'m1': 40, 'm2': 0}"""
+    counts = {}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        tag, _, count = part.partition('=')
+        counts[tag.strip()] = int(count)
+    return counts
+
+def resize_snapshot(snapshot, tag, count):
+    """A copy of snapshot for tag with exactly count cards.
+
+    Extra cards repeat the stored ones a dollar dearer per round, so every
+    card stays distinct to the scraper's dedupe.
+    """
+    source = list(snapshot.listings) if snapshot else []
+    listings = []
+    for i in range(count if source else 0):
+        listing = source[i % len(source)]
+        bump = (i // len(source)) * 100
+        if bump:
+            price_cents = listing.price_cents + bump
+            text = PRICE_PATTERN.sub(format_price(price_cents), listing.text, count=1)
+            listing = replace(listing, price_cents=price_cents, text=text)
+        listings.append(replace(listing, tag=tag))
+    return MatchSnapshot(tag=tag, url=snapshot.url if snapshot else '', listings=listings,
+                         timestamp=snapshot.timestamp if snapshot else '')
+
+def render_marketplace_page(snapshot, limit=None):
+    """Render a marketplace page whose cards look like the real grid (the first limit cards)"""
+    cards = []
+    for listing in (snapshot.listings[:limit] if snapshot else []):
+        # Price text sits in its own element, as on the real grid
+        price_match = PRICE_PATTERN.search(listing.text)
+        price = html.escape(price_match.group() if price_match else listing.to_dict()['price'])
+        lines = [html.escape(line) for line in listing.text.split('\n') if line.strip()]
+        if not price_match:
+            lines.append(price)
+        price_span = f'<span class="price">{price}</span>'
+        body = "".join(f"<div>{line.replace(price, price_span, 1)}</div>" for line in lines)
+        cards.append(f"""
+        <a class="card" href="#">
+            <img src="/static/card.png" alt="">
+            <div class="card-body">{body}</div>
+        </a>""")
+
+    tag = html.escape(snapshot.tag) if snapshot else ''
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Marketplace {tag}</title></head>
+<body>
+    <main>
+        <h1>Marketplace</h1>
+        <div class="grid">{"".join(cards)}
+        </div>
+    </main>
+</body>
+</html>
+"""
+
+def render_tag_index(snapshots):
+    """Render the landing page: one filter link per tag with its listing count"""
+    def order(tag):
+        return (0, int(tag[1:])) if tag[:1] == 'm' and tag[1:].isdigit() else (1, tag)
+
+    links = []
+    for tag in sorted(snapshots, key=order):
+        snapshot = snapshots[tag]
+        tag = html.escape(tag)
+        links.append(f"""
+            <a class="tag-filter" href="/marketplace?tags={tag}">{tag.upper()} <span class="count">({len(snapshot.listings)})</span></a>""")
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Marketplace</title></head>
+<body>
+    <main>
+        <h1>Marketplace</h1>
+        <nav class="filters">{"".join(links)}
+        </nav>
+    </main>
+</body>
+</html>
+"""
+
+class MarketplaceHandler(BaseHTTPRequestHandler):
+    """Serves marketplace pages from server.snapshots ({tag: MatchSnapshot}).
+
+    Tag pages are subject to server.faults; outcomes are counted in server.stats.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with self.server.stats_lock:
+                self.send_body(200, json.dumps(self.server.stats).encode('utf-8'), "application/json")
+            return
+        if url.path != "/marketplace":
+            self.send_error(404)
+            return
+
+        tag = parse_qs(url.query).get('tags', [''])[0]
+        if not tag:
+            self.send_body(200, render_tag_index(self.server.snapshots).encode('utf-8'))
+            return
+
+        faults, rng = self.server.faults, self.server.rng
+        delay = faults.latency(rng)
+        if delay:
+            time.sleep(delay)
+        draw = rng.random()
+        if draw < faults.rate_limit_rate:
+            self.count("rate_limited")
+            self.send_body(429, b"Too Many Requests", "text/plain", {"Retry-After": str(faults.retry_after)})
+            return
+        draw -= faults.rate_limit_rate
+        if draw < faults.error_rate:
+            self.count("server_errors")
+            self.send_body(rng.choice((500, 502, 503)), b"Server Error", "text/plain")
+            return
+        draw -= faults.error_rate
+        truncated = draw < faults.truncate_rate
+        self.count("truncated" if truncated else "served")
+        page_html = render_marketplace_page(self.server.snapshots.get(tag), faults.truncate_to if truncated else None)
+        self.send_body(200, page_html.encode('utf-8'))
+
+    def count(self, outcome):
+        with self.server.stats_lock:
+            self.server.stats[outcome] += 1
+
+    def send_body(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MarketplaceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for bursts of connections from many concurrent scrapers
+    request_queue_size = 128
+
+def start_server(data_dir=DATA_DIR, port=0, faults=None):
+    """Start the stand-in marketplace on a background thread.
+
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    faults = faults or FaultProfile()
+    server = MarketplaceServer(("127.0.0.1", port), MarketplaceHandler)
+    snapshots = {snapshot.tag: snapshot for snapshot in load_snapshots(data_dir).values()}
+    # Tags the data doesn't have borrow the first stored match's cards
+    template = next(iter(snapshots.values()), None)
+    for tag, count in faults.listing_counts.items():
+        snapshots[tag] = resize_snapshot(snapshots.get(tag, template), tag, count)
+    server.snapshots = snapshots
+    server.faults = faults
+    server.rng = random.Random(faults.seed)
+    server.stats = Counter()
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def add_fault_arguments(parser):
+    """Add the FaultProfile options to an argparse parser"""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="median response delay of tag pages")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="lognormal spread of the delay (0: fixed; ~1: heavy tail)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of tag pages answered 429")
+    parser.add_argument("--retry-after", type=int, default=5, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of tag pages answered 500/502/503")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of grids cut short")
+    parser.add_argument("--truncate-to", type=int, default=3, help="cards left on a truncated grid")
+    parser.add_argument("--counts", default="", help="cards per tag, e.g. m1=40,m2=0,m200=5")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible fault draws")
+
+def fault_profile_from_args(args):
+    return FaultProfile(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        truncate_rate=args.truncate_rate,
+        truncate_to=args.truncate_to,
+        listing_counts=parse_counts(args.counts),
+        seed=args.seed,
+    )
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in marketplace, optionally misbehaving")
+    parser.add_argument("port", nargs="?", type=int, default=8765)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.data_dir, args.port, fault_profile_from_args(args))
+    print(f"🏟️  Simulated marketplace at {base_url}/marketplace?tags=m1 (Ctrl+C to stop)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Mergeable price quantile sketches over the scrape history
+- One KLL sketch per match, rarity and scrape day, updated as each
+  snapshot is stored (see fifa_scraper.save_match_data)
+- Stored compactly in fifa_marketplace_data/sketches/mN.json, next to history/
+- Percentiles for any window come from merging that window's day sketches,
+  without loading raw historical listings
+
+Usage:
+    python3 sketches.py --rebuild                      # from history/ (and current snapshots)
+    python3 sketches.py 5 [--since 2026-06-01] [--until 2026-06-30]
+"""
+
+import base64
+import json
+import math
+import os
+import sys
+from array import array
+from datetime import date, timedelta
+
+from data_loader import DATA_DIR, decode_json, read_bytes
+from models import Rarity
+
+SKETCH_DIR = "sketches"
+
+# Accuracy/size trade-off: rank error is roughly 1.7 / K, ~1% at 200
+KLL_K = 200
+KLL_DECAY = 2 / 3
+
+# Windows shown on the detail pages, in days back from the match's latest scrape
+QUANTILE_WINDOWS = (("Last 7 days", 7), ("Last 30 days", 30), ("All time", None))
+
+class KLLSketch:
+    """KLL quantile sketch over integer prices (cents).
+
+    Level h holds items that each stand for 2**h observations. A level that
+    reaches its capacity is sorted and every other item is promoted, so the
+    sketch stays at O(K) items however many prices it has seen. Sketches
+    merge level by level. Compaction alternates its offset deterministically,
+    so the same input always gives the same (byte-identical) sketch.
+    """
+
+    __slots__ = ('k', 'n', 'levels', '_size')
+
+    def __init__(self, k=KLL_K):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self._size = 0
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * KLL_DECAY ** depth))
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def update(self, value):
+        self.levels[0].append(value)
+        self.n += 1
+        self._size += 1
+        if self._size >= self._max_size():
+            self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self._size += other._size
+        if self._size >= self._max_size():
+            self._compress()
+
+    def _compress(self):
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            items.sort()
+            # An odd item out stays behind, so no observation's weight is lost
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = (self.n + level) % 2
+            promoted = items[offset::2]
+            self.levels[level + 1].extend(promoted)
+            self.levels[level] = leftover
+            self._size -= len(items) - len(promoted)
+            if self._size < self._max_size():
+                break
+
+    def weighted_items(self):
+        """(value, weight) pairs in value order; exact (every weight 1) until K values are seen"""
+        return sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+
+    def quantiles(self, qs):
+        """Approximate quantiles (0 <= q <= 1) in input units; all 0 if empty"""
+        if not self.n:
+            return [0 for _ in qs]
+        weighted = self.weighted_items()
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            target = q * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def to_dict(self):
+        """Compact form: each level as base64 of sorted little-endian uint32s"""
+        levels = []
+        for items in self.levels:
+            packed = array('I', sorted(items))
+            if sys.byteorder == 'big':
+                packed.byteswap()
+            levels.append(base64.b64encode(packed.tobytes()).decode('ascii'))
+        return {'n': self.n, 'levels': levels}
+
+    @classmethod
+    def from_dict(cls, data, k=KLL_K):
+        sketch = cls(k)
+        sketch.n = data['n']
+        sketch.levels = []
+        for encoded in data['levels']:
+            packed = array('I')
+            packed.frombytes(base64.b64decode(encoded))
+            if sys.byteorder == 'big':
+                packed.byteswap()
+            sketch.levels.append(list(packed))
+        sketch.levels = sketch.levels or [[]]
+        sketch._size = sum(len(items) for items in sketch.levels)
+        return sketch
+
+class MatchSketches:
+    """One match's sketches: {day: {Rarity: KLLSketch}}"""
+
+    def __init__(self, days=None):
+        self.days = days or {}
+
+    def add_snapshot(self, snapshot):
+        """Fold a stored snapshot's valid, priced listings into its day's sketches"""
+        rarities = self.days.setdefault(snapshot.timestamp[:10], {})
+        for listing in snapshot.listings:
+            if listing.price_cents > 0 and listing.is_valid:
+                sketch = rarities.get(listing.rarity)
+                if sketch is None:
+                    rarities[listing.rarity] = sketch = KLLSketch()
+                sketch.update(listing.price_cents)
+
+    def window(self, since=None, until=None):
+        """{Rarity: merged KLLSketch} for days in [since, until] (ISO dates, inclusive)"""
+        merged = {}
+        for day, rarities in self.days.items():
+            if (since and day < since) or (until and day > until):
+                continue
+            for rarity, sketch in rarities.items():
+                merged.setdefault(rarity, KLLSketch()).merge(sketch)
+        return merged
+
+    def window_quantiles(self, since=None, until=None):
+        """[{'rarity', 'observations', 'p10', 'median', 'p90'}] in cents, in Rarity order"""
+        rows = []
+        for rarity, sketch in sorted(self.window(since, until).items(), key=lambda item: item[0] or len(Rarity)):
+            p10, median, p90 = sketch.quantiles([0.1, 0.5, 0.9])
+            rows.append({'rarity': rarity, 'observations': sketch.n, 'p10': p10, 'median': median, 'p90': p90})
+        return rows
+
+    def recent_windows(self, windows=QUANTILE_WINDOWS):
+        """[(label, rows)] for windows counted back from the latest scraped day"""
+        if not self.days:
+            return []
+        latest = max(self.days)
+        result = []
+        for label, days in windows:
+            since = None if days is None else (date.fromisoformat(latest) - timedelta(days=days - 1)).isoformat()
+            result.append((label, self.window_quantiles(since)))
+        return result
+
+    def to_dict(self):
+        return {
+            'k': KLL_K,
+            'days': {
+                day: {rarity.label: sketch.to_dict() for rarity, sketch in sorted(rarities.items())}
+                for day, rarities in sorted(self.days.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        k = data.get('k', KLL_K)
+        return cls({
+            day: {Rarity.from_label(label): KLLSketch.from_dict(sketch, k) for label, sketch in rarities.items()}
+            for day, rarities in data.get('days', {}).items()
+        })
+
+def sketch_path(match_num, data_dir=DATA_DIR):
+    return os.path.join(data_dir, SKETCH_DIR, f"m{match_num}.json")
+
+def load_match_sketches(match_num, data_dir=DATA_DIR):
+    """A match's stored sketches (empty if none or unreadable)"""
+    raw = read_bytes(sketch_path(match_num, data_dir))
+    if not raw:
+        return MatchSketches()
+    try:
+        return MatchSketches.from_dict(decode_json(raw))
+    except (ValueError, KeyError):
+        return MatchSketches()
+
+def save_match_sketches(match_num, sketches, data_dir=DATA_DIR):
+    path = sketch_path(match_num, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(sketches.to_dict(), f, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
+
+def record_snapshot(snapshot, match_num, data_dir=DATA_DIR):
+    """Fold a newly stored snapshot into the match's sketch file"""
+    sketches = load_match_sketches(match_num, data_dir)
+    sketches.add_snapshot(snapshot)
+    save_match_sketches(match_num, sketches, data_dir)
+    return sketches
+
+def rebuild_sketches(data_dir=DATA_DIR):
+    """Recreate every sketch file from history/ (current snapshots where there is none)"""
+    from data_loader import load_histories, load_snapshots
+
+    snapshots = load_snapshots(data_dir)
+    histories = load_histories(data_dir, snapshots)
+    for match_num, snapshot in snapshots.items():
+        sketches = MatchSketches()
+        for stored in histories.get(match_num) or ([snapshot] if snapshot.success else []):
+            sketches.add_snapshot(stored)
+        save_match_sketches(match_num, sketches, data_dir)
+    return len(snapshots)
+
+if __name__ == "__main__":
+    import argparse
+
+    from models import format_price
+
+    parser = argparse.ArgumentParser(description="Price quantiles from the stored sketches")
+    parser.add_argument("match", nargs="?", type=int, help="match number")
+    parser.add_argument("--since", help="first day (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day (YYYY-MM-DD)")
+    parser.add_argument("--rebuild", action="store_true", help="recreate all sketches from the stored history")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"📐 Rebuilt sketches for {rebuild_sketches(args.data_dir)} matches in {args.data_dir}/{SKETCH_DIR}/")
+    if args.match is not None:
+        sketches = load_match_sketches(args.match, args.data_dir)
+        print(f"M{args.match}: {len(sketches.days)} days of sketches")
+        for row in sketches.window_quantiles(args.since, args.until):
+            print(f"   {row['rarity'].label or 'Other':<8} {row['observations']:>7} prices   "
+                  f"p10 {format_price(row['p10']):>12}   median {format_price(row['median']):>12}   "
+                  f"p90 {format_price(row['p90']):>12}")
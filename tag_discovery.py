@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tag discovery: which marketplace tags exist and how many listings each has
+- One request for the marketplace landing page, whose tag filters link to
+  /marketplace?tags=... with a listing count next to each tag
+- Cached in fifa_marketplace_data/tags.json with a TTL
+- Sweeps plan only over match tags with listings; other tag families
+  (team, stage, ...) are recorded in the cache but not scraped yet
+
+Usage: python3 tag_discovery.py [--base-url http://127.0.0.1:8765] [--refresh]
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import parse_qs, urlparse
+
+from data_loader import DATA_DIR
+from http_fetcher import MARKETPLACE_BASE_URL, USER_AGENT
+from schedule import get_schedule
+
+TAG_CACHE = os.path.join(DATA_DIR, "tags.json")
+
+# Rediscover after this long
+TAG_TTL_SECONDS = 6 * 3600
+
+MATCH_TAG = re.compile(r'm(\d+)')
+COUNT_PATTERN = re.compile(r'(\d[\d,]*)')
+
+class _TagLinkParser(HTMLParser):
+    """Collects (href, text) of every link"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._href = dict(attrs).get('href') or ''
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            self.links.append((self._href, ' '.join(''.join(self._text).split())))
+            self._href = None
+
+def parse_tag_counts(page_html):
+    """{tag: listing count} from the tag filter links of a marketplace page.
+
+    The count is the last number in the link text once the tag itself is
+    removed; links without one count as None (the tag exists, activity unknown).
+    """
+    parser = _TagLinkParser()
+    parser.feed(page_html)
+    parser.close()
+
+    counts = {}
+    for href, text in parser.links:
+        tags = parse_qs(urlparse(href).query).get('tags')
+        if not tags or ',' in tags[0]:
+            continue
+        tag = tags[0]
+        remainder = re.sub(re.escape(tag), ' ', text, flags=re.I)
+        numbers = COUNT_PATTERN.findall(remainder)
+        count = int(numbers[-1].replace(',', '')) if numbers else None
+        if counts.get(tag) is None:
+            counts[tag] = count
+    return counts
+
+def fetch_tag_counts(base_url=MARKETPLACE_BASE_URL, timeout=15.0):
+    """Fetch the landing page and parse its tag filters ({} on failure)"""
+    request = urllib.request.Request(f"{base_url.rstrip('/')}/marketplace",
+                                     headers={"User-Agent": USER_AGENT, "Accept": "text/html"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            page_html = response.read().decode('utf-8', errors='replace')
+    except OSError as e:
+        print(f"⚠️  Tag discovery failed: {e}")
+        return {}
+    return parse_tag_counts(page_html)
+
+def load_cached_tags(base_url, ttl=TAG_TTL_SECONDS, path=TAG_CACHE):
+    """Cached {tag: count} for base_url if younger than ttl, else None"""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if cache.get('base_url') != base_url or time.time() - cache.get('fetched_at', 0) > ttl:
+        return None
+    return cache['tags']
+
+def save_cached_tags(base_url, counts, path=TAG_CACHE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump({'base_url': base_url, 'fetched_at': time.time(), 'tags': counts}, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+async def discover_tags(base_url=MARKETPLACE_BASE_URL, ttl=TAG_TTL_SECONDS, refresh=False):
+    """{tag: listing count}, from the cache when fresh enough"""
+    counts = None if refresh else load_cached_tags(base_url, ttl)
+    if counts is None:
+        counts = await asyncio.to_thread(fetch_tag_counts, base_url)
+        if counts:
+            save_cached_tags(base_url, counts)
+    return counts
+
+def active_match_numbers(counts):
+    """Match numbers of match tags with listings (or an unknown count)"""
+    numbers = []
+    for tag, count in counts.items():
+        match = MATCH_TAG.fullmatch(tag)
+        if match and count != 0:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+async def plan_match_numbers(base_url=MARKETPLACE_BASE_URL, ttl=TAG_TTL_SECONDS, refresh=False):
+    """Match numbers a full sweep should scrape.
+
+    Falls back to every scheduled match when discovery finds nothing.
+    """
+    counts = await discover_tags(base_url, ttl, refresh)
+    numbers = active_match_numbers(counts)
+    if not numbers:
+        print("⚠️  No tags discovered - planning every scheduled match")
+        return sorted(get_schedule().matches)
+
+    other = sorted(tag for tag in counts if not MATCH_TAG.fullmatch(tag))
+    idle = sum(1 for tag, count in counts.items() if MATCH_TAG.fullmatch(tag) and count == 0)
+    print(f"🔎 {len(numbers)} active match tags planned ({idle} without listings skipped)")
+    if other:
+        print(f"   Other tag families seen (not scraped): {', '.join(other[:10])}{' ...' if len(other) > 10 else ''}")
+    return numbers
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Discover marketplace tags and their listing counts")
+    parser.add_argument("--base-url", default=MARKETPLACE_BASE_URL, help="marketplace origin (e.g. a local stand-in)")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cache")
+    args = parser.parse_args()
+
+    counts = asyncio.run(discover_tags(args.base_url, refresh=args.refresh))
+    for tag in sorted(counts, key=lambda t: (not MATCH_TAG.fullmatch(t), int(t[1:]) if MATCH_TAG.fullmatch(t) else 0, t)):
+        print(f"{tag:>8}  {counts[tag] if counts[tag] is not None else '?'}")
+    print(f"{len(counts)} tags, {len(active_match_numbers(counts))} active match tags")
@@ -0,0 +1,80 @@
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+
+from api_server import ApiError, MarketApi, build_response, read_request
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fifa_marketplace_data")
+
+def read(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(run())
+
+def test_api_server_does_not_import_the_scraper():
+    # A fresh interpreter: other tests load the scraper into this one
+    check = "import sys, api_server; print(sorted({'fifa_scraper', 'playwright'} & set(sys.modules)))"
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    output = subprocess.run([sys.executable, "-c", check], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+def test_request_body_is_drained():
+    method, target, _, headers = read(b"POST /api/matches HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc")
+    assert (method, target, headers['content-length']) == ('POST', '/api/matches', '3')
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5"])
+def test_invalid_content_length_is_rejected(length):
+    with pytest.raises(ApiError) as error:
+        read(b"GET / HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+    shutil.copy(os.path.join(DATA_DIR, "m1.json"), data_dir)
+    return MarketApi(str(data_dir))
+
+def get(api, target, **headers):
+    """(status, headers, body) of a GET"""
+    raw = build_response(api, 'GET', target, {name.replace('_', '-'): value for name, value in headers.items()})
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    fields = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), fields, body
+
+def test_gzip_and_identity_bodies_have_distinct_etags(api):
+    status, plain, body = get(api, "/api/matches/1/listings")
+    _, zipped, zipped_body = get(api, "/api/matches/1/listings", accept_encoding="gzip, br")
+    assert status == 200 and 'Content-Encoding' not in plain and zipped['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped_body) == body
+    assert plain['ETag'] != zipped['ETag']
+    assert plain['Vary'] == zipped['Vary'] == 'Accept-Encoding'
+
+    # A validator only matches the representation it was issued for
+    assert get(api, "/api/matches/1/listings", if_none_match=plain['ETag'])[0] == 304
+    assert get(api, "/api/matches/1/listings", accept_encoding="gzip", if_none_match=zipped['ETag'])[0] == 304
+    assert get(api, "/api/matches/1/listings", accept_encoding="gzip", if_none_match=plain['ETag'])[0] == 200
+    assert get(api, "/api/matches/1/listings", if_none_match=zipped['ETag'])[0] == 200
+
+def test_handler_failure_is_a_500_json_error_and_not_cached(api, monkeypatch):
+    def broken(path, query):
+        raise KeyError("boom")
+
+    monkeypatch.setattr(api, "route", broken)
+    status, fields, body = get(api, "/api/matches?stage=Final")
+    assert status == 500
+    assert fields['Content-Type'].startswith('application/json')
+    assert json.loads(body) == {'error': "internal server error"}
+
+    monkeypatch.undo()
+    assert get(api, "/api/matches?stage=Final")[0] == 200
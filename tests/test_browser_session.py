@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+from types import SimpleNamespace
+
+from playwright.async_api import Error as PlaywrightError
+
+from browser_session import AssetCache, BrowserSession
+
+URL = "https://example.test/app.js"
+
+class Route:
+    """Records what a route handler did with a request"""
+
+    def __init__(self, fetch_error=None):
+        self.request = SimpleNamespace(url=URL, method="GET", resource_type="script")
+        self.fetch_error = fetch_error
+        self.outcome = None
+
+    async def fetch(self):
+        if self.fetch_error:
+            raise self.fetch_error
+        return SimpleNamespace(status=200, headers={'content-type': 'text/javascript'}, body=self.body)
+
+    async def body(self):
+        return b"console.log(1)"
+
+    async def fallback(self):
+        self.outcome = 'fallback'
+
+    async def fulfill(self, **kwargs):
+        self.outcome = 'fulfill'
+
+def test_concurrent_stores_leave_one_complete_entry(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    bodies = [bytes([i]) * 100_000 for i in range(8)]
+    threads = [threading.Thread(target=cache.store, args=(URL, 200, {}, body)) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    _, body = cache.load(URL)
+    assert body in bodies
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_fetch_failure_falls_back(tmp_path):
+    cache = AssetCache(str(tmp_path))
+    route = Route(fetch_error=PlaywrightError("net::ERR_CONNECTION_RESET"))
+    asyncio.run(cache.handle_route(route))
+    assert route.outcome == 'fallback'
+    assert cache.load(URL) is None
+
+def test_unwritable_cache_still_serves(tmp_path):
+    cache = AssetCache(str(tmp_path / "assets"))
+    os.rmdir(cache.cache_dir)
+    route = Route()
+    asyncio.run(cache.handle_route(route))
+    assert route.outcome == 'fulfill'
+    assert cache.load(URL) is None
+
+    os.makedirs(cache.cache_dir)
+    asyncio.run(cache.handle_route(Route()))
+    assert cache.load(URL)[1] == b"console.log(1)"
+
+MB = 1024 * 1024
+
+class FakeCDP:
+    """CDP session serving JSHeapUsedSize readings from a list (None: the call fails)"""
+
+    def __init__(self, heap_readings):
+        self.heap_readings = heap_readings
+
+    async def send(self, method):
+        if method == "Performance.enable":
+            return {}
+        reading = self.heap_readings.pop(0)
+        if reading is None:
+            raise PlaywrightError("Target closed")
+        return {'metrics': [{'name': 'JSHeapUsedSize', 'value': reading}, {'name': 'Nodes', 'value': 100}]}
+
+class FakeContext:
+    def __init__(self, heap_readings):
+        self.heap_readings = heap_readings
+        self.closed = False
+
+    async def new_page(self):
+        return SimpleNamespace()
+
+    async def new_cdp_session(self, page):
+        return FakeCDP(self.heap_readings)
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self, heap_readings):
+        self.heap_readings = heap_readings
+        self.contexts = []
+
+    async def new_context(self, **options):
+        self.contexts.append(FakeContext(self.heap_readings))
+        return self.contexts[-1]
+
+    async def close(self):
+        pass
+
+def fake_playwright(heap_readings):
+    browser = FakeBrowser(heap_readings)
+
+    async def launch(**options):
+        return browser
+
+    return SimpleNamespace(chromium=SimpleNamespace(launch=launch)), browser
+
+def navigate(session, times):
+    async def run():
+        for _ in range(times):
+            await session.page()
+            await session.after_navigation()
+    asyncio.run(run())
+
+def test_recycles_when_js_heap_passes_the_limit():
+    playwright, browser = fake_playwright([100 * MB, 300 * MB, 100 * MB, 100 * MB])
+    session = BrowserSession(playwright, max_navigations=50, max_js_heap_mb=256, state_dir=None)
+    navigate(session, 4)
+    assert session.recycles == 1
+    assert [context.closed for context in browser.contexts] == [True, False]
+    # The new context starts counting from zero
+    assert session.navigations == 2
+    assert session.last_metrics['JSHeapUsedSize'] == 100 * MB
+
+def test_recycles_after_max_navigations_while_heap_is_low():
+    playwright, browser = fake_playwright([10 * MB] * 7)
+    session = BrowserSession(playwright, max_navigations=3, max_js_heap_mb=256, state_dir=None)
+    navigate(session, 7)
+    assert session.recycles == 2
+    assert len(browser.contexts) == 3
+    assert session.navigations == 1
+
+def test_counts_navigations_when_metrics_are_unavailable():
+    playwright, browser = fake_playwright([None] * 4)
+    session = BrowserSession(playwright, max_navigations=2, max_js_heap_mb=1, state_dir=None)
+    navigate(session, 4)
+    assert session.last_metrics == {}
+    assert session.recycles == 2
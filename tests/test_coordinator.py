@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import sqlite3
+
+import coordinator
+from coordinator import CLAIMED, FINISHED, LEASE_LOST, LeaseStore, run_worker, work_shard
+
+def test_expired_shard_is_reassigned(tmp_path):
+    store = LeaseStore(str(tmp_path / "leases.sqlite"), lease_seconds=0.2)
+    sweep_id = store.create_sweep(["m1", "m2"], shard_size=2)
+
+    shard_id, tags = store.acquire_shard(sweep_id, "dead")
+    assert store.claim_tag(sweep_id, shard_id, "m1", "dead") == CLAIMED
+    assert store.acquire_shard(sweep_id, "alive") is None
+
+    time.sleep(0.3)
+    assert store.acquire_shard(sweep_id, "alive") == (shard_id, tags)
+    assert store.claim_tag(sweep_id, shard_id, "m1", "alive") == CLAIMED
+
+    # The first owner comes back too late: its result must not be recorded or saved
+    saved = []
+    assert not store.finish_tag(sweep_id, "m1", "dead", 'done', save=lambda: saved.append("dead") or True)
+    assert store.finish_tag(sweep_id, "m1", "alive", 'done', save=lambda: saved.append("alive") or True)
+    assert saved == ["alive"]
+    assert not store.heartbeat(sweep_id, shard_id, "dead")
+    store.close()
+
+def test_failed_save_records_failed(tmp_path):
+    store = LeaseStore(str(tmp_path / "leases.sqlite"))
+    sweep_id = store.create_sweep(["m1"])
+    shard_id, _ = store.acquire_shard(sweep_id, "w")
+    store.claim_tag(sweep_id, shard_id, "m1", "w")
+    assert store.finish_tag(sweep_id, "m1", "w", 'done', save=lambda: False)
+    assert store.progress(sweep_id)['tags'] == {'failed': 1}
+    store.close()
+
+def test_worker_waits_for_dead_workers_shard(tmp_path):
+    path = str(tmp_path / "leases.sqlite")
+    store = LeaseStore(path, lease_seconds=0.5)
+    # Tags the scraper has no parser for are skipped, so no page is fetched
+    sweep_id = store.create_sweep(["t1", "t2"], shard_size=1)
+    store.acquire_shard(sweep_id, "dead")
+
+    completed = asyncio.run(run_worker(sweep_id, path, "alive", lease_seconds=0.5, browser=False, delay=0))
+
+    assert completed == 2
+    assert store.progress(sweep_id) == {'tags': {'skipped': 2}, 'shards': {'done': 2}}
+    assert store.next_expiry(sweep_id) is None
+    store.close()
+
+def test_lease_expiring_mid_shard_keeps_remaining_tags(tmp_path):
+    path = str(tmp_path / "leases.sqlite")
+    store = LeaseStore(path)
+    sweep_id = store.create_sweep(["t1", "t2", "t3"], shard_size=3)
+    shard_id, tags = store.acquire_shard(sweep_id, "slow")
+    assert store.claim_tag(sweep_id, shard_id, "t1", "slow") == CLAIMED
+    assert store.finish_tag(sweep_id, "t1", "slow", 'skipped')
+    assert store.claim_tag(sweep_id, shard_id, "t1", "slow") == FINISHED
+
+    # The lease runs out before t2 is claimed; nobody has taken the shard yet
+    store.db.execute("UPDATE shards SET lease_expires = 0")
+    assert store.claim_tag(sweep_id, shard_id, "t2", "slow") == LEASE_LOST
+    assert not store.heartbeat(sweep_id, shard_id, "slow")
+    assert not asyncio.run(work_shard(store, sweep_id, shard_id, tags, "slow", browser=False, delay=0))
+    assert store.progress(sweep_id) == {'tags': {'skipped': 1, 'pending': 2}, 'shards': {'leased': 1}}
+
+    # The next worker picks the shard up and finishes the remaining tags
+    assert asyncio.run(run_worker(sweep_id, path, "next", browser=False, delay=0)) == 1
+    assert store.progress(sweep_id) == {'tags': {'skipped': 3}, 'shards': {'done': 1}}
+    store.close()
+
+def test_shard_with_unfinished_tags_is_not_done(tmp_path):
+    store = LeaseStore(str(tmp_path / "leases.sqlite"))
+    sweep_id = store.create_sweep(["m1", "m2"], shard_size=2)
+    shard_id, _ = store.acquire_shard(sweep_id, "w")
+    store.claim_tag(sweep_id, shard_id, "m1", "w")
+    store.finish_tag(sweep_id, "m1", "w", 'done')
+    assert not store.finish_shard(sweep_id, shard_id, "w")
+    store.claim_tag(sweep_id, shard_id, "m2", "w")
+    store.finish_tag(sweep_id, "m2", "w", 'failed')
+    assert store.finish_shard(sweep_id, shard_id, "w")
+    store.close()
+
+def test_heartbeat_survives_a_busy_database(tmp_path, monkeypatch):
+    store = LeaseStore(str(tmp_path / "leases.sqlite"), lease_seconds=0.3)
+    sweep_id = store.create_sweep(["m1"])
+    shard_id, _ = store.acquire_shard(sweep_id, "w")
+    outcomes = iter([sqlite3.OperationalError("database is locked"), True])
+    beats = []
+
+    def heartbeat(*args):
+        outcome = next(outcomes, None)
+        beats.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return bool(outcome)
+
+    monkeypatch.setattr(store, "heartbeat", heartbeat)
+
+    async def run():
+        lost = asyncio.Event()
+        await asyncio.wait_for(coordinator._heartbeat_loop(store, sweep_id, shard_id, "w", lost), 2)
+        return lost.is_set()
+
+    # A locked database is retried, then the lease is given up once renewing fails
+    assert asyncio.run(run())
+    assert len(beats) == 3
+    store.close()
+
+def test_heartbeat_gives_up_when_busy_past_the_lease(tmp_path, monkeypatch):
+    store = LeaseStore(str(tmp_path / "leases.sqlite"), lease_seconds=0.3)
+    sweep_id = store.create_sweep(["m1"])
+    shard_id, _ = store.acquire_shard(sweep_id, "w")
+
+    def heartbeat(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "heartbeat", heartbeat)
+
+    async def run():
+        lost = asyncio.Event()
+        await asyncio.wait_for(coordinator._heartbeat_loop(store, sweep_id, shard_id, "w", lost), 2)
+        return lost.is_set()
+
+    assert asyncio.run(run())
+    store.close()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from create_website import (detail_page_path, generate_detail_pages, summarize_history, summarize_match,
+                            write_detail_page, write_if_changed)
+from data_loader import load_histories, load_snapshots
+from sketches import load_match_sketches
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fifa_marketplace_data")
+
+@pytest.fixture(scope="module")
+def pages():
+    snapshots = dict(sorted(load_snapshots(DATA_DIR).items())[:6])
+    histories = load_histories(DATA_DIR, snapshots)
+    pages = []
+    for match_num, snapshot in snapshots.items():
+        quantiles = load_match_sketches(match_num, DATA_DIR).recent_windows()
+        summary = summarize_match(match_num, snapshot, summarize_history(histories[match_num]), quantiles)
+        if summary:
+            pages.append(summary[1])
+    assert pages
+    return pages
+
+def backdated_files(root):
+    """Set every file's mtime well into the past, so any rewrite shows up; {path: mtime_ns}"""
+    for directory, _, names in os.walk(root):
+        for name in names:
+            os.utime(os.path.join(directory, name), ns=(10**18, 10**18))
+    return file_mtimes(root)
+
+def file_mtimes(root):
+    return {
+        os.path.join(directory, name): os.stat(os.path.join(directory, name)).st_mtime_ns
+        for directory, _, names in os.walk(root) for name in names
+    }
+
+def test_write_if_changed_skips_identical_content(tmp_path):
+    path = str(tmp_path / "pages" / "a.html")
+    assert write_if_changed(path, "<p>Ünïcode</p>")
+    before = backdated_files(tmp_path)
+    assert not write_if_changed(path, "<p>Ünïcode</p>")
+    assert file_mtimes(tmp_path) == before
+    assert write_if_changed(path, "<p>changed</p>")
+
+def test_rerendering_unchanged_data_writes_no_files(pages, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert all(write_detail_page(page) for page in pages)
+    written = backdated_files(tmp_path)
+    assert len(written) == len(pages)
+
+    # Again in this process and across the process pool: same bytes, nothing touched
+    assert not any(write_detail_page(page) for page in pages)
+    assert generate_detail_pages(pages, workers=2) == (0, len(pages))
+    assert file_mtimes(tmp_path) == written
+
+def test_changed_page_is_the_only_one_rewritten(pages, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_detail_pages(pages, workers=2)
+    before = backdated_files(tmp_path)
+
+    changed = dict(pages[0], scraped_at="2099-01-01T00:00:00")
+    assert write_detail_page(changed)
+    after = file_mtimes(tmp_path)
+    path = os.path.join(str(tmp_path), detail_page_path(changed['match'].match_num))
+    assert [p for p in after if after[p] != before[p]] == [path]
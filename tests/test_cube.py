@@ -0,0 +1,65 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from cube import DEFAULT_ROLLUPS, PriceCube
+from models import Listing, Rarity
+
+STAGES = ("Group A", "Round of 32", "Final")
+VENUES = (("Toronto", "Canada"), ("Zapopan", "Mexico"), ("Arlington", "USA"), ("Atlanta", "USA"))
+DAYS = ("2026-06-01", "2026-06-02", "2026-06-03")
+
+def random_match(rng, match_num):
+    venue, country = rng.choice(VENUES)
+    return SimpleNamespace(match_num=match_num, stage=rng.choice(STAGES), venue=venue, country=country)
+
+def random_listings(rng, tag):
+    # Repeated prices make min/max retraction ties likely; 0 is skipped by the cube
+    prices = [rng.choice((0, 100, 5000, 5000, 20000)) if rng.random() < 0.3 else rng.randint(100, 500_000)
+              for _ in range(rng.randint(0, 12))]
+    return [Listing(tag, cents, '', '', rng.choice(list(Rarity))) for cents in prices]
+
+def as_tuples(rollup):
+    return {
+        key: (m.count, m.min_cents, m.max_cents, m.sum_cents, dict(m.sketch.buckets))
+        for key, m in rollup.items()
+    }
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_a_rebuild(seed):
+    rng = random.Random(seed)
+    cube = PriceCube()
+    state = {}
+    for _ in range(300):
+        match_num = rng.randint(1, 12)
+        if rng.random() < 0.2:
+            cube.remove_match(match_num)
+            state.pop(match_num, None)
+        else:
+            entry = (random_match(rng, match_num), random_listings(rng, f"m{match_num}"), rng.choice(DAYS) + "T10:00:00")
+            cube.update_match(*entry)
+            state[match_num] = entry
+
+    rebuilt = PriceCube()
+    for entry in state.values():
+        rebuilt.update_match(*entry)
+    unmaterialised = PriceCube(rollups=())
+    for entry in state.values():
+        unmaterialised.update_match(*entry)
+
+    for dims in DEFAULT_ROLLUPS:
+        expected = as_tuples(rebuilt.rollup(*dims))
+        assert as_tuples(cube.rollup(*dims)) == expected, dims
+        assert as_tuples(unmaterialised.rollup(*dims)) == expected, dims
+    assert as_tuples(cube.rollup('match', 'rarity', 'day')) == as_tuples(rebuilt.rollup('match', 'rarity', 'day'))
+
+def test_removing_every_match_empties_the_cube():
+    rng = random.Random(1)
+    cube = PriceCube()
+    for match_num in range(1, 6):
+        cube.update_match(random_match(rng, match_num), random_listings(rng, f"m{match_num}"), "2026-06-01T10:00:00")
+    for match_num in range(1, 6):
+        cube.remove_match(match_num)
+    assert all(not view for view in cube.views.values())
+    assert cube.total().count == 0
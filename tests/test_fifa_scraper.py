@@ -0,0 +1,62 @@
+import asyncio
+import os
+import urllib.request
+
+import pytest
+
+import fifa_scraper
+from http_fetcher import extract_card_texts
+from simulated_marketplace import FaultProfile, start_server
+
+class GridPage:
+    """Stands in for a Playwright page: cards come from the stand-in marketplace's HTML"""
+
+    def __init__(self, crash=False):
+        self.crash = crash
+        self.cards = []
+
+    async def goto(self, url, **kwargs):
+        with urllib.request.urlopen(url, timeout=10) as response:
+            self.cards = extract_card_texts(response.read().decode('utf-8'), max_cards=1000)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def evaluate(self, script):
+        if self.crash:
+            raise RuntimeError("page crashed")
+        # NEW_CARD_TEXTS_JS returns each card once; scrolling adds none
+        cards, self.cards = self.cards, []
+        return cards if script == fifa_scraper.NEW_CARD_TEXTS_JS else None
+
+    async def query_selector(self, selector):
+        return None
+
+@pytest.fixture
+def marketplace(monkeypatch, tmp_path):
+    monkeypatch.setattr(fifa_scraper, "SPOOL_DIR", str(tmp_path / "spool"))
+    monkeypatch.setattr(fifa_scraper, "CRAWL_SCROLL_WAIT_MS", 0)
+    server, base_url = start_server(faults=FaultProfile(listing_counts={"m1": 40, "m2": 0}))
+    yield base_url, tmp_path / "spool"
+    server.shutdown()
+
+def crawl(base_url, match_num, page):
+    return asyncio.run(fifa_scraper.scrape_match(page, match_num, base_url, crawl=True, max_listings=None))
+
+def test_crawl_spools_every_card(marketplace):
+    base_url, spool_dir = marketplace
+    snapshot = crawl(base_url, 1, GridPage())
+    assert snapshot.listings_count == 40
+    assert len(list(snapshot.listings)) == 40
+    snapshot.listings.discard()
+    assert os.listdir(spool_dir) == []
+
+def test_empty_crawl_removes_spool(marketplace):
+    base_url, spool_dir = marketplace
+    assert crawl(base_url, 2, GridPage()) is None
+    assert os.listdir(spool_dir) == []
+
+def test_failed_crawl_removes_spool(marketplace):
+    base_url, spool_dir = marketplace
+    assert crawl(base_url, 1, GridPage(crash=True)) is None
+    assert os.listdir(spool_dir) == []
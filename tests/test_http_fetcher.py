@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from data_loader import load_snapshots
+from http_fetcher import FastFetcher, extract_card_texts, fast_path_available, validate_fast_result
+from models import Listing, MatchSnapshot
+from quality import FULL_PAGE_LISTINGS
+from simulated_marketplace import FaultProfile, render_marketplace_page, start_server
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return next(s for s in load_snapshots().values() if s.listings_count >= 5)
+
+def keys(tag, texts):
+    return [Listing.from_text(tag, text).key for text in texts]
+
+def test_extractor_reads_every_rendered_card(snapshot):
+    texts = extract_card_texts(render_marketplace_page(snapshot), max_cards=1000)
+    assert keys(snapshot.tag, texts) == [listing.key for listing in snapshot.listings]
+
+def test_extractor_stops_at_max_cards(snapshot):
+    texts = extract_card_texts(render_marketplace_page(snapshot), max_cards=2)
+    assert keys(snapshot.tag, texts) == [listing.key for listing in snapshot.listings[:2]]
+
+def test_extractor_reads_truncated_grid(snapshot):
+    texts = extract_card_texts(render_marketplace_page(snapshot, limit=3), max_cards=1000)
+    assert keys(snapshot.tag, texts) == [listing.key for listing in snapshot.listings[:3]]
+
+def test_extractor_finds_nothing_on_empty_grid():
+    assert extract_card_texts(render_marketplace_page(None)) == []
+
+def test_validate_rejects_grid_far_below_expected_count(snapshot):
+    truncated = MatchSnapshot(snapshot.tag, snapshot.url, snapshot.listings[:2], snapshot.timestamp)
+    assert validate_fast_result(truncated)
+    assert not validate_fast_result(truncated, expected=40)
+    assert validate_fast_result(truncated, expected=4)
+    # A full first page is trusted whatever the count, as is a grid cut at max_listings
+    full = MatchSnapshot(snapshot.tag, snapshot.url, snapshot.listings[:1] * FULL_PAGE_LISTINGS, snapshot.timestamp)
+    assert validate_fast_result(full, expected=400)
+    assert validate_fast_result(truncated, expected=400, max_listings=2)
+
+@pytest.mark.skipif(not fast_path_available(), reason="httpx not installed")
+def test_fast_fetcher_against_stand_in(snapshot):
+    match_num = int(snapshot.tag[1:])
+    faults = FaultProfile(truncate_rate=1.0, truncate_to=2, listing_counts={"m999": 0})
+    server, base_url = start_server(faults=faults)
+
+    async def fetch(*requests):
+        async with FastFetcher(base_url, max_listings=1000) as fetcher:
+            return [await fetcher.fetch_match(n, expected) for n, expected in requests]
+
+    try:
+        unknown, truncated, empty = asyncio.run(fetch(
+            (match_num, None), (match_num, snapshot.listings_count), (999, None)))
+    finally:
+        server.shutdown()
+    # With no known count a truncated grid can't be told apart from a short one
+    assert [listing.key for listing in unknown.listings] == [listing.key for listing in snapshot.listings[:2]]
+    assert truncated is None
+    assert empty is None
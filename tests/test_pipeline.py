@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pipeline
+from models import Listing, MatchSnapshot, Rarity
+
+class Aggregate:
+    def __init__(self, match_numbers=(1,)):
+        self.pages = [{'match': SimpleNamespace(match_num=n)} for n in match_numbers]
+
+    def site_inputs(self):
+        return [page['match'] for page in self.pages], self.pages, None
+
+def test_flush_waits_for_build_in_flight(monkeypatch):
+    writes = []
+    started = threading.Event()
+
+    def write_site(matches, detail_pages, totals, changed):
+        started.set()
+        time.sleep(0.3)
+        writes.append(time.monotonic())
+
+    monkeypatch.setattr(pipeline, "write_site", write_site)
+
+    async def run():
+        builder = pipeline.DebouncedSiteBuilder(Aggregate(), delay=0.01)
+        builder.notify(1)
+        await asyncio.to_thread(started.wait)
+        # The debounced build is running and nothing else is pending
+        await builder.flush()
+        return builder.builds
+
+    assert asyncio.run(run()) == 1
+    assert len(writes) == 1
+
+def test_flush_builds_pending_update_after_build_in_flight(monkeypatch):
+    writes = []
+    started = threading.Event()
+
+    def write_site(matches, detail_pages, totals, changed):
+        started.set()
+        time.sleep(0.2)
+        writes.append(time.monotonic())
+
+    monkeypatch.setattr(pipeline, "write_site", write_site)
+
+    async def run():
+        builder = pipeline.DebouncedSiteBuilder(Aggregate(), delay=0.01)
+        builder.notify(1)
+        await asyncio.to_thread(started.wait)
+        builder.notify(1)
+        await builder.flush()
+        return builder.builds
+
+    assert asyncio.run(run()) == 2
+    assert len(writes) == 2
+
+def test_validate_snapshot_uses_quality_checks():
+    assert pipeline.validate_snapshot(None).problems == ["scrape failed"]
+    listings = [Listing(tag="m2", price_cents=50_000, text="Card", rarity=Rarity.EPIC)]
+    report = pipeline.validate_snapshot(MatchSnapshot(tag="m1", url="", listings=listings, timestamp=""))
+    assert report.problems == ["listing tagged 'm2'"]
+
+def test_rebuilds_render_only_notified_pages(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(pipeline, "write_site", lambda matches, pages, totals, changed: rendered.append(changed))
+
+    async def run():
+        builder = pipeline.DebouncedSiteBuilder(Aggregate([1, 2, 3]), delay=0.01)
+        builder.notify(2)
+        await asyncio.sleep(0.05)
+        builder.notify(3, rebuild=False)
+        await asyncio.sleep(0.05)
+        builder.notify(1)
+        await builder.flush()
+        await asyncio.sleep(0.05)
+        return builder.builds
+
+    assert asyncio.run(run()) == 2
+    # The first build renders everything; an unchanged re-scrape rides along with the next
+    assert rendered == [{1, 2, 3}, {1, 3}]
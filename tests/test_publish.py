@@ -0,0 +1,22 @@
+import os
+
+from publish import ASSET_DIR, Publisher
+
+PAGE = "<html><head><style>body { color: red; }</style></head><body><p>Hi</p></body></html>"
+
+def test_finish_without_assets(tmp_path):
+    publisher = Publisher(str(tmp_path))
+    publisher.publish_page("index.html", "<html><body><p>No inline assets</p></body></html>")
+    assert publisher.finish() == 0
+    assert not os.path.exists(tmp_path / ASSET_DIR)
+
+def test_finish_removes_stale_assets(tmp_path):
+    publisher = Publisher(str(tmp_path))
+    publisher.publish_page("index.html", PAGE)
+    publisher.finish()
+    (tmp_path / ASSET_DIR / "style.old.css").write_text("stale")
+
+    publisher = Publisher(str(tmp_path))
+    publisher.publish_page("index.html", PAGE)
+    assert publisher.finish() == 1
+    assert "style.old.css" not in os.listdir(tmp_path / ASSET_DIR)
@@ -0,0 +1,62 @@
+import math
+import random
+import statistics
+
+from models import Listing, MatchSnapshot, Rarity
+from quality import MIN_LOG_MAD, LogPriceSpread, check_snapshot, weighted_median
+
+def listing(price_cents, rarity=Rarity.EPIC, tag="m1"):
+    return Listing(tag=tag, price_cents=price_cents, text=f"Card\n{price_cents}", rarity=rarity)
+
+class StreamedListings:
+    """Iterable-only listings, like a crawl spool: counts how often it is read"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.reads = 0
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __iter__(self):
+        self.reads += 1
+        return (listing(price) for price in self.prices)
+
+def test_weighted_median_matches_statistics():
+    rng = random.Random(7)
+    for n in range(1, 30):
+        values = sorted(rng.uniform(0, 10) for _ in range(n))
+        assert math.isclose(weighted_median([(v, 1) for v in values]), statistics.median(values))
+    assert weighted_median([(1, 1), (2, 5), (3, 1)]) == 2
+
+def test_spread_is_exact_for_grid_sized_groups():
+    rng = random.Random(3)
+    prices = [rng.randint(10_000, 900_000) for _ in range(40)]
+    spread = LogPriceSpread()
+    for price in prices:
+        spread.add(price)
+    logs = [math.log(price) for price in prices]
+    median = statistics.median(logs)
+    mad = max(statistics.median(abs(v - median) for v in logs), MIN_LOG_MAD)
+    assert all(math.isclose(a, b) for a, b in zip(spread.center(), (median, mad)))
+
+def test_outlier_is_flagged():
+    prices = [50_000, 51_000, 52_000, 49_000, 50_500, 48_000, 5_000_000]
+    report = check_snapshot(MatchSnapshot(tag="m1", url="", listings=[listing(p) for p in prices], timestamp=""))
+    assert [outlier.price_cents for outlier, _ in report.outliers] == [5_000_000]
+    assert report.ok and report.warnings
+
+def test_large_crawl_is_streamed():
+    rng = random.Random(1)
+    prices = [round(rng.lognormvariate(math.log(50_000), 0.3)) for _ in range(20_000)] + [90_000_000]
+    listings = StreamedListings(prices)
+    report = check_snapshot(MatchSnapshot(tag="m1", url="", listings=listings, timestamp=""))
+    # Schema problems stop the check after the first read
+    assert listings.reads == 1
+    assert report.problems == ["implausible price US$900,000.00"]
+
+    listings = StreamedListings(prices[:-1] + [4_000_000])
+    report = check_snapshot(MatchSnapshot(tag="m1", url="", listings=listings, timestamp=""))
+    assert listings.reads == 2
+    assert 4_000_000 in [outlier.price_cents for outlier, _ in report.outliers]
+    assert report.ok
@@ -0,0 +1,122 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import query
+from models import Listing, MatchSnapshot, Rarity
+
+def snapshot(match_num, timestamp, prices, rarity=Rarity.ICONIC):
+    listings = [Listing(f"m{match_num}", cents, f"US${cents / 100:.2f}", '', rarity) for cents in prices]
+    return MatchSnapshot(f"m{match_num}", f"https://example.test/m{match_num}", listings, timestamp)
+
+def write_current(data_dir, match_num, snap, mtime):
+    path = os.path.join(data_dir, f"m{match_num}.json")
+    with open(path, 'w') as f:
+        json.dump(snap.to_dict(), f)
+    os.utime(path, (mtime, mtime))
+
+def append_history(data_dir, match_num, snap):
+    os.makedirs(os.path.join(data_dir, "history"), exist_ok=True)
+    with open(os.path.join(data_dir, "history", f"m{match_num}.jsonl"), 'a') as f:
+        f.write(json.dumps(snap.to_dict()) + "\n")
+
+def args(**values):
+    defaults = dict(since=None, until=None, country=None, min_price=None, max_price=None,
+                    tags=None, stage=None, venue=None, rarity=None)
+    return SimpleNamespace(**{**defaults, **values})
+
+def prices(rows):
+    return [row['price'] for row in rows]
+
+def test_refresh_picks_up_new_history_lines_and_replaced_current_files(tmp_path):
+    data_dir = str(tmp_path)
+    first = snapshot(1, "2026-06-01T10:00:00", [50000, 40000])
+    append_history(data_dir, 1, first)
+    write_current(data_dir, 1, first, 1_000_000)
+
+    index = query.MarketIndex(data_dir)
+    try:
+        assert index.refresh() == 1
+        assert index.refresh() == 0
+        assert prices(index.listings({})) == ["US$400.00", "US$500.00"]
+
+        # A re-scrape appends a history line and replaces the current file
+        second = snapshot(1, "2026-06-05T10:00:00", [30000])
+        append_history(data_dir, 1, second)
+        write_current(data_dir, 1, second, 1_000_100)
+        assert index.refresh() == 1
+        assert prices(index.listings({})) == ["US$300.00"]
+        assert prices(index.listings({'since': "2026-01-01T00:00:00"})) == ["US$300.00", "US$400.00", "US$500.00"]
+        assert index.db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 2
+    finally:
+        index.close()
+
+def test_invalid_and_unpriced_listings_are_not_indexed(tmp_path):
+    data_dir = str(tmp_path)
+    snap = snapshot(1, "2026-06-01T10:00:00", [50000, 0])
+    snap.listings.append(Listing("m1", 100, "US$1.00 NO LONGER VALID", '', Rarity.ICONIC))
+    write_current(data_dir, 1, snap, 1_000_000)
+
+    index = query.MarketIndex(data_dir)
+    try:
+        index.refresh()
+        assert prices(index.listings({})) == ["US$500.00"]
+        assert index.db.execute("SELECT lowest_cents FROM snapshots").fetchone()[0] == 50000
+    finally:
+        index.close()
+
+def test_venue_aliases_resolve_to_the_schedule_name(tmp_path):
+    data_dir = str(tmp_path)
+    write_current(data_dir, 1, snapshot(1, "2026-06-01T10:00:00", [50000]), 1_000_000)
+    write_current(data_dir, 2, snapshot(2, "2026-06-01T10:00:00", [20000]), 1_000_000)
+
+    filters = query.build_filters(args(venue="guadalajara"))
+    assert filters['venue'] == "Zapopan"
+    index = query.MarketIndex(data_dir)
+    try:
+        index.refresh()
+        assert [row['match'] for row in index.listings(filters)] == [2]
+    finally:
+        index.close()
+
+    with pytest.raises(ValueError, match="Springfield"):
+        query.build_filters(args(venue="Springfield"))
+
+def test_since_window_compares_against_the_first_snapshot_in_it(tmp_path):
+    data_dir = str(tmp_path)
+    for ts, cents in [("2026-06-01T10:00:00", 90000), ("2026-06-08T10:00:00", 70000), ("2026-06-10T10:00:00", 60000)]:
+        append_history(data_dir, 1, snapshot(1, ts, [cents]))
+    write_current(data_dir, 1, snapshot(1, "2026-06-10T10:00:00", [60000]), 1_000_000)
+
+    index = query.MarketIndex(data_dir)
+    try:
+        index.refresh()
+        since = query.parse_time("7d", now=query.datetime(2026, 6, 11))
+        assert since == "2026-06-04T00:00:00"
+        [row] = index.changes({'since': since})
+        assert (row['from'], row['to'], row['change']) == ("US$700.00", "US$600.00", "-US$100.00")
+        [row] = index.changes({})
+        assert row['from'] == "US$900.00"
+        assert prices(index.listings({'since': since, 'until': "2026-06-09T00:00:00"})) == ["US$700.00"]
+    finally:
+        index.close()
+
+def test_changes_by_venue_takes_the_lowest_floor_of_its_matches(tmp_path):
+    data_dir = str(tmp_path)
+    # m1 and m24 are in Mexico City, m2 in Zapopan
+    for match_num, start, now in [(1, 90000, 60000), (24, 80000, 85000), (2, 20000, 25000)]:
+        append_history(data_dir, match_num, snapshot(match_num, "2026-06-01T10:00:00", [start]))
+        write_current(data_dir, match_num, snapshot(match_num, "2026-06-10T10:00:00", [now]), 1_000_000)
+
+    index = query.MarketIndex(data_dir)
+    try:
+        index.refresh()
+        rows = index.changes({'since': "2026-05-01T00:00:00"}, by='venue')
+    finally:
+        index.close()
+    assert [(row['venue'], row['matches'], row['from'], row['to'], row['change']) for row in rows] == [
+        ("Mexico City", 2, "US$800.00", "US$600.00", "-US$200.00"),
+        ("Zapopan", 1, "US$200.00", "US$250.00", "+US$50.00"),
+    ]
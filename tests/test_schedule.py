@@ -0,0 +1,74 @@
+import copy
+import json
+
+import pytest
+
+import schedule
+from create_website import extract_venue_from_listings, summarize_match
+from models import Listing, MatchSnapshot, Rarity
+
+@pytest.fixture(scope="module")
+def data():
+    with open(schedule.SCHEDULE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_data_file_loads_into_consistent_indexes(data):
+    loaded = schedule.load_schedule()
+    assert len(loaded.matches) == len(data['matches']) == 104
+    assert loaded.countries == ("USA", "Canada", "Mexico")
+
+    final = loaded.match(104)
+    assert (final.venue, final.stage, final.knockout, final.country) == ("East Rutherford", "Final", True, "USA")
+    assert not loaded.match(1).knockout
+    assert loaded.match(105) is None
+
+    # Every match is indexed exactly once by stage and by venue
+    assert sorted(n for numbers in loaded.stage_matches.values() for n in numbers) == list(range(1, 105))
+    assert sorted(n for numbers in loaded.venue_matches.values() for n in numbers) == list(range(1, 105))
+    for match_num, info in loaded.matches.items():
+        assert match_num in loaded.stage_matches[info.stage]
+        assert match_num in loaded.venue_matches[info.venue]
+        assert loaded.venues[info.venue] == (info.country, info.stadium)
+
+def test_aliases_resolve_case_insensitively():
+    loaded = schedule.get_schedule()
+    assert loaded.canonical_venue("guadalajara") == "Zapopan"
+    assert loaded.canonical_venue("Zapopan") == "Zapopan"
+    assert loaded.canonical_venue("Springfield") == "Springfield"
+    assert loaded.find_venue("Seat at SoFi Stadium, section 120") == "Inglewood"
+    assert loaded.find_venue("no venue here") is None
+
+@pytest.mark.parametrize("change, message", [
+    (lambda d: d.update(version=99), "Unsupported schedule version"),
+    (lambda d: d['venues'].append(dict(d['venues'][0])), "Duplicate venue"),
+    (lambda d: d['venues'][0].update(country="Atlantis"), "unknown country"),
+    (lambda d: d['venues'][1]['aliases'].append(d['venues'][0]['name']), "maps to both"),
+    (lambda d: d['matches'].append(dict(d['matches'][0])), "Duplicate match M1"),
+    (lambda d: d['matches'][0].update(venue="Springfield"), "unknown venue"),
+    (lambda d: d['matches'][0].update(stage="Semi-final replay"), "unknown stage"),
+    (lambda d: d['matches'][0].update(date="2026-06-11"), "invalid date"),
+    (lambda d: d['matches'].pop(50), "contiguous"),
+    (lambda d: d['stages'].append(dict(d['stages'][0])), "Duplicate stage"),
+])
+def test_validation_rejects_inconsistent_data(data, change, message):
+    broken = copy.deepcopy(data)
+    change(broken)
+    with pytest.raises(ValueError, match=message):
+        schedule.validate_schedule(broken)
+
+def test_unknown_venue_fallback():
+    loaded = schedule.get_schedule()
+    assert loaded.venue_country("Springfield") == schedule.UNKNOWN
+    assert loaded.venue_country("Toronto") == "Canada"
+
+    plain = [Listing("m999", 50000, "US$500.00", "Match ticket", Rarity.ICONIC)]
+    assert extract_venue_from_listings(plain) == schedule.UNKNOWN
+
+    # A match outside the schedule takes its venue from the listings, else Unknown
+    snapshot = MatchSnapshot("m999", "https://example.test/m999", plain, "2026-06-01T10:00:00")
+    match, _ = summarize_match(999, snapshot, [])
+    assert (match.venue, match.country, match.stage, match.date) == (schedule.UNKNOWN, schedule.UNKNOWN,
+                                                                      schedule.UNKNOWN, 'TBD')
+    snapshot.listings.append(Listing("m999", 60000, "US$600.00 Toronto", "Match ticket", Rarity.ICONIC))
+    match, _ = summarize_match(999, snapshot, [])
+    assert (match.venue, match.country) == ("Toronto", "Canada")
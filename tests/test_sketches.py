@@ -0,0 +1,105 @@
+import json
+import random
+
+from models import Listing, MatchSnapshot, Rarity
+from sketches import KLLSketch, MatchSketches
+
+def filled(values, k=200):
+    sketch = KLLSketch(k)
+    for value in values:
+        sketch.update(value)
+    return sketch
+
+def total_weight(sketch):
+    return sum(weight for _, weight in sketch.weighted_items())
+
+def rank_error(sketch, values, q):
+    """How far (as a share of the data) the sketch's q-quantile is from rank q"""
+    estimate = sketch.quantile(q)
+    ordered = sorted(values)
+    below = sum(1 for value in ordered if value < estimate)
+    at_or_below = sum(1 for value in ordered if value <= estimate)
+    target = q * len(ordered)
+    if below <= target <= at_or_below:
+        return 0.0
+    return min(abs(below - target), abs(at_or_below - target)) / len(ordered)
+
+def snapshot(timestamp, prices, rarity=Rarity.ICONIC):
+    return MatchSnapshot("m1", "", [Listing("m1", cents, "", "", rarity) for cents in prices], timestamp)
+
+def test_compaction_conserves_weight():
+    rng = random.Random(7)
+    sketch = KLLSketch(k=50)
+    for n in range(1, 20_001):
+        sketch.update(rng.randint(1, 1_000_000))
+        if n % 997 == 0:
+            assert total_weight(sketch) == sketch.n == n
+    assert total_weight(sketch) == sketch.n
+    # Bounded size however many values it has seen
+    assert sum(len(items) for items in sketch.levels) < 4 * 50
+
+def test_exact_until_compaction():
+    values = [500, 100, 300, 200, 400]
+    sketch = filled(values)
+    assert sketch.weighted_items() == [(value, 1) for value in sorted(values)]
+    assert sketch.quantiles([0, 0.5, 1]) == [100, 300, 500]
+
+def test_merge_conserves_weight_and_tracks_the_combined_quantiles():
+    rng = random.Random(3)
+    low = [rng.randint(1, 50_000) for _ in range(6000)]
+    high = [rng.randint(40_000, 900_000) for _ in range(9000)]
+    merged = filled(low)
+    merged.merge(filled(high))
+    assert merged.n == total_weight(merged) == len(low) + len(high)
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert rank_error(merged, low + high, q) < 0.03, q
+
+    # Merging into an empty sketch is a copy
+    empty = KLLSketch()
+    empty.merge(filled(low))
+    assert empty.to_dict() == filled(low).to_dict()
+
+def test_same_input_gives_byte_identical_sketches():
+    rng = random.Random(11)
+    values = [rng.randint(1, 2_000_000) for _ in range(5000)]
+    first, second = filled(values), filled(values)
+    encoded = json.dumps(first.to_dict(), separators=(',', ':'))
+    assert encoded == json.dumps(second.to_dict(), separators=(',', ':'))
+
+    decoded = KLLSketch.from_dict(json.loads(encoded))
+    assert json.dumps(decoded.to_dict(), separators=(',', ':')) == encoded
+    assert decoded.quantiles([0.1, 0.5, 0.9]) == first.quantiles([0.1, 0.5, 0.9])
+
+def test_match_sketches_round_trip():
+    sketches = MatchSketches()
+    sketches.add_snapshot(snapshot("2026-06-02T09:00:00", [1000, 2000, 3000]))
+    sketches.add_snapshot(snapshot("2026-06-01T09:00:00", [5000], Rarity.EPIC))
+    encoded = json.dumps(sketches.to_dict(), separators=(',', ':'))
+    assert json.dumps(MatchSketches.from_dict(json.loads(encoded)).to_dict(), separators=(',', ':')) == encoded
+
+def test_add_snapshot_skips_invalid_and_unpriced_listings():
+    snap = snapshot("2026-06-01T09:00:00", [1000, 0])
+    snap.listings.append(Listing("m1", 500, "NO LONGER VALID", "", Rarity.ICONIC))
+    sketches = MatchSketches()
+    sketches.add_snapshot(snap)
+    assert sketches.days["2026-06-01"][Rarity.ICONIC].n == 1
+
+def test_window_bounds_are_inclusive_days():
+    sketches = MatchSketches()
+    for day, cents in [("2026-06-01", 100), ("2026-06-02", 200), ("2026-06-03", 300), ("2026-06-10", 400)]:
+        sketches.add_snapshot(snapshot(f"{day}T23:59:59", [cents]))
+
+    def window(since=None, until=None):
+        merged = sketches.window(since, until)
+        return [value for value, _ in merged[Rarity.ICONIC].weighted_items()] if merged else []
+
+    assert window() == [100, 200, 300, 400]
+    assert window("2026-06-02", "2026-06-03") == [200, 300]
+    assert window("2026-06-02", "2026-06-02") == [200]
+    assert window(until="2026-06-01") == [100]
+    assert window("2026-06-04", "2026-06-09") == []
+
+    # Windows count back from the latest scraped day, including it
+    [(_, week), (_, month), (_, _)] = sketches.recent_windows()
+    assert [row['observations'] for row in week] == [1]
+    assert [row['observations'] for row in month] == [4]
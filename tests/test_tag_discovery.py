@@ -0,0 +1,40 @@
+import pytest
+
+from data_loader import load_snapshots
+from simulated_marketplace import FaultProfile, render_tag_index, start_server
+from tag_discovery import active_match_numbers, fetch_tag_counts, parse_tag_counts
+
+@pytest.fixture(scope="module")
+def snapshots():
+    return {snapshot.tag: snapshot for snapshot in load_snapshots().values()}
+
+def test_parses_every_tag_of_the_index(snapshots):
+    counts = parse_tag_counts(render_tag_index(snapshots))
+    assert counts == {tag: len(snapshot.listings) for tag, snapshot in snapshots.items()}
+
+def test_counts_and_other_links():
+    page = """
+        <a href="/">Home</a>
+        <a href="/marketplace?tags=m7">M7 (1,204)</a>
+        <a href="/marketplace?tags=m8">M8</a>
+        <a href="/marketplace?tags=m9"><span>M9</span> <span class="count">0</span></a>
+        <a href="/marketplace?tags=m1,m2">Both</a>
+        <a href="/marketplace?tags=brazil">Brazil 12</a>
+    """
+    assert parse_tag_counts(page) == {'m7': 1204, 'm8': None, 'm9': 0, 'brazil': 12}
+
+def test_active_match_numbers():
+    counts = {'m10': 3, 'm2': None, 'm3': 0, 'brazil': 12, 'm4x': 5}
+    assert active_match_numbers(counts) == [2, 10]
+
+def test_discovery_against_stand_in(snapshots):
+    server, base_url = start_server(faults=FaultProfile(listing_counts={'m1': 0, 'm200': 4, 'brazil': 2}))
+    try:
+        counts = fetch_tag_counts(base_url)
+    finally:
+        server.shutdown()
+    assert counts['m1'] == 0 and counts['m200'] == 4 and counts['brazil'] == 2
+    numbers = active_match_numbers(counts)
+    assert 1 not in numbers and 200 in numbers
+    assert numbers == sorted(int(tag[1:]) for tag, count in counts.items()
+                             if tag[1:].isdigit() and count)